@@ -0,0 +1,125 @@
+# backend/benchmarks/common.py
+"""
+Общие утилиты бенчмарков
+
+Запуск из каталога backend/:  python -m benchmarks.<имя>
+Бенчмарки с БД используют настройки подключения из .env (локальный Postgres).
+"""
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+
+from src.database.connection import engine
+
+
+def quiet_engine() -> None:
+    """Отключить echo SQL движка — иначе логирование искажает замеры"""
+    engine.sync_engine.echo = False
+
+
+def rss_mb() -> float:
+    """Текущий RSS процесса в МБ (Linux: /proc, иначе пиковый ru_maxrss)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextmanager
+def timer():
+    """Замер времени блока: with timer() as t: ...; t["seconds"]"""
+    result = {"seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+
+def percentiles(samples: list[float]) -> dict:
+    """p50/p95/p99 по списку замеров (в секундах)"""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    ordered = sorted(samples)
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "p50": statistics.median(ordered),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+    }
+
+
+def _fmt(value) -> str:
+    if isinstance(value, float):
+        return f"{value:>14.2f}" if abs(value) >= 0.1 or value == 0 else f"{value:>14.4g}"
+    return f"{value!s:>14}"
+
+
+def report(name: str, rows: list[dict]) -> None:
+    """Напечатать результаты таблицей и одной строкой JSON"""
+    print(f"\n=== {name} ===")
+    if rows:
+        headers = list(rows[0].keys())
+        print("  ".join(f"{h:>14}" for h in headers))
+        for row in rows:
+            print("  ".join(_fmt(row[h]) for h in headers))
+    print(json.dumps({"benchmark": name, "results": rows}, ensure_ascii=False))
+
+
+# ========== СОХРАНЕНИЕ И СРАВНЕНИЕ ==========
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def write_results(path: str, name: str, rows: list[dict]) -> None:
+    """Сохранить результаты в JSON с окружением прогона (для compare_results)"""
+    document = {
+        "benchmark": name,
+        "created_at": time.time(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": rows,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(baseline: list[dict], current: list[dict], key: str = "name",
+                    metric: str = "p50_us", threshold: float = 0.1) -> list[dict]:
+    """
+    Сравнить два прогона по metric (меньше — лучше): строки с изменением,
+    status = regression, если рост больше threshold (доля), improved — если
+    падение больше threshold, new / missing — замер есть только в одном прогоне
+    """
+    before = {row[key]: row for row in baseline}
+    after = {row[key]: row for row in current}
+    rows = []
+    for name in [*before, *(n for n in after if n not in before)]:
+        old, new = before.get(name), after.get(name)
+        if old is None or new is None:
+            rows.append({key: name, "before": old[metric] if old else "-", "after": new[metric] if new else "-",
+                         "change_pct": "-", "status": "missing" if new is None else "new"})
+            continue
+        change = (new[metric] - old[metric]) / old[metric] if old[metric] else 0.0
+        status = "regression" if change > threshold else "improved" if change < -threshold else "ok"
+        rows.append({key: name, "before": old[metric], "after": new[metric],
+                     "change_pct": change * 100, "status": status})
+    return rows
@@ -0,0 +1,103 @@
+# backend/benchmarks/counter_stripes.py
+"""
+Бенчмарк конкуренции за счётчик голосов
+
+Много параллельных голосующих увеличивают счётчик ОДНОГО варианта.
+При K=1 все транзакции ждут блокировку одной строки, при K>1 — разных
+полос. --hold-ms имитирует остальную работу транзакции голоса
+(вставка в votes и т.п.), пока блокировка строки удерживается.
+
+    python -m benchmarks.counter_stripes --voters 200 --votes 20 --stripes 1 2 4 8 16
+"""
+import argparse
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.common import quiet_engine, report, timer
+from src.config import settings
+from src.database.connection import AsyncSessionLocal, create_tables
+from src.models.poll import Poll, Option
+from src.queries.orm import CounterStripeRepository
+
+
+async def _setup_option() -> tuple[int, int]:
+    async with AsyncSessionLocal() as session:
+        poll = Poll(
+            title="bench: counter stripes",
+            description="",
+            end_date=datetime.now() + timedelta(days=1),
+            total_votes=0,
+        )
+        session.add(poll)
+        await session.flush()
+        option = Option(poll_id=poll.id, text="hot", votes=0)
+        session.add(option)
+        await session.commit()
+        return poll.id, option.id
+
+
+async def _cleanup(poll_id: int) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("DELETE FROM polls WHERE id = :id"), {"id": poll_id})
+        await session.commit()
+
+
+async def _voter(sessions, poll_id: int, option_id: int, stripes: int, votes: int, hold: float) -> None:
+    for _ in range(votes):
+        async with sessions() as session:
+            await CounterStripeRepository(session).increment(
+                poll_id, option_id, uuid.uuid4().hex, stripes
+            )
+            if hold:
+                await session.execute(text("SELECT pg_sleep(:s)"), {"s": hold})
+            await session.commit()
+
+
+async def run(voters: int, votes: int, stripes_list: list[int], hold_ms: float) -> list[dict]:
+    quiet_engine()
+    await create_tables()
+    poll_id, option_id = await _setup_option()
+    # Отдельный пул на всех голосующих: меряем блокировки строк, а не очередь к пулу
+    bench_engine = create_async_engine(settings.DATABASE_URL_asyncpg, pool_size=voters, max_overflow=0)
+    sessions = async_sessionmaker(bench_engine, expire_on_commit=False)
+    rows = []
+    try:
+        for stripes in stripes_list:
+            with timer() as t:
+                await asyncio.gather(*[
+                    _voter(sessions, poll_id, option_id, stripes, votes, hold_ms / 1000)
+                    for _ in range(voters)
+                ])
+            async with AsyncSessionLocal() as session:
+                counted = await CounterStripeRepository(session).rollup([poll_id])
+            total = voters * votes
+            rows.append({
+                "stripes": stripes,
+                "votes": total,
+                "counted": counted,
+                "seconds": t["seconds"],
+                "votes_per_sec": total / t["seconds"],
+            })
+    finally:
+        await bench_engine.dispose()
+        await _cleanup(poll_id)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--voters", type=int, default=50, help="параллельных голосующих (= размер пула)")
+    parser.add_argument("--votes", type=int, default=20, help="голосов на голосующего")
+    parser.add_argument("--stripes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--hold-ms", type=float, default=2.0, help="удержание блокировки в транзакции")
+    args = parser.parse_args()
+    rows = asyncio.run(run(args.voters, args.votes, args.stripes, args.hold_ms))
+    report("counter_stripes", rows)
+
+
+if __name__ == "__main__":
+    main()
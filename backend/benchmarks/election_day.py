@@ -0,0 +1,375 @@
+# backend/benchmarks/election_day.py
+"""
+Нагрузочный прогон дня выборов по файлу сценария
+
+Сценарий (benchmarks/scenarios/*.json) — фазы с открытой моделью
+нагрузки: rate запросов в секунду (пуассоновский поток, необязательные
+всплески bursts) и смесь действий mix с весами:
+
+  login    POST /api/auth/login (сначала студенты, ещё не входившие)
+  vote     POST /api/votes/ с Idempotency-Key как у фронтенда; доля
+           offline_share уходит в офлайн-очередь клиента вместо отправки,
+           доля duplicate_vote_share — повторный голос в том же опросе
+  replay   синхронизация офлайн-очереди: тот же ключ, иногда дважды
+  results  GET /api/polls/{id}/results (горячий опрос с вероятностью hot_share)
+  listing  GET /api/polls/?include_my_vote=true
+  active   GET /api/polls/active
+  check    GET /api/votes/check/{id}
+  history  GET /api/votes/user-votes
+
+Приложение вызывается в процессе (ASGI-транспорт, с lifespan; ключи
+settings сценария применяются к настройкам) или по --url. Опросы
+создаются и удаляются напрямую в БД из .env — при --url это должна
+быть та же БД. Ограничитель частоты сервера при --url не отключается.
+
+Отчёт: пропускная способность по фазам, p50/p95/p99 по маршрутам и
+сверка голосов по созданным опросам: options.votes (+ неперенесённые
+полосы) и polls.total_votes против таблицы votes и против голосов,
+принятых по ответам клиента. Код выхода 1 — расхождения или доля
+неожиданных ответов (5xx, 404, 422 валидации, ошибки транспорта) больше
+--max-error-rate: отказ повторного голоса (400) и 429 ожидаемы.
+
+    python -m benchmarks.election_day benchmarks/scenarios/election_day.json
+    python -m benchmarks.election_day benchmarks/scenarios/smoke.json --time-scale 0.5
+    python -m benchmarks.election_day benchmarks/scenarios/election_day.json --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import text
+
+from benchmarks.common import percentiles, quiet_engine, report, write_results
+from src.database.connection import AsyncSessionLocal, create_tables
+from src.main import app
+from src.queries.orm import OptionRepository, PollRepository
+from src.config import settings
+
+ACTIONS = {
+    # действие: (метод, шаблон маршрута)
+    "login": ("POST", "/api/auth/login"),
+    "vote": ("POST", "/api/votes/"),
+    "replay": ("POST", "/api/votes/ (replay)"),
+    "results": ("GET", "/api/polls/{poll_id}/results"),
+    "listing": ("GET", "/api/polls/"),
+    "active": ("GET", "/api/polls/active"),
+    "check": ("GET", "/api/votes/check/{poll_id}"),
+    "history": ("GET", "/api/votes/user-votes"),
+}
+ACCEPTED = (200, 201, 202)
+# Ожидаемые ответы по действиям; остальное — ошибки прогона
+EXPECTED = {
+    "login": {"200", "429"},
+    "vote": {"200", "201", "202", "400", "429"},
+    "replay": {"200", "201", "202", "400", "429"},
+}
+EXPECTED_READ = {"200", "429"}
+
+
+class Client:
+    """Состояние виртуальных студентов: токены, отправленные голоса, офлайн-очередь"""
+
+    def __init__(self, http: httpx.AsyncClient, scenario: dict, prefix: str, polls: dict, rng: random.Random):
+        self.http = http
+        self.prefix = prefix
+        self.polls = polls
+        self.rng = rng
+        self.offline_share = scenario.get("offline_share", 0.0)
+        self.duplicate_share = scenario.get("duplicate_vote_share", 0.0)
+        self.pending_logins = [f"{prefix}s{i}" for i in range(scenario["students"])]
+        rng.shuffle(self.pending_logins)
+        self.tokens: dict[str, str] = {}
+        self.logged_in: list[str] = []
+        self.voted: dict[str, set[int]] = {}
+        self.offline: list[dict] = []
+        self.accepted: dict[int, int] = {}
+        self.latencies: dict[str, list[float]] = {name: [] for name in ACTIONS}
+        self.statuses: dict[str, dict[str, int]] = {name: {} for name in ACTIONS}
+
+    # ========== ВЫБОР ==========
+    def _poll(self, hot_share: float) -> int:
+        group = "hot" if self.polls["hot"] and self.rng.random() < hot_share else "cold"
+        return self.rng.choice(self.polls[group] or self.polls["hot"])
+
+    def _student(self):
+        return self.rng.choice(self.logged_in) if self.logged_in else None
+
+    def _headers(self, student_id: str) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[student_id]}"}
+
+    # ========== ЗАПРОСЫ ==========
+    async def _send(self, action: str, method: str, path: str, **kwargs) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            response = await self.http.request(method, path, **kwargs)
+            outcome = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, outcome = None, type(e).__name__
+        self.latencies[action].append(time.perf_counter() - start)
+        self.statuses[action][outcome] = self.statuses[action].get(outcome, 0) + 1
+        return response
+
+    async def _post_vote(self, action: str, vote: dict) -> None:
+        key = f"vote-{vote['poll_id']}-{vote['student_id']}-{vote['option_id']}"
+        response = await self._send(
+            action, "POST", "/api/votes/",
+            json=vote,
+            headers={**self._headers(vote["student_id"]), "Idempotency-Key": key},
+        )
+        if response is not None and response.status_code in ACCEPTED and "idempotent-replayed" not in response.headers:
+            self.accepted[vote["poll_id"]] = self.accepted.get(vote["poll_id"], 0) + 1
+
+    async def run(self, action: str, hot_share: float) -> None:
+        student = self._student()
+        if action == "login" or (student is None and action != "replay"):
+            return await self.login()
+        if action == "vote":
+            return await self.vote(student, hot_share)
+        if action == "replay":
+            return await self.replay()
+        poll_id = self._poll(hot_share)
+        method, template = ACTIONS[action]
+        params = {"include_my_vote": "true"} if action == "listing" else None
+        await self._send(action, method, template.format(poll_id=poll_id), params=params,
+                         headers=self._headers(student))
+
+    async def login(self) -> None:
+        student = self.pending_logins.pop() if self.pending_logins else self.rng.choice(self.logged_in)
+        response = await self._send("login", "POST", "/api/auth/login",
+                                    json={"student_id": student, "name": "Load", "faculty": "Load"})
+        if response is not None and response.status_code == 200:
+            if student not in self.tokens:
+                self.logged_in.append(student)
+            self.tokens[student] = response.json()["access_token"]
+
+    async def vote(self, student: str, hot_share: float) -> None:
+        voted = self.voted.setdefault(student, set())
+        poll_id = self._poll(hot_share)
+        if poll_id in voted and self.rng.random() >= self.duplicate_share:
+            fresh = [p for p in (*self.polls["hot"], *self.polls["cold"]) if p not in voted]
+            if not fresh:
+                return
+            poll_id = self.rng.choice(fresh)
+        voted.add(poll_id)
+        vote = {"poll_id": poll_id, "option_id": self.rng.choice(self.polls["options"][poll_id]), "student_id": student}
+        if self.rng.random() < self.offline_share:
+            # Нет сети: голос ждёт синхронизации в очереди клиента
+            self.offline.append(vote)
+            return
+        await self._post_vote("vote", vote)
+
+    async def replay(self) -> None:
+        if not self.offline:
+            return
+        vote = self.offline.pop(self.rng.randrange(len(self.offline)))
+        await self._post_vote("replay", vote)
+        if self.rng.random() < 0.3:
+            # Синхронизация прервалась после отправки — очередь отправит тот же голос ещё раз
+            await self._post_vote("replay", vote)
+
+
+# ========== ФАЗЫ ==========
+async def run_phase(client: Client, phase: dict, time_scale: float, max_in_flight: int) -> dict:
+    seconds = phase["seconds"] * time_scale
+    actions = list(phase["mix"])
+    weights = [phase["mix"][a] for a in actions]
+    unknown = set(actions) - set(ACTIONS)
+    if unknown:
+        raise ValueError(f"Неизвестные действия в фазе {phase['name']}: {', '.join(sorted(unknown))}")
+    hot_share = phase.get("hot_share", 0.5)
+    bursts = phase.get("bursts")
+    rng = client.rng
+    tasks: set[asyncio.Task] = set()
+    sent = dropped = 0
+
+    start = time.monotonic()
+    while (elapsed := time.monotonic() - start) < seconds:
+        rate = phase["rate"]
+        if bursts and elapsed % (bursts["every"] * time_scale) < bursts["seconds"] * time_scale:
+            rate *= bursts["factor"]
+        await asyncio.sleep(rng.expovariate(rate))
+        if len(tasks) >= max_in_flight:
+            # Клиент не успевает — запрос не отправляется (видно в отчёте как dropped)
+            dropped += 1
+            continue
+        task = asyncio.create_task(client.run(rng.choices(actions, weights)[0], hot_share))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        sent += 1
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    duration = time.monotonic() - start
+    return {"phase": phase["name"], "seconds": duration, "sent": sent, "dropped": dropped, "rps": sent / duration}
+
+
+# ========== ДАННЫЕ ==========
+async def seed_polls(prefix: str, spec: dict) -> dict:
+    options = [f"Кандидат {i}" for i in range(spec.get("options", 4))]
+    end_date = datetime.now(timezone.utc) + timedelta(days=1)
+    polls = {"hot": [], "cold": [], "options": {}}
+    async with AsyncSessionLocal() as session:
+        repo = PollRepository(session)
+        for group in ("hot", "cold"):
+            stripes = spec.get("hot_counter_stripes", 1) if group == "hot" else 1
+            for i in range(spec.get(group, 0)):
+                poll = await repo.create_poll_with_options(f"{prefix}{group}{i}", "load", end_date, options, stripes)
+                polls[group].append(poll.id)
+                polls["options"][poll.id] = [o.id for o in await OptionRepository(session).get_by_poll_id(poll.id)]
+    return polls
+
+
+async def cleanup(prefix: str) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("DELETE FROM polls WHERE title LIKE :p"), {"p": prefix + "%"})
+        await session.execute(text("DELETE FROM users WHERE student_id LIKE :p"), {"p": prefix + "%"})
+        await session.commit()
+
+
+async def check_consistency(polls: dict, accepted: dict[int, int]) -> list[dict]:
+    """Счётчики опросов против таблицы votes и против принятых клиентом голосов"""
+    poll_ids = [*polls["hot"], *polls["cold"]]
+    async with AsyncSessionLocal() as session:
+        options = (await session.execute(text("""
+            SELECT o.poll_id, o.id, o.votes + COALESCE(s.votes, 0),
+                   (SELECT count(*) FROM votes v WHERE v.option_id = o.id)
+            FROM options o
+            LEFT JOIN (SELECT option_id, sum(votes) AS votes FROM option_counter_stripes GROUP BY option_id) s
+                   ON s.option_id = o.id
+            WHERE o.poll_id = ANY(:ids)
+        """), {"ids": poll_ids})).all()
+        totals = dict((await session.execute(text("""
+            SELECT p.id, p.total_votes + COALESCE((SELECT sum(votes) FROM option_counter_stripes s WHERE s.poll_id = p.id), 0)
+            FROM polls p WHERE p.id = ANY(:ids)
+        """), {"ids": poll_ids})).all())
+
+    rows = []
+    for poll_id in poll_ids:
+        counted = sum(c for p, _, c, _ in options if p == poll_id)
+        stored = sum(v for p, _, _, v in options if p == poll_id)
+        mismatched = [o for p, o, c, v in options if p == poll_id and c != v]
+        ok = not mismatched and counted == stored == totals.get(poll_id) == accepted.get(poll_id, 0)
+        rows.append({
+            "poll_id": poll_id,
+            "kind": "hot" if poll_id in polls["hot"] else "cold",
+            "votes_table": stored,
+            "options_votes": counted,
+            "total_votes": totals.get(poll_id),
+            "client_accepted": accepted.get(poll_id, 0),
+            "result": "ok" if ok else f"MISMATCH options {mismatched}" if mismatched else "MISMATCH",
+        })
+    return rows
+
+
+async def settle(polls: dict, accepted: dict[int, int], timeout: float) -> list[dict]:
+    """Повторять сверку, пока асинхронные счётчики (журнал, полосы) не догонят"""
+    deadline = time.monotonic() + timeout
+    while True:
+        rows = await check_consistency(polls, accepted)
+        if all(row["result"] == "ok" for row in rows) or time.monotonic() >= deadline:
+            return rows
+        await asyncio.sleep(0.5)
+
+
+# ========== ПРОГОН ==========
+async def run(scenario: dict, url: str | None, time_scale: float, max_in_flight: int,
+              settle_seconds: float, seed_value: int, keep: bool) -> dict:
+    quiet_engine()
+    if url is None:
+        for key, value in scenario.get("settings", {}).items():
+            setattr(settings, key, value)
+    await create_tables()
+    prefix = f"load-{uuid.uuid4().hex[:8]}-"
+    polls = await seed_polls(prefix, scenario["polls"])
+    phases = []
+    try:
+        async with AsyncExitStack() as stack:
+            if url is None:
+                # lifespan: журнал голосов, rollup полос, шина инвалидации — как в воркере
+                await stack.enter_async_context(app.router.lifespan_context(app))
+                transport = httpx.ASGITransport(app=app)
+                http = httpx.AsyncClient(transport=transport, base_url="http://load", timeout=60)
+            else:
+                limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+                http = httpx.AsyncClient(base_url=url, timeout=60, limits=limits)
+            await stack.enter_async_context(http)
+            client = Client(http, scenario, prefix, polls, random.Random(seed_value))
+            for phase in scenario["phases"]:
+                print(f"▶ {phase['name']}: {phase['rate']} req/s × {phase['seconds'] * time_scale:g}s")
+                phases.append(await run_phase(client, phase, time_scale, max_in_flight))
+        consistency = await settle(polls, client.accepted, settle_seconds)
+    finally:
+        if not keep:
+            await cleanup(prefix)
+
+    routes = []
+    for action, samples in client.latencies.items():
+        if not samples:
+            continue
+        method, template = ACTIONS[action]
+        statuses = client.statuses[action]
+        expected = EXPECTED.get(action, EXPECTED_READ)
+        p = percentiles(samples)
+        routes.append({
+            "route": f"{method} {template}",
+            "requests": len(samples),
+            "rps": len(samples) / sum(row["seconds"] for row in phases),
+            "p50_ms": p["p50"] * 1000,
+            "p95_ms": p["p95"] * 1000,
+            "p99_ms": p["p99"] * 1000,
+            "errors": sum(n for code, n in statuses.items() if code not in expected),
+            "statuses": " ".join(f"{code}:{n}" for code, n in sorted(statuses.items())),
+        })
+    return {"phases": phases, "routes": routes, "consistency": consistency,
+            "offline_left": len(client.offline)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario", help="JSON-файл сценария")
+    parser.add_argument("--url", help="сервер (http://localhost:8000); без него — приложение в процессе")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="множитель длительности фаз")
+    parser.add_argument("--max-in-flight", type=int, default=500, help="одновременных запросов клиента")
+    parser.add_argument("--settle", type=float, default=30.0, help="сколько ждать сходимости счётчиков, с")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="не удалять созданные опросы и студентов")
+    parser.add_argument("--output", help="сохранить отчёт в JSON")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="допустимая доля неожиданных ответов")
+    args = parser.parse_args()
+
+    with open(args.scenario) as f:
+        scenario = json.load(f)
+    result = asyncio.run(run(scenario, args.url, args.time_scale, args.max_in_flight,
+                             args.settle, args.seed, args.keep))
+    report(f"{scenario['name']}: phases", result["phases"])
+    report(f"{scenario['name']}: routes", result["routes"])
+    report(f"{scenario['name']}: consistency", result["consistency"])
+    if result["offline_left"]:
+        print(f"\n{result['offline_left']} votes left in offline queues (not counted as accepted)")
+    if args.output:
+        write_results(args.output, scenario["name"], result["routes"])
+
+    failed = False
+    requests = sum(row["requests"] for row in result["routes"])
+    errors = sum(row["errors"] for row in result["routes"])
+    error_rate = errors / requests if requests else 0.0
+    if error_rate > args.max_error_rate:
+        print(f"\n❌ Unexpected responses: {errors}/{requests} ({error_rate:.1%}), allowed {args.max_error_rate:.1%}")
+        failed = True
+    broken = [row["poll_id"] for row in result["consistency"] if row["result"] != "ok"]
+    if broken:
+        print(f"\n❌ Vote counts inconsistent for polls {broken}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print(f"\n✅ Vote counts consistent, unexpected responses {errors}/{requests} ({error_rate:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# backend/benchmarks/export_votes.py
+"""
+Потоковая выгрузка голосов: память не растёт с размером опроса
+
+Генерирует опрос с --votes синтетическими голосами (на стороне Postgres,
+generate_series), выгружает его через export_poll_votes и следит за RSS
+процесса. Завершается с кодом 1, если прирост RSS превысил --rss-limit-mb.
+
+С --synthetic база не нужна: пачки строк вместо серверного курсора
+выдаёт генератор (VoteRepository.stream_poll_votes подменяется), так что
+проверяется только то, что кодирование и gzip в export_poll_votes не
+накапливают строки. Это и есть проверка выгрузки 5M голосов под
+потолком RSS — отдельного набора тестов в проекте нет.
+
+    python -m benchmarks.export_votes --votes 5000000 --format csv --gzip
+    python -m benchmarks.export_votes --synthetic --votes 5000000
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import text
+
+from benchmarks.common import quiet_engine, report, rss_mb, timer
+from src.database.connection import AsyncSessionLocal, create_tables
+from src.services import export_service
+from src.services.export_service import export_poll_votes
+
+
+async def _setup(votes: int) -> tuple[int, str]:
+    prefix = f"exp-{uuid.uuid4().hex[:8]}-"
+    async with AsyncSessionLocal() as session:
+        poll_id = (await session.execute(text(
+            "INSERT INTO polls (title, description, end_date, total_votes, counter_stripes) "
+            "VALUES ('bench export', '', now() + interval '1 day', 0, 1) RETURNING id"
+        ))).scalar_one()
+        await session.execute(text(
+            "INSERT INTO options (poll_id, text, votes) "
+            "SELECT :poll_id, 'option ' || g, 0 FROM generate_series(1, 4) g"
+        ), {"poll_id": poll_id})
+        await session.execute(text(
+            "INSERT INTO users (student_id, name, faculty, role) "
+            "SELECT :prefix || g, 'bench', 'bench', 'USER' FROM generate_series(1, :n) g"
+        ), {"prefix": prefix, "n": votes})
+        await session.execute(text(
+            "INSERT INTO votes (poll_id, option_id, student_id) "
+            "SELECT :poll_id, o.ids[1 + g % 4], :prefix || g "
+            "FROM generate_series(1, :n) g, "
+            "(SELECT array_agg(id ORDER BY id) AS ids FROM options WHERE poll_id = :poll_id) o"
+        ), {"poll_id": poll_id, "prefix": prefix, "n": votes})
+        await session.commit()
+    return poll_id, prefix
+
+
+async def _cleanup(poll_id: int, prefix: str) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("DELETE FROM polls WHERE id = :id"), {"id": poll_id})
+        await session.execute(text("DELETE FROM users WHERE student_id LIKE :p"), {"p": prefix + "%"})
+        await session.commit()
+
+
+class _SyntheticVotes:
+    """Замена VoteRepository: пачки строк той же формы, что у серверного курсора"""
+
+    def __init__(self, votes: int):
+        self.votes = votes
+
+    def __call__(self, session):
+        return self
+
+    async def stream_poll_votes(self, poll_id: int, batch_size: int = 5000):
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for first in range(0, self.votes, batch_size):
+            yield [
+                SimpleNamespace(
+                    id=i, poll_id=poll_id, option_id=1 + i % 4, option_text=f"option {1 + i % 4}",
+                    student_id=f"student-{i}", timestamp=start + timedelta(seconds=i)
+                )
+                for i in range(first, min(first + batch_size, self.votes))
+            ]
+            await asyncio.sleep(0)
+
+
+async def _export(poll_id: int, votes: int, fmt: str, compress: bool, batch_size: int) -> dict:
+    rss_start = peak = rss_mb()
+    size = 0
+    with timer() as t:
+        async for chunk in export_poll_votes(poll_id, fmt, compress, batch_size):
+            size += len(chunk)
+            peak = max(peak, rss_mb())
+    return {
+        "votes": votes,
+        "format": fmt + (".gz" if compress else ""),
+        "mb_out": size / 2**20,
+        "seconds": t["seconds"],
+        "rows_per_sec": votes / t["seconds"],
+        "rss_start_mb": rss_start,
+        "rss_growth_mb": peak - rss_start,
+    }
+
+
+async def run(votes: int, fmt: str, compress: bool, batch_size: int, synthetic: bool = False) -> dict:
+    if synthetic:
+        # Сессия export_poll_votes не выполняет запросов — соединение с БД не открывается
+        export_service.VoteRepository = _SyntheticVotes(votes)
+        return await _export(0, votes, fmt, compress, batch_size)
+
+    quiet_engine()
+    await create_tables()
+    poll_id, prefix = await _setup(votes)
+    try:
+        return await _export(poll_id, votes, fmt, compress, batch_size)
+    finally:
+        await _cleanup(poll_id, prefix)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--votes", type=int, default=5_000_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--rss-limit-mb", type=float, default=64.0)
+    parser.add_argument("--synthetic", action="store_true", help="строки из генератора, без Postgres")
+    args = parser.parse_args()
+    row = asyncio.run(run(args.votes, args.format, args.gzip, args.batch_size, args.synthetic))
+    report("export_votes", [row])
+    if row["rss_growth_mb"] > args.rss_limit_mb:
+        print(f"FAIL: RSS grew by {row['rss_growth_mb']:.1f} MB > {args.rss_limit_mb} MB")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
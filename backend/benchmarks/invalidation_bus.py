@@ -0,0 +1,123 @@
+# backend/benchmarks/invalidation_bus.py
+"""
+Шина инвалидации между двумя процессами: задержка доставки и сброс после обрыва
+
+Процесс-подписчик (второй «воркер») запускает invalidation_bus и считает
+полученные ключи темы bench. Текущий процесс коммитит транзакции с
+invalidation_bus.publish и меряет время от commit до получения. Затем
+соединение LISTEN подписчика обрывается (pg_terminate_backend) —
+ожидается переподключение и полный сброс кэша (handler(None)).
+
+    python -m benchmarks.invalidation_bus --messages 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import time
+
+from sqlalchemy import text
+
+from benchmarks.common import percentiles, quiet_engine, report
+from src.database.connection import AsyncSessionLocal
+from src.services.invalidation_bus import INVALIDATION_CHANNEL, invalidation_bus
+
+
+def _subscriber(ready, events, stop) -> None:
+    async def main() -> None:
+        quiet_engine()
+
+        def handler(key):
+            events.put((key, time.time()))
+
+        invalidation_bus.subscribe("bench", handler)
+        invalidation_bus.start()
+        while not invalidation_bus.status()["listening"]:
+            await asyncio.sleep(0.05)
+        ready.set()
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        await invalidation_bus.stop()
+
+    asyncio.run(main())
+
+
+def _drain(events, until: float) -> list:
+    items = []
+    while time.time() < until:
+        try:
+            items.append(events.get(timeout=max(0.01, until - time.time())))
+        except Exception:
+            break
+    return items
+
+
+async def run(messages: int, concurrency: int) -> list[dict]:
+    quiet_engine()
+    ctx = mp.get_context("spawn")
+    ready, stop, events = ctx.Event(), ctx.Event(), ctx.Queue()
+    worker = ctx.Process(target=_subscriber, args=(ready, events, stop), daemon=True)
+    worker.start()
+    if not await asyncio.to_thread(ready.wait, 30):
+        raise RuntimeError("подписчик не подключился к Postgres")
+    _drain(events, time.time() + 0.5)  # сброс при первом подключении
+
+    committed: dict[str, float] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def publish(i: int) -> None:
+        async with semaphore, AsyncSessionLocal() as session:
+            invalidation_bus.publish(session, "bench", i)
+            committed[str(i)] = time.time()
+            await session.commit()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[publish(i) for i in range(messages)])
+    publish_seconds = time.perf_counter() - start
+
+    received = {key: ts for key, ts in _drain(events, time.time() + 3) if key is not None}
+    latencies = [received[k] - committed[k] for k in committed if k in received]
+    p = percentiles(latencies)
+    rows = [{
+        "case": "delivery",
+        "messages": messages,
+        "received": len(received),
+        "commits_per_sec": messages / publish_seconds,
+        "p50_ms": p["p50"] * 1000,
+        "p95_ms": p["p95"] * 1000,
+        "p99_ms": p["p99"] * 1000,
+    }]
+
+    # Обрыв LISTEN: подписчик должен переподключиться и сбросить кэш целиком
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            text("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE application_name = :name"),
+            {"name": f"listen:{INVALIDATION_CHANNEL}"}
+        )
+        await session.commit()
+    cut = time.time()
+    flushes = [ts for key, ts in _drain(events, time.time() + 10) if key is None]
+    rows.append({
+        "case": "reconnect",
+        "messages": 0,
+        "received": len(flushes),
+        "commits_per_sec": 0.0,
+        "p50_ms": (flushes[0] - cut) * 1000 if flushes else -1.0,
+        "p95_ms": 0.0,
+        "p99_ms": 0.0,
+    })
+
+    stop.set()
+    worker.join(10)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    report("invalidation_bus", asyncio.run(run(args.messages, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
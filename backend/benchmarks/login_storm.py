@@ -0,0 +1,94 @@
+# backend/benchmarks/login_storm.py
+"""
+Шторм входов в 9:00: прежний путь входа против однотранзакционного
+
+Прежний путь: authenticate_user (SELECT, при необходимости INSERT + commit +
+refresh) и create_token_pair (INSERT токена + commit + refresh).
+Новый: AuthService.login — один get-or-create запрос, INSERT токена, один commit.
+
+    python -m benchmarks.login_storm --logins 5000 --concurrency 200 --new-ratio 0.3
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from sqlalchemy import text
+
+from benchmarks.common import percentiles, quiet_engine, report, timer
+from src.database.connection import AsyncSessionLocal, create_tables
+from src.services.auth_service import AuthService
+
+
+async def _legacy_login(student_id: str) -> None:
+    async with AsyncSessionLocal() as session:
+        service = AuthService(session)
+        user = await service.authenticate_user(student_id, "bench", "bench")
+        await service.create_token_pair(user, "127.0.0.1", "bench")
+
+
+async def _fast_login(student_id: str) -> None:
+    async with AsyncSessionLocal() as session:
+        await AuthService(session).login(student_id, "bench", "bench", "127.0.0.1", "bench")
+
+
+async def _storm(login, student_ids: list[str], concurrency: int) -> tuple[float, list[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(student_id: str) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await login(student_id)
+            latencies.append(time.perf_counter() - start)
+
+    with timer() as t:
+        await asyncio.gather(*[one(student_id) for student_id in student_ids])
+    return t["seconds"], latencies
+
+
+async def run(logins: int, concurrency: int, new_ratio: float) -> list[dict]:
+    quiet_engine()
+    await create_tables()
+    prefix = f"storm-{uuid.uuid4().hex[:8]}-"
+    rows = []
+    try:
+        for name, login in [("legacy", _legacy_login), ("single-tx", _fast_login)]:
+            # Часть студентов уже есть в БД (предзагружены), часть входит впервые
+            known = [f"{prefix}{name}-{i}" for i in range(int(logins * (1 - new_ratio)))]
+            fresh = [f"{prefix}{name}-new-{i}" for i in range(logins - len(known))]
+            async with AsyncSessionLocal() as session:
+                for student_id in known:
+                    await AuthService(session).authenticate_user(student_id, "bench", "bench")
+            ids = known + fresh
+            random.shuffle(ids)
+
+            seconds, latencies = await _storm(login, ids, concurrency)
+            p = percentiles(latencies)
+            rows.append({
+                "variant": name,
+                "logins": logins,
+                "logins_per_sec": logins / seconds,
+                "p50_ms": p["p50"] * 1000,
+                "p95_ms": p["p95"] * 1000,
+                "p99_ms": p["p99"] * 1000,
+            })
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("DELETE FROM users WHERE student_id LIKE :p"), {"p": prefix + "%"})
+            await session.commit()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--new-ratio", type=float, default=0.3, help="доля студентов, входящих впервые")
+    args = parser.parse_args()
+    report("login_storm", asyncio.run(run(args.logins, args.concurrency, args.new_ratio)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# backend/benchmarks/micro.py
+"""
+Микробенчмарки: токены, сериализация ответов, методы репозиториев
+
+Группы:
+  auth           create_access_token / verify_token / create_refresh_token / hash_token
+  serialization  jsonable_encoder + JSONResponse для списка опросов и результатов
+                 (так FastAPI отдаёт dict без response_model) разных размеров
+  repositories   горячие методы queries/orm.py на локальном Postgres; каждый
+                 вызов — в своей сессии, как в запросе
+
+Результаты — таблица и JSON (--output). Сравнение с сохранённым прогоном:
+--compare base.json помечает замеры, у которых metric (по умолчанию p50)
+вырос больше --threshold; код выхода 1 — есть регрессии. С --against
+new.json сравниваются два файла без нового прогона.
+
+    python -m benchmarks.micro --groups auth,serialization --output before.json
+    python -m benchmarks.micro --output after.json --compare before.json
+    python -m benchmarks.micro --compare before.json --against after.json --threshold 0.2
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from benchmarks.common import compare_results, load_results, quiet_engine, report, write_results
+from src.database.connection import AsyncSessionLocal, create_tables
+from src.models.user import UserRole
+from src.queries.orm import (
+    OptionRepository,
+    PollRepository,
+    RefreshTokenRepository,
+    UserRepository,
+    VoteRepository,
+)
+from src.utils.security import create_access_token, create_refresh_token, hash_token, verify_token
+
+GROUPS = ("auth", "serialization", "repositories")
+LISTING_SIZES = (10, 100, 1000)
+RESULT_SIZES = (4, 50, 500)
+
+
+def _row(group: str, name: str, samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e6
+    mean = sum(ordered) / len(ordered)
+    return {
+        "name": f"{group}.{name}",
+        "iterations": len(ordered),
+        "mean_us": mean * 1e6,
+        "p50_us": pick(0.5),
+        "p95_us": pick(0.95),
+        "p99_us": pick(0.99),
+        "ops_s": 1 / mean if mean else 0.0,
+    }
+
+
+def measure(group: str, name: str, fn: Callable[[], object], iterations: int) -> dict:
+    for _ in range(max(1, iterations // 10)):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _row(group, name, samples)
+
+
+async def ameasure(group: str, name: str, fn: Callable[[], Awaitable[object]], iterations: int) -> dict:
+    for _ in range(max(1, iterations // 10)):
+        await fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return _row(group, name, samples)
+
+
+# ========== AUTH ==========
+def bench_auth(iterations: int) -> list[dict]:
+    access = create_access_token({"sub": "bench-student"}, UserRole.USER)
+    refresh, _ = create_refresh_token("bench-student")
+    forged = access[:-4] + ("AAAA" if not access.endswith("AAAA") else "BBBB")
+    return [
+        measure("auth", "create_access_token", lambda: create_access_token({"sub": "bench-student"}), iterations),
+        measure("auth", "verify_token", lambda: verify_token(access), iterations),
+        measure("auth", "verify_token[refresh]", lambda: verify_token(refresh, expected_type="refresh"), iterations),
+        measure("auth", "verify_token[bad_signature]", lambda: verify_token(forged), iterations),
+        measure("auth", "create_refresh_token", lambda: create_refresh_token("bench-student"), iterations),
+        measure("auth", "hash_token", lambda: hash_token(refresh), iterations),
+    ]
+
+
+# ========== СЕРИАЛИЗАЦИЯ ==========
+def _listing(polls: int, options: int = 4) -> list[dict]:
+    """Форма ответа GET /api/polls/ (_load_polls)"""
+    now = datetime.now()
+    return [
+        {
+            "id": i,
+            "title": f"Опрос номер {i} о выборах старосты",
+            "description": "Описание опроса " * 4,
+            "end_date": (now + timedelta(days=7)).isoformat(),
+            "total_votes": 1000 + i,
+            "created_at": now.isoformat(),
+            "options": [{"id": i * options + j, "text": f"Кандидат {j}", "votes": 250 + j} for j in range(options)],
+        }
+        for i in range(polls)
+    ]
+
+
+def _results(options: int) -> dict:
+    """Форма ответа GET /api/polls/{id}/results (_load_poll_results)"""
+    now = datetime.now()
+    total = options * 100
+    return {
+        "poll_id": 1,
+        "title": "Выборы председателя студсовета",
+        "description": "Описание опроса " * 4,
+        "total_votes": total,
+        "end_date": (now + timedelta(days=7)).isoformat(),
+        "created_at": now.isoformat(),
+        "options": [
+            {"id": j, "text": f"Кандидат {j}", "votes": 100, "percentage": round(100 / total * 100, 2)}
+            for j in range(options)
+        ],
+        "has_ended": False,
+    }
+
+
+def _render(payload) -> bytes:
+    return JSONResponse(content=jsonable_encoder(payload)).body
+
+
+def bench_serialization(iterations: int) -> list[dict]:
+    rows = []
+    for size in LISTING_SIZES:
+        payload = _listing(size)
+        # Крупные ответы медленнее на порядки — меньше итераций
+        rows.append(measure("serialization", f"polls[{size}]", lambda: _render(payload), max(10, iterations * 10 // size)))
+    for size in RESULT_SIZES:
+        payload = _results(size)
+        rows.append(measure("serialization", f"results[{size}]", lambda: _render(payload), max(10, iterations * 4 // size)))
+    return rows
+
+
+# ========== РЕПОЗИТОРИИ ==========
+async def _seed(prefix: str, polls: int, voters: int) -> dict:
+    async with AsyncSessionLocal() as session:
+        users = UserRepository(session)
+        student = await users.create_user(f"{prefix}student", "Bench", "Bench")
+        for i in range(voters):
+            await users.create_user(f"{prefix}v{i}", "Bench", "Bench")
+        poll_ids, option_ids = [], []
+        for i in range(polls):
+            poll = await PollRepository(session).create_poll_with_options(
+                f"{prefix}{i}", "micro", datetime.now(timezone.utc) + timedelta(days=7), ["a", "b", "c", "d"]
+            )
+            option = (await OptionRepository(session).get_by_poll_id(poll.id))[0]
+            poll_ids.append(poll.id)
+            option_ids.append(option.id)
+            await VoteRepository(session).create_vote(poll.id, option.id, student.student_id)
+        refresh, expires_at = create_refresh_token(student.student_id)
+        await RefreshTokenRepository(session).create_token(student.student_id, hash_token(refresh), expires_at)
+    return {
+        "student_id": student.student_id,
+        "poll_id": poll_ids[0],
+        "option_id": option_ids[0],
+        "poll_ids": poll_ids,
+        "token_hash": hash_token(refresh),
+    }
+
+
+def _in_session(method: Callable) -> Callable[[], Awaitable[object]]:
+    async def call():
+        async with AsyncSessionLocal() as session:
+            return await method(session)
+    return call
+
+
+async def bench_repositories(iterations: int, polls: int) -> list[dict]:
+    quiet_engine()
+    await create_tables()
+    prefix = f"micro-{uuid.uuid4().hex[:8]}-"
+    voters = iterations + max(1, iterations // 10)
+    seed = await _seed(prefix, polls, voters)
+    student, poll_id, option_id = seed["student_id"], seed["poll_id"], seed["option_id"]
+    fresh_voters = iter(range(voters))
+
+    reads = [
+        ("UserRepository.get_by_student_id", lambda s: UserRepository(s).get_by_student_id(student)),
+        ("PollRepository.get_all_with_options", lambda s: PollRepository(s).get_all_with_options()),
+        ("PollRepository.get_by_id_with_details", lambda s: PollRepository(s).get_by_id_with_details(poll_id)),
+        ("PollRepository.get_active_polls", lambda s: PollRepository(s).get_active_polls()),
+        ("OptionRepository.get_by_poll_id", lambda s: OptionRepository(s).get_by_poll_id(poll_id)),
+        ("VoteRepository.has_user_voted_in_poll", lambda s: VoteRepository(s).has_user_voted_in_poll(poll_id, student)),
+        ("VoteRepository.get_user_votes_for_poll", lambda s: VoteRepository(s).get_user_votes_for_poll(poll_id, student)),
+        ("VoteRepository.get_user_votes_for_polls",
+         lambda s: VoteRepository(s).get_user_votes_for_polls(student, seed["poll_ids"])),
+        ("VoteRepository.get_user_vote_history", lambda s: VoteRepository(s).get_user_vote_history(student)),
+        ("VoteRepository.get_poll_results", lambda s: VoteRepository(s).get_poll_results(poll_id)),
+        ("RefreshTokenRepository.get_by_hash", lambda s: RefreshTokenRepository(s).get_by_hash(seed["token_hash"])),
+    ]
+    writes = [
+        # Каждый голос — от нового студента, иначе это путь отказа
+        ("VoteRepository.create_vote",
+         lambda s: VoteRepository(s).create_vote(poll_id, option_id, f"{prefix}v{next(fresh_voters)}")),
+        ("OptionRepository.increment_votes", lambda s: OptionRepository(s).increment_votes(option_id)),
+    ]
+
+    rows = []
+    try:
+        for name, method in [*reads, *writes]:
+            rows.append(await ameasure("repositories", name, _in_session(method), iterations))
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("DELETE FROM polls WHERE title LIKE :p"), {"p": prefix + "%"})
+            await session.execute(text("DELETE FROM users WHERE student_id LIKE :p"), {"p": prefix + "%"})
+            await session.commit()
+    return rows
+
+
+def run(groups: list[str], iterations: int, polls: int) -> list[dict]:
+    rows = []
+    if "auth" in groups:
+        rows += bench_auth(iterations)
+    if "serialization" in groups:
+        rows += bench_serialization(iterations)
+    if "repositories" in groups:
+        rows += asyncio.run(bench_repositories(max(1, iterations // 10), polls))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", default=",".join(GROUPS), help="через запятую: " + ", ".join(GROUPS))
+    parser.add_argument("--iterations", type=int, default=2000, help="итераций (репозитории — в 10 раз меньше)")
+    parser.add_argument("--polls", type=int, default=50, help="опросов в тестовых данных репозиториев")
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", help="JSON базового прогона")
+    parser.add_argument("--against", help="сравнить --compare с этим JSON без нового прогона")
+    parser.add_argument("--metric", default="p50_us", choices=["mean_us", "p50_us", "p95_us", "p99_us"])
+    parser.add_argument("--threshold", type=float, default=0.15, help="доля роста, считающаяся регрессией")
+    args = parser.parse_args()
+
+    if args.against:
+        if not args.compare:
+            parser.error("--against требует --compare")
+        rows = load_results(args.against)["results"]
+    else:
+        groups = [g.strip() for g in args.groups.split(",") if g.strip()]
+        unknown = set(groups) - set(GROUPS)
+        if unknown:
+            parser.error(f"неизвестные группы: {', '.join(sorted(unknown))}")
+        rows = run(groups, args.iterations, args.polls)
+        report("micro", rows)
+        if args.output:
+            write_results(args.output, "micro", rows)
+
+    if args.compare:
+        diff = compare_results(load_results(args.compare)["results"], rows, metric=args.metric, threshold=args.threshold)
+        report(f"micro_compare ({args.metric}, threshold {args.threshold:.0%})", diff)
+        regressions = [row["name"] for row in diff if row["status"] == "regression"]
+        if regressions:
+            print(f"\n❌ Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# backend/benchmarks/poll_import.py
+"""
+Массовый импорт опросов: по одному против INSERT ... RETURNING + COPY
+
+    python -m benchmarks.poll_import --polls 10000 --options 24
+
+Построчный путь (create_poll_with_options: flush + add на каждый вариант +
+commit) меряется на --sample опросов и экстраполируется на --polls.
+"""
+import argparse
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from benchmarks.common import quiet_engine, report, timer
+from src.database.connection import AsyncSessionLocal, create_tables
+from src.models.poll import PollCreate
+from src.queries.orm import Repository
+from src.services.poll_import import import_polls, validate_polls
+
+
+def _generate(count: int, options: int, tag: str) -> list[dict]:
+    end_date = (datetime.now() + timedelta(days=30)).isoformat()
+    return [
+        {
+            "title": f"{tag} course feedback {i}",
+            "description": "Оценка курса",
+            "end_date": end_date,
+            "options": [f"Вариант {k}" for k in range(options)],
+        }
+        for i in range(count)
+    ]
+
+
+async def _cleanup(tag: str) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("DELETE FROM polls WHERE title LIKE :t"), {"t": tag + "%"})
+        await session.commit()
+
+
+async def run(polls: int, options: int, sample: int) -> list[dict]:
+    quiet_engine()
+    await create_tables()
+    tag = f"bench-import-{uuid.uuid4().hex[:8]}"
+    rows = []
+    try:
+        one_by_one: list[PollCreate] = validate_polls(_generate(sample, options, tag))[0]
+        with timer() as t:
+            async with AsyncSessionLocal() as session:
+                repo = Repository(session)
+                for poll in one_by_one:
+                    await repo.polls.create_poll_with_options(
+                        poll.title, poll.description, poll.end_date, [o.text for o in poll.options]
+                    )
+        per_poll = t["seconds"] / sample
+        rows.append({
+            "variant": "one-by-one",
+            "polls": sample,
+            "seconds": t["seconds"],
+            "polls_per_sec": 1 / per_poll,
+            "est_s_for_all": per_poll * polls,
+        })
+
+        with timer() as t_validate:
+            bulk, errors = validate_polls(_generate(polls, options, tag))
+        with timer() as t:
+            async with AsyncSessionLocal() as session:
+                created = await import_polls(session, bulk)
+        rows.append({
+            "variant": "bulk COPY",
+            "polls": created["polls_created"],
+            "seconds": t["seconds"],
+            "polls_per_sec": created["polls_created"] / t["seconds"],
+            "est_s_for_all": t["seconds"] + t_validate["seconds"],
+        })
+    finally:
+        await _cleanup(tag)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--polls", type=int, default=10_000)
+    parser.add_argument("--options", type=int, default=24)
+    parser.add_argument("--sample", type=int, default=200)
+    args = parser.parse_args()
+    report("poll_import", asyncio.run(run(args.polls, args.options, args.sample)))
+
+
+if __name__ == "__main__":
+    main()
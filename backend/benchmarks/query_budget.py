@@ -0,0 +1,178 @@
+# backend/benchmarks/query_budget.py
+"""
+Проверка бюджета запросов к БД по маршрутам api/routes
+
+Создаются --polls опросов, студент голосует в каждом, затем каждый
+маршрут вызывается через ASGI-транспорт внутри assert_max_queries:
+число запросов не должно зависеть от числа опросов (N+1 сразу виден).
+Кэши чтения сбрасываются перед каждым вызовом. Маршруты, меняющие
+состояние (роль, выход, tracemalloc), идут в конце и работают со своими
+пользователями. Код выхода 1 — есть превышения.
+
+    python -m benchmarks.query_budget --polls 50
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import text
+
+from benchmarks.common import quiet_engine, report
+from src.database.connection import AsyncSessionLocal, create_tables
+from src.database.query_stats import assert_max_queries
+from src.main import app
+from src.models.user import UserRole
+from src.queries.orm import OptionRepository, PollRepository, UserRepository, VoteRepository
+from src.services.auth_service import AuthService
+from src.services.read_cache import poll_cache
+from src.utils.security import create_access_token
+
+# (метод, путь, тело, токен, максимум запросов)
+# Бюджеты — замеры при 10 и 50 опросах; SET LOCAL statement_timeout
+# (предохранитель БД) считается запросом
+ROUTES = [
+    # polls
+    ("GET", "/api/polls/", None, "student", 3),
+    ("GET", "/api/polls/?include_my_vote=true", None, "student", 6),
+    ("GET", "/api/polls/active", None, "student", 3),
+    ("GET", "/api/polls/{poll_id}", None, "student", 3),
+    ("GET", "/api/polls/{poll_id}/results", None, "student", 3),
+    ("GET", "/api/polls/stats/single-flight", None, "admin", 1),
+    ("GET", "/api/polls/stats/read-cache", None, "admin", 1),
+    ("POST", "/api/polls/", "poll", "admin", 4),
+    ("POST", "/api/polls/import", "import", "admin", 3),
+    ("PATCH", "/api/polls/{poll_id}/counter-stripes?counter_stripes=2", None, "admin", 6),
+    ("GET", "/api/polls/{poll_id}/export", None, "admin", 3),
+    # auth
+    ("GET", "/api/auth/me", None, "student", 2),
+    ("GET", "/api/auth/users", None, "admin", 3),
+    ("POST", "/api/auth/login", "login", None, 3),
+    ("POST", "/api/auth/refresh", None, "refresh", 9),
+    ("POST", "/api/auth/users/import", "roster", "admin", 4),
+    # votes
+    ("GET", "/api/votes/check/{poll_id}", None, "student", 3),
+    ("POST", "/api/votes/check-batch", "poll_ids", "student", 3),
+    ("GET", "/api/votes/user-votes", None, "student", 3),
+    ("GET", "/api/votes/ledger", None, "admin", 1),
+    ("POST", "/api/votes/", "vote", "fresh", 12),
+    # system
+    ("GET", "/api/system/admission", None, "admin", 1),
+    ("GET", "/api/system/rate-limit", None, "admin", 1),
+    ("GET", "/api/system/slow-queries", None, "admin", 1),
+    ("DELETE", "/api/system/slow-queries", None, "admin", 1),
+    ("POST", "/api/system/profile?seconds=0.05", None, "admin", 1),
+    ("GET", "/api/system/profiles", None, "admin", 1),
+    ("GET", "/api/system/profiles/{profile_id}", None, "admin", 1),
+    ("GET", "/api/system/memory", None, "admin", 1),
+    ("POST", "/api/system/memory/baseline", None, "admin", 1),
+    ("GET", "/api/system/memory/diff", None, "admin", 1),
+    ("DELETE", "/api/system/memory/tracemalloc", None, "admin", 1),
+    # меняют состояние — последними
+    ("PATCH", "/api/auth/users/{target_id}/role", "role", "admin", 9),
+    ("POST", "/api/auth/logout", None, "session", 7),
+]
+
+
+async def _seed(prefix: str, polls: int) -> dict:
+    async with AsyncSessionLocal() as session:
+        users = UserRepository(session)
+        student = await users.create_user(f"{prefix}student", "Bench", "Bench")
+        fresh = await users.create_user(f"{prefix}fresh", "Bench", "Bench")
+        admin = await users.create_user(f"{prefix}admin", "Bench", "Bench", UserRole.ADMIN)
+        target = await users.create_user(f"{prefix}target", "Bench", "Bench")
+        session_tokens = await AuthService(session).login(f"{prefix}session", "Bench", "Bench")
+        poll_ids, option_ids = [], []
+        for i in range(polls):
+            poll = await PollRepository(session).create_poll_with_options(
+                f"{prefix}{i}", "budget", datetime(2099, 1, 1, tzinfo=timezone.utc), ["a", "b", "c"]
+            )
+            option = (await OptionRepository(session).get_by_poll_id(poll.id))[0]
+            poll_ids.append(poll.id)
+            option_ids.append(option.id)
+            await VoteRepository(session).create_vote(poll.id, option.id, student.student_id)
+    return {
+        "poll_id": poll_ids[0],
+        "option_id": option_ids[0],
+        "poll_ids": poll_ids,
+        "fresh_id": fresh.student_id,
+        "target_id": target.student_id,
+        "tokens": {
+            "student": create_access_token({"sub": student.student_id}),
+            "fresh": create_access_token({"sub": fresh.student_id}),
+            "admin": create_access_token({"sub": admin.student_id}, UserRole.ADMIN),
+            "session": session_tokens["access_token"],
+            "refresh": session_tokens["refresh_token"],
+        },
+        "login": {"student_id": f"{prefix}login", "name": "Bench", "faculty": "Bench"},
+    }
+
+
+async def run(polls: int) -> list[dict]:
+    quiet_engine()
+    await create_tables()
+    prefix = f"budget-{uuid.uuid4().hex[:8]}-"
+    seed = await _seed(prefix, polls)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    bodies = {
+        "poll_ids": {"poll_ids": seed["poll_ids"]},
+        "vote": {"poll_id": seed["poll_id"], "option_id": seed["option_id"], "student_id": seed["fresh_id"]},
+        "login": seed["login"],
+        "poll": {"title": f"{prefix}created", "options": ["a", "b"]},
+        "import": [{"title": f"{prefix}imported", "options": ["a", "b"]}],
+        "roster": [{"student_id": f"{prefix}roster", "name": "Bench", "faculty": "Bench"}],
+        "role": {"role": UserRole.ADMIN.value},
+    }
+    # profile_id берётся из X-Profile-Id ответа POST /profile
+    params = {"poll_id": seed["poll_id"], "target_id": seed["target_id"], "profile_id": ""}
+
+    rows = []
+    try:
+        for method, route, body, token, limit in ROUTES:
+            path = route.format(**params)
+            headers = {"Authorization": f"Bearer {seed['tokens'][token]}"} if token else {}
+            poll_cache.on_poll_invalidation(None)
+            error = ""
+            try:
+                with assert_max_queries(limit) as stats:
+                    response = await client.request(method, path, json=bodies.get(body), headers=headers)
+                params["profile_id"] = response.headers.get("X-Profile-Id", params["profile_id"])
+                # создание и импорт сообщают об ошибке через success=false с кодом 200
+                payload = response.json() if "json" in response.headers.get("content-type", "") else None
+                if response.status_code >= 400:
+                    error = f"HTTP {response.status_code}"
+                elif isinstance(payload, dict) and payload.get("success") is False:
+                    error = "success=false"
+            except AssertionError as e:
+                error = "over budget"
+                print(f"{method} {path}: {e}")
+            rows.append({
+                "route": f"{method} {route}",
+                "queries": stats.queries,
+                "limit": limit,
+                "rows": stats.rows,
+                "db_ms": stats.db_seconds * 1000,
+                "result": error or "ok",
+            })
+    finally:
+        await client.aclose()
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("DELETE FROM polls WHERE title LIKE :p"), {"p": prefix + "%"})
+            await session.execute(text("DELETE FROM users WHERE student_id LIKE :p"), {"p": prefix + "%"})
+            await session.commit()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--polls", type=int, default=50, help="опросов с голосом студента")
+    args = parser.parse_args()
+    rows = asyncio.run(run(args.polls))
+    report("query_budget", rows)
+    sys.exit(1 if any(row["result"] != "ok" for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
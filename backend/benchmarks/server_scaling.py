@@ -0,0 +1,136 @@
+# backend/benchmarks/server_scaling.py
+"""
+Масштабирование пропускной способности по числу воркеров src.server
+
+Для каждого числа воркеров (1, 2, 4, ... до --max-workers) запускается
+python -m src.server, нагрузка подаётся несколькими процессами-клиентами
+(httpx, keep-alive) в течение --duration секунд, затем сервер получает
+SIGTERM и должен завершиться плавно. Нужен локальный Postgres (.env).
+
+    python -m benchmarks.server_scaling --path /api/polls --max-workers 8 --duration 15
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import percentiles, report
+from src.server import default_workers
+
+
+def _client(url: str, connections: int, duration: float, results) -> None:
+    async def main() -> None:
+        latencies: list[float] = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+            async def worker() -> None:
+                nonlocal errors
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        response = await client.get(url)
+                        if response.status_code >= 500:
+                            errors += 1
+                    except httpx.HTTPError:
+                        errors += 1
+                    latencies.append(time.perf_counter() - start)
+            await asyncio.gather(*[worker() for _ in range(connections)])
+        results.put((latencies, errors))
+
+    asyncio.run(main())
+
+
+def _wait_ready(base: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base + "/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError("сервер не поднялся")
+
+
+def measure(workers: int, args) -> dict:
+    port = args.port
+    base = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server", "--workers", str(workers), "--port", str(port),
+         "--host", "127.0.0.1", "--db-budget", str(args.db_budget)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(base)
+        ctx = mp.get_context("spawn")
+        results = ctx.Queue()
+        clients = [
+            ctx.Process(target=_client, args=(base + args.path, args.connections, args.duration, results))
+            for _ in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        samples, errors = [], 0
+        for _ in clients:
+            latencies, failed = results.get()
+            samples.extend(latencies)
+            errors += failed
+        seconds = time.perf_counter() - start
+        for client in clients:
+            client.join()
+    finally:
+        drain_start = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=90)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        drain = time.perf_counter() - drain_start
+
+    p = percentiles(samples)
+    return {
+        "workers": workers,
+        "requests": len(samples),
+        "rps": len(samples) / seconds,
+        "errors": errors,
+        "p50_ms": p["p50"] * 1000,
+        "p99_ms": p["p99"] * 1000,
+        "drain_s": drain,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="/api/polls")
+    parser.add_argument("--max-workers", type=int, default=default_workers())
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--clients", type=int, default=max(2, (os.cpu_count() or 2) // 2),
+                        help="процессов-клиентов нагрузки")
+    parser.add_argument("--connections", type=int, default=32, help="соединений на клиента")
+    parser.add_argument("--db-budget", type=int, default=80)
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+
+    counts, n = [], 1
+    while n < args.max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(args.max_workers)
+
+    rows = [measure(workers, args) for workers in counts]
+    for row in rows:
+        row["speedup"] = row["rps"] / rows[0]["rps"] if rows[0]["rps"] else 0.0
+    report("server_scaling", rows)
+
+
+if __name__ == "__main__":
+    main()
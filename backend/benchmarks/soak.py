@@ -0,0 +1,174 @@
+# backend/benchmarks/soak.py
+"""
+Soak-тест памяти: долгий прогон приложения с проверкой роста RSS
+
+Приложение вызывается через ASGI-транспорт (в том же процессе, поэтому
+RSS — это память воркера) смесью маршрутов: вход, списки и карточки
+опросов, результаты, проверки голосов, голосование. Первые --warmup
+запросов прогревают кэши, пулы и ленивые импорты; затем делается
+базовый снимок, и каждые --sample-every запросов после gc.collect
+пишется RSS. В конце — рост по пакетам src (tracemalloc, с --tracemalloc)
+и по типам объектов. Код выхода 1 — рост RSS больше --budget-mb.
+
+Ограничитель частоты выключается: все запросы идут с одного адреса.
+
+    python -m benchmarks.soak --requests 20000 --budget-mb 20 --tracemalloc
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import text
+
+from benchmarks.common import quiet_engine, report, rss_mb
+from src.database.connection import AsyncSessionLocal, create_tables
+from src.main import app
+from src.queries.orm import OptionRepository, PollRepository, UserRepository
+from src.services.memory_diagnostics import memory_diagnostics
+from src.utils.security import create_access_token
+from src.config import settings
+
+# (вес, метод, путь, тело)
+MIX = [
+    (25, "GET", "/api/polls/", None),
+    (10, "GET", "/api/polls/active", None),
+    (20, "GET", "/api/polls/{poll_id}", None),
+    (15, "GET", "/api/polls/{poll_id}/results", None),
+    (10, "GET", "/api/votes/check/{poll_id}", None),
+    (5, "POST", "/api/votes/check-batch", "poll_ids"),
+    (5, "GET", "/api/auth/me", None),
+    (5, "POST", "/api/votes/", "vote"),
+    (5, "POST", "/api/auth/login", "login"),
+]
+
+
+async def _seed(prefix: str, polls: int, students: int) -> dict:
+    async with AsyncSessionLocal() as session:
+        users = UserRepository(session)
+        tokens = []
+        for i in range(students):
+            user = await users.create_user(f"{prefix}s{i}", "Soak", "Soak")
+            tokens.append((user.student_id, create_access_token({"sub": user.student_id})))
+        options = {}
+        for i in range(polls):
+            poll = await PollRepository(session).create_poll_with_options(
+                f"{prefix}{i}", "soak", datetime(2099, 1, 1, tzinfo=timezone.utc), ["a", "b", "c", "d"]
+            )
+            options[poll.id] = [o.id for o in await OptionRepository(session).get_by_poll_id(poll.id)]
+    return {
+        "options": options,
+        "tokens": tokens,
+    }
+
+
+def _requests(seed: dict, prefix: str, rng: random.Random):
+    weights = [w for w, *_ in MIX]
+    poll_ids = list(seed["options"])
+    logins = itertools.count()
+    while True:
+        _, method, path, body = rng.choices(MIX, weights)[0]
+        poll_id = rng.choice(poll_ids)
+        student_id, token = rng.choice(seed["tokens"])
+        if body == "vote":
+            # Повторный голос — 400, это тоже рабочий путь
+            json = {"poll_id": poll_id, "option_id": rng.choice(seed["options"][poll_id]), "student_id": student_id}
+        elif body == "poll_ids":
+            json = {"poll_ids": rng.sample(poll_ids, min(10, len(poll_ids)))}
+        elif body == "login":
+            json = {"student_id": f"{prefix}l{next(logins) % 500}", "name": "Soak", "faculty": "Soak"}
+        else:
+            json = None
+        yield method, path.format(poll_id=poll_id), json, {"Authorization": f"Bearer {token}"}
+
+
+async def run(total: int, warmup: int, sample_every: int, concurrency: int,
+              polls: int, students: int, trace: bool, seed_value: int) -> dict:
+    quiet_engine()
+    settings.RATE_LIMIT_ENABLED = False
+    await create_tables()
+    prefix = f"soak-{uuid.uuid4().hex[:8]}-"
+    seed = await _seed(prefix, polls, students)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://soak")
+    requests = _requests(seed, prefix, random.Random(seed_value))
+    statuses = {}
+    curve = []
+
+    async def worker(count: int) -> None:
+        for _ in range(count):
+            method, path, json, headers = next(requests)
+            response = await client.request(method, path, json=json, headers=headers)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def batch(count: int) -> None:
+        share, rest = divmod(count, concurrency)
+        await asyncio.gather(*(worker(share + (i < rest)) for i in range(concurrency)))
+
+    try:
+        await batch(warmup)
+        gc.collect()
+        if trace:
+            memory_diagnostics.take_baseline()
+        baseline = rss_mb()
+        curve.append({"requests": 0, "rss_mb": baseline, "growth_mb": 0.0, "seconds": 0.0})
+
+        done = 0
+        start = time.perf_counter()
+        while done < total:
+            step = min(sample_every, total - done)
+            await batch(step)
+            done += step
+            gc.collect()
+            rss = rss_mb()
+            curve.append({"requests": done, "rss_mb": rss, "growth_mb": rss - baseline,
+                          "seconds": time.perf_counter() - start})
+        diff = memory_diagnostics.diff(15) if trace else None
+    finally:
+        await client.aclose()
+        memory_diagnostics.stop()
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("DELETE FROM polls WHERE title LIKE :p"), {"p": prefix + "%"})
+            await session.execute(text("DELETE FROM users WHERE student_id LIKE :p"), {"p": prefix + "%"})
+            await session.commit()
+
+    return {"curve": curve, "statuses": statuses, "diff": diff}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20_000, help="запросов после прогрева")
+    parser.add_argument("--warmup", type=int, default=2_000, help="запросов прогрева до базового снимка")
+    parser.add_argument("--sample-every", type=int, default=2_000, help="шаг замера RSS")
+    parser.add_argument("--concurrency", type=int, default=20, help="одновременных клиентов")
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--budget-mb", type=float, default=20.0, help="допустимый рост RSS")
+    parser.add_argument("--tracemalloc", action="store_true", help="рост по пакетам src (замедляет прогон)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(
+        args.requests, args.warmup, args.sample_every, args.concurrency,
+        args.polls, args.students, args.tracemalloc, args.seed,
+    ))
+    report("soak_rss", result["curve"])
+    report("soak_statuses", [{"status": code, "count": n} for code, n in sorted(result["statuses"].items())])
+    if result["diff"] is not None:
+        report("soak_by_module", [{"module": name, **g} for name, g in result["diff"]["by_module"].items()])
+        report("soak_type_growth", [{"type": name, "count": n} for name, n in result["diff"]["type_growth"].items()])
+
+    growth = result["curve"][-1]["growth_mb"]
+    seconds = result["curve"][-1]["seconds"]
+    rate = args.requests / seconds if seconds else 0.0
+    print(f"\nRSS growth {growth:.2f} MB over {args.requests} requests ({rate:.0f} req/s), budget {args.budget_mb} MB")
+    sys.exit(1 if growth > args.budget_mb else 0)
+
+
+if __name__ == "__main__":
+    main()
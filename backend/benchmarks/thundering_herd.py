@@ -0,0 +1,94 @@
+# backend/benchmarks/thundering_herd.py
+"""
+Толпа одинаковых запросов результатов опроса: с single-flight и без
+
+N конкурентных GET /api/polls/{id}/results через ASGI-транспорт против
+прямых вызовов загрузчика (каждый — свой запрос к БД). Считаются
+SQL-запросы (событие before_cursor_execute) и задержки.
+
+    python -m benchmarks.thundering_herd --herd 300 --rounds 5
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks.common import percentiles, quiet_engine, report, timer
+from src.api.routes.polls import _load_poll_results
+from src.database.connection import AsyncSessionLocal, create_tables, engine
+from src.main import app
+from src.queries.orm import PollRepository
+from src.services.single_flight import with_session
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+async def _herd(request, herd: int) -> list[float]:
+    latencies: list[float] = []
+
+    async def one() -> None:
+        start = time.perf_counter()
+        await request()
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[one() for _ in range(herd)])
+    return latencies
+
+
+async def run(herd: int, rounds: int) -> list[dict]:
+    quiet_engine()
+    await create_tables()
+    async with AsyncSessionLocal() as session:
+        poll = await PollRepository(session).create_poll_with_options(
+            "herd", "benchmark", datetime(2099, 1, 1, tzinfo=timezone.utc), ["a", "b", "c"]
+        )
+    counter = QueryCounter()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    async def via_api() -> None:
+        response = await client.get(f"/api/polls/{poll.id}/results")
+        response.raise_for_status()
+
+    async def direct() -> None:
+        await with_session(_load_poll_results, poll.id)
+
+    rows = []
+    for name, request in [("direct", direct), ("single-flight", via_api)]:
+        samples, before = [], counter.count
+        with timer() as t:
+            for _ in range(rounds):
+                samples.extend(await _herd(request, herd))
+        p = percentiles(samples)
+        rows.append({
+            "variant": name,
+            "requests": herd * rounds,
+            "queries": counter.count - before,
+            "queries_per_herd": (counter.count - before) / rounds,
+            "seconds": t["seconds"],
+            "p50_ms": p["p50"] * 1000,
+            "p99_ms": p["p99"] * 1000,
+        })
+    await client.aclose()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--herd", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    report("thundering_herd", asyncio.run(run(args.herd, args.rounds)))
+
+
+if __name__ == "__main__":
+    main()
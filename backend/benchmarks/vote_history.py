@@ -0,0 +1,130 @@
+# backend/benchmarks/vote_history.py
+"""
+История голосов студента: N+1 против одного JOIN-запроса
+
+Создаёт студента с --votes голосами (по одному в каждом опросе) и сравнивает
+прежнюю схему (все голоса, затем опрос с вариантами и вариант на каждый голос,
+1 + 2N запросов) с keyset-страницами get_user_vote_history.
+
+    python -m benchmarks.vote_history --votes 500 --page 50
+"""
+import argparse
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+
+from benchmarks.common import quiet_engine, report, timer
+from src.database.connection import AsyncSessionLocal, create_tables
+from src.database.query_stats import track_queries
+from src.models.poll import Poll, Option
+from src.models.user import User, UserRole
+from src.models.vote import Vote
+from src.queries.orm import Repository
+from src.queries.votes import get_user_votes
+
+
+async def _setup(votes: int) -> tuple[str, list[int]]:
+    student_id = f"bench-{uuid.uuid4().hex[:12]}"
+    async with AsyncSessionLocal() as session:
+        session.add(User(student_id=student_id, name="bench", faculty="bench", role=UserRole.USER))
+        # autoflush выключен: студент нужен в БД до вставки голосов
+        await session.flush()
+        poll_ids = (await session.execute(
+            insert(Poll).returning(Poll.id),
+            [{
+                "title": f"bench history {i}",
+                "description": "",
+                "end_date": datetime.now() + timedelta(days=1),
+                "total_votes": 1,
+            } for i in range(votes)]
+        )).scalars().all()
+        option_ids = (await session.execute(
+            insert(Option).returning(Option.id, Option.poll_id),
+            [{"poll_id": poll_id, "text": f"option {k}", "votes": 0} for poll_id in poll_ids for k in range(4)]
+        )).all()
+        chosen = {}
+        for option_id, poll_id in option_ids:
+            chosen.setdefault(poll_id, option_id)
+        await session.execute(
+            insert(Vote),
+            [{"poll_id": poll_id, "option_id": option_id, "student_id": student_id}
+             for poll_id, option_id in chosen.items()]
+        )
+        await session.commit()
+    return student_id, list(poll_ids)
+
+
+async def _cleanup(student_id: str, poll_ids: list[int]) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(Poll).where(Poll.id.in_(poll_ids)))
+        await session.execute(delete(User).where(User.student_id == student_id))
+        await session.commit()
+
+
+async def _legacy_history(student_id: str) -> int:
+    """Прежний алгоритм get_user_votes: 1 + 2N запросов"""
+    async with AsyncSessionLocal() as session:
+        repo = Repository(session)
+        votes = await repo.votes.get_many_by_field(Vote, "student_id", student_id)
+        rows = 0
+        for vote in votes:
+            poll = await repo.polls.get_by_id_with_details(vote.poll_id)
+            option = await repo.options.get_by_id(Option, vote.option_id)
+            if poll and option:
+                rows += 1
+        return rows
+
+
+async def _joined_history(student_id: str, page: int, first_page_only: bool) -> int:
+    async with AsyncSessionLocal() as session:
+        rows, cursor = 0, None
+        while True:
+            result = await get_user_votes(session, student_id, page, cursor)
+            rows += len(result["votes"])
+            cursor = result["next_cursor"]
+            if first_page_only or not cursor:
+                return rows
+
+
+async def run(votes: int, page: int, repeat: int) -> list[dict]:
+    quiet_engine()
+    await create_tables()
+    student_id, poll_ids = await _setup(votes)
+    rows = []
+    try:
+        variants = [
+            ("legacy N+1 (all)", lambda: _legacy_history(student_id)),
+            ("joined (all pages)", lambda: _joined_history(student_id, page, False)),
+            ("joined (first page)", lambda: _joined_history(student_id, page, True)),
+        ]
+        for name, fn in variants:
+            # Прогрев заодно считает запросы одного вызова
+            with track_queries() as stats:
+                await fn()
+            with timer() as t:
+                for _ in range(repeat):
+                    fetched = await fn()
+            rows.append({
+                "variant": name,
+                "rows": fetched,
+                "queries": stats.queries,
+                "ms_per_call": t["seconds"] / repeat * 1000,
+            })
+    finally:
+        await _cleanup(student_id, poll_ids)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--votes", type=int, default=500)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    report("vote_history", asyncio.run(run(args.votes, args.page, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
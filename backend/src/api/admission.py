@@ -0,0 +1,225 @@
+# backend/src/api/admission.py
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from src.database.connection import statement_timeout_ms
+from src.config import settings
+
+# (метод, путь) -> класс; первое совпадение. Остальные запросы идут без допуска
+ROUTE_CLASSES: List[Tuple[str, re.Pattern, str]] = [
+    ("POST", re.compile(r"^/api/votes/?$"), "vote"),
+    ("*", re.compile(r"^/api/votes/(check|check-batch|user-votes)"), "check"),
+    ("POST", re.compile(r"^/api/auth/users/import$"), "bulk"),
+    ("*", re.compile(r"^/api/auth/"), "auth"),
+    ("GET", re.compile(r"^/api/polls/\d+/export$"), "bulk"),
+    ("POST", re.compile(r"^/api/polls/import$"), "bulk"),
+    ("GET", re.compile(r"^/api/polls/\d+(/results)?$"), "read"),
+    ("GET", re.compile(r"^/api/polls/?(active)?$"), "listing"),
+]
+
+
+@dataclass
+class RouteClass:
+    name: str
+    priority: int
+    limit: int
+    queue: int
+    max_wait: float
+    statement_timeout_ms: int
+
+
+class Overloaded(Exception):
+    def __init__(self, route_class: str, reason: str, retry_after: int):
+        super().__init__(f"{route_class}: {reason}")
+        self.route_class = route_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Приоритетный допуск запросов к БД
+
+    Всего total слотов (по умолчанию — размер пула соединений). Класс
+    маршрута может занять не больше share * total слотов, так что
+    тяжёлые списки и выгрузки не вытесняют голосование. Когда слот
+    освобождается, его получает ожидающий запрос с наивысшим приоритетом,
+    для которого есть место в лимите класса. Очередь класса ограничена;
+    запрос, не получивший слот за max_wait, или не поместившийся в
+    очередь, отклоняется (503 + Retry-After).
+    """
+
+    def __init__(self, total: int, classes: Dict[str, dict]):
+        self.total = total
+        self.classes = {
+            name: RouteClass(
+                name=name,
+                priority=spec["priority"],
+                limit=max(1, math.floor(total * spec.get("share", 1.0))),
+                queue=spec["queue"],
+                max_wait=spec["max_wait"],
+                statement_timeout_ms=spec.get("statement_timeout_ms", 0),
+            )
+            for name, spec in classes.items()
+        }
+        self.in_use = 0
+        self.active: Dict[str, int] = {name: 0 for name in self.classes}
+        self.queued: Dict[str, int] = {name: 0 for name in self.classes}
+        self.stats: Dict[str, Dict[str, float]] = {
+            name: {"admitted": 0, "queued_total": 0, "shed_queue_full": 0, "shed_deadline": 0,
+                   "max_queue": 0, "wait_seconds": 0.0}
+            for name in self.classes
+        }
+        self._waiters: List[Tuple[int, int, asyncio.Future, str]] = []
+        self._seq = itertools.count()
+
+    def _has_room(self, name: str) -> bool:
+        return self.in_use < self.total and self.active[name] < self.classes[name].limit
+
+    def _take(self, name: str) -> None:
+        self.in_use += 1
+        self.active[name] += 1
+        self.stats[name]["admitted"] += 1
+
+    async def acquire(self, name: str) -> None:
+        route_class = self.classes[name]
+        # Без очереди — только если никто с таким же или более высоким приоритетом не ждёт
+        ahead = any(
+            p <= route_class.priority and not f.done() and self.active[n] < self.classes[n].limit
+            for p, _, f, n in self._waiters
+        )
+        if not ahead and self._has_room(name):
+            self._take(name)
+            return
+
+        stats = self.stats[name]
+        retry_after = max(1, math.ceil(route_class.max_wait))
+        if self.queued[name] >= route_class.queue:
+            stats["shed_queue_full"] += 1
+            raise Overloaded(name, "queue full", retry_after)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (route_class.priority, next(self._seq), future, name))
+        self.queued[name] += 1
+        stats["queued_total"] += 1
+        stats["max_queue"] = max(stats["max_queue"], self.queued[name])
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=route_class.max_wait)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Слот выдан в момент таймаута — вернуть
+                self.release(name)
+            future.cancel()
+            stats["shed_deadline"] += 1
+            raise Overloaded(name, "deadline exceeded", retry_after)
+        except BaseException:
+            if future.done() and not future.cancelled():
+                self.release(name)
+            future.cancel()
+            raise
+        finally:
+            self.queued[name] -= 1
+            stats["wait_seconds"] += time.monotonic() - start
+
+    def release(self, name: str) -> None:
+        self.in_use -= 1
+        self.active[name] -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        skipped = []
+        while self._waiters and self.in_use < self.total:
+            priority, seq, future, name = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            if self.active[name] >= self.classes[name].limit:
+                skipped.append((priority, seq, future, name))
+                continue
+            self._take(name)
+            future.set_result(None)
+        for item in skipped:
+            heapq.heappush(self._waiters, item)
+
+    def status(self) -> dict:
+        return {
+            "total_slots": self.total,
+            "in_use": self.in_use,
+            "classes": {
+                name: {
+                    "priority": c.priority,
+                    "limit": c.limit,
+                    "active": self.active[name],
+                    "queue_depth": self.queued[name],
+                    "queue_limit": c.queue,
+                    "statement_timeout_ms": c.statement_timeout_ms,
+                    **self.stats[name],
+                }
+                for name, c in self.classes.items()
+            },
+        }
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    for route_method, pattern, name in ROUTE_CLASSES:
+        if (route_method == "*" or route_method == method) and pattern.match(path):
+            return name
+    return None
+
+
+admission = AdmissionController(
+    settings.ADMISSION_TOTAL_SLOTS or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+    settings.ADMISSION_CLASSES,
+)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI-слой допуска: слот занимается до окончания ответа (включая
+    потоковую выгрузку), statement_timeout класса выставляется для
+    транзакций БД этого запроса
+    """
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED:
+            return await self.app(scope, receive, send)
+        name = classify(scope["method"], scope["path"])
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            await self.controller.acquire(name)
+        except Overloaded as e:
+            body = json.dumps(
+                {"success": False, "error": "Сервер перегружен, повторите запрос позже", "class": e.route_class},
+                ensure_ascii=False
+            ).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(e.retry_after).encode()),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        token = statement_timeout_ms.set(self.controller.classes[name].statement_timeout_ms)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            statement_timeout_ms.reset(token)
+            self.controller.release(name)
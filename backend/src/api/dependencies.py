@@ -1,15 +1,19 @@
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import Depends, HTTPException, Query, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 
 from src.database.connection import get_db
 from src.utils.security import verify_token
 from src.services.auth_service import AuthService
+from src.services.revocation import revocation_list
+from src.services.metrics import auth_failures
 from src.models.user import UserRole
+from src.config import settings
 from datetime import datetime
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
@@ -21,6 +25,7 @@ async def get_current_user(
     token_data = verify_token(credentials.credentials, expected_type="access")
     
     if not token_data:
+        auth_failures.inc("invalid")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный или просроченный токен",
@@ -28,16 +33,36 @@ async def get_current_user(
         )
     
     if token_data.get("exp", 0) < datetime.utcnow().timestamp():
+        auth_failures.inc("expired")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Токен истёк",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if revocation_list.is_revoked(token_data["student_id"], token_data.get("jti"), token_data.get("iat")):
+        auth_failures.inc("revoked")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Токен отозван",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if settings.AUTH_TRUST_TOKEN_CLAIMS:
+        # Роль берётся из подписанного токена — без запроса к БД
+        return {
+            "student_id": token_data["student_id"],
+            "role": token_data["role"],
+            "user": None,
+            "jti": token_data.get("jti"),
+            "exp": token_data.get("exp")
+        }
+    
     auth_service = AuthService(db)
     user = await auth_service.get_user_by_id(token_data["student_id"])
     
     if not user:
+        auth_failures.inc("unknown_user")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Пользователь не найден",
@@ -47,9 +72,39 @@ async def get_current_user(
     return {
         "student_id": token_data["student_id"],
         "role": user.role.value if hasattr(user.role, 'value') else str(user.role),
-        "user": user
+        "user": user,
+        "jti": token_data.get("jti"),
+        "exp": token_data.get("exp")
     }
 
+async def get_optional_user(
+    credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(optional_security)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+) -> Optional[dict]:
+    """
+    Dependency для эндпоинтов, доступных и без авторизации:
+    текущий пользователь или None (без ошибки 401)
+    """
+    if not credentials:
+        return None
+    try:
+        return await get_current_user(credentials, db)
+    except HTTPException:
+        return None
+
+async def get_user_for_my_vote(
+    credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(optional_security)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    include_my_vote: bool = Query(False, description="Добавить статус голоса текущего пользователя")
+) -> Optional[dict]:
+    """
+    Пользователь для статуса голоса в списке опросов: токен проверяется
+    только с include_my_vote=true, иначе список общий для всех
+    """
+    if not include_my_vote:
+        return None
+    return await get_optional_user(credentials, db)
+
 def require_role(allowed_roles: List[UserRole]):
     """
     Factory для создания dependency проверки роли
@@ -58,6 +113,7 @@ def require_role(allowed_roles: List[UserRole]):
         current_user: Annotated[dict, Depends(get_current_user)]
     ) -> dict:
         if current_user["role"] not in [r.value if hasattr(r, 'value') else str(r) for r in allowed_roles]:
+            auth_failures.inc("forbidden")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Недостаточно прав. Требуется одна из ролей: {[r.value if hasattr(r, 'value') else str(r) for r in allowed_roles]}"
@@ -68,6 +124,8 @@ def require_role(allowed_roles: List[UserRole]):
 #Типы для аннотаций
 DatabaseDep = Annotated[AsyncSession, Depends(get_db)]
 CurrentUser = Annotated[dict, Depends(get_current_user)]
+OptionalUser = Annotated[Optional[dict], Depends(get_optional_user)]
+MyVoteUser = Annotated[Optional[dict], Depends(get_user_for_my_vote)]
 CurrentAdmin = Annotated[dict, Depends(require_role([UserRole.ADMIN]))]
 CurrentUserOrAdmin = Annotated[dict, Depends(require_role([UserRole.USER, UserRole.ADMIN]))]
 
@@ -0,0 +1,110 @@
+# backend/src/api/metrics.py
+import time
+
+from src.api.admission import admission, classify
+from src.api.rate_limit import rate_buckets
+from src.database.circuit_breaker import db_breaker
+from src.database.connection import engine
+from src.services.invalidation_bus import invalidation_bus
+from src.services.metrics import http_in_flight, http_latency, http_requests, registry
+from src.services.read_cache import poll_cache
+from src.services.single_flight import poll_reads
+from src.services.vote_ledger import vote_ledger
+from src.config import settings
+
+BREAKER_STATES = ("closed", "half_open", "open")
+
+
+class MetricsMiddleware:
+    """
+    ASGI-слой метрик HTTP: задержка по шаблону маршрута (не по пути —
+    иначе число рядов растёт с числом опросов), статусы, запросы в работе
+    по классу допуска. Внешний слой — учитываются и отказы 429/503.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        route_class = classify(method, scope["path"]) or "other"
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc(route_class)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec(route_class)
+            # FastAPI кладёт найденный маршрут в scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            http_requests.inc(method, template, str(status_code))
+            http_latency.observe(elapsed, method, template)
+
+
+# ========== СБОРЩИКИ ==========
+@registry.collector
+def collect_pool():
+    pool = engine.sync_engine.pool
+    return [
+        ("db_pool_size", "gauge", "Configured pool size", [({}, pool.size())]),
+        ("db_pool_checked_out", "gauge", "Connections in use", [({}, pool.checkedout())]),
+        ("db_pool_checked_in", "gauge", "Idle connections in pool", [({}, pool.checkedin())]),
+        ("db_pool_overflow", "gauge", "Connections above pool size", [({}, max(pool.overflow(), 0))]),
+    ]
+
+
+@registry.collector
+def collect_breaker():
+    return [(
+        "db_circuit_state", "gauge", "DB circuit breaker state (1 for current)",
+        [({"state": state}, float(db_breaker.state == state)) for state in BREAKER_STATES],
+    )]
+
+
+@registry.collector
+def collect_caches():
+    samples = [({"cache": "poll_read", "result": result}, value) for result, value in poll_cache.stats.items()]
+    flights = poll_reads.stats(top=0)
+    return [
+        ("cache_requests_total", "counter", "Read cache lookups by result", samples),
+        ("single_flight_in_flight", "gauge", "Shared loads in progress", [({}, flights["in_flight"])]),
+    ]
+
+
+@registry.collector
+def collect_admission():
+    status = admission.status()
+    return [
+        ("admission_slots_in_use", "gauge", "Admission slots in use", [({}, status["in_use"])]),
+        ("admission_queue_depth", "gauge", "Requests waiting for a slot",
+         [({"class": name}, c["queue_depth"]) for name, c in status["classes"].items()]),
+        ("admission_shed_total", "counter", "Requests rejected by admission control",
+         [({"class": name, "reason": reason}, c[f"shed_{reason}"])
+          for name, c in status["classes"].items() for reason in ("queue_full", "deadline")]),
+        ("rate_limit_requests_total", "counter", "Rate limiter decisions",
+         [({"result": result}, rate_buckets.stats[result]) for result in ("allowed", "rejected")]),
+    ]
+
+
+@registry.collector
+def collect_background():
+    families = [
+        ("invalidation_messages_total", "counter", "Cache invalidation bus messages",
+         [({"direction": key}, value) for key, value in invalidation_bus.stats.items()]),
+    ]
+    if vote_ledger.running:
+        families.append(("vote_ledger_projection_lag", "gauge", "Ledger records not yet projected to the database",
+                         [({}, vote_ledger.projection_lag)]))
+    return families
@@ -0,0 +1,261 @@
+# backend/src/api/profiler.py
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Optional, Set
+
+import greenlet
+from sqlalchemy import event
+
+from src.database.slow_queries import fingerprint
+from src.models.user import UserRole
+from src.services.revocation import revocation_list
+from src.utils.security import verify_token
+from src.config import settings
+
+PROFILE_HEADER = b"x-profile"
+START_KEY = "profiler_query_start"
+
+# Профиль запроса, в контексте которого выполняется код (наследуется дочерними задачами)
+_profiling: ContextVar[Optional["Profile"]] = ContextVar("profiling", default=None)
+
+
+class ProfilerBusy(Exception):
+    """Уже идёт другое профилирование"""
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _awaiting_stack() -> str:
+    """Стек вызывающей корутины для SQL из greenlet сессии (как в журнале медленных запросов)"""
+    names = []
+    frame = sys._getframe(2)
+    current = greenlet.getcurrent()
+    while True:
+        while frame is not None:
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return ";".join(reversed(names))
+        frame = current.gr_frame
+
+
+class Profile:
+    def __init__(self, kind: str, target: str, interval: float, tasks: Optional[Set[asyncio.Task]]):
+        self.id = f"{os.getpid()}-{next(_ids)}"
+        self.kind = kind
+        self.target = target
+        self.interval = interval
+        self.tasks = tasks
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.started = time.time()
+        self.seconds = 0.0
+
+    def collapsed(self) -> str:
+        """Формат collapsed stacks (flamegraph.pl, speedscope): "кадр;кадр;... число" """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "target": self.target,
+            "started": self.started,
+            "seconds": round(self.seconds, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "db_queries": self.db_queries,
+            "db_ms": round(self.db_seconds * 1000, 2),
+        }
+
+
+_ids = itertools.count(1)
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик цикла событий
+
+    Пока идёт профилирование, отдельный поток раз в PROFILER_INTERVAL_MS
+    снимает стек потока цикла событий (sys._current_frames) и копит
+    свёрнутые стеки. Ожидание БД на стеке не видно, поэтому каждый SQL
+    во время профилирования добавляется отдельным листом "[db] <SQL>" к
+    стеку вызывающей корутины с весом elapsed / interval — на флеймграфе
+    время в БД и время CPU в одном масштабе.
+
+    Режимы: окно времени для всего воркера или один запрос (учитываются
+    только сэмплы, когда выполняется задача этого запроса). Одновременно
+    идёт одно профилирование; без него — только проверка флага в
+    событии движка и заголовка в ASGI-слое.
+    """
+
+    def __init__(self):
+        self.interval = settings.PROFILER_INTERVAL_MS / 1000
+        self.active: Optional[Profile] = None
+        self.results: "OrderedDict[str, Profile]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._previous_factory = None
+
+    # ========== СЭМПЛЫ ==========
+    def _sample_loop(self, profile: Profile) -> None:
+        current_tasks = asyncio.tasks._current_tasks
+        while not self._stop.wait(profile.interval):
+            if profile.tasks is not None and current_tasks.get(self._loop) not in profile.tasks:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            profile.stacks[_collapse(frame)] += 1
+            profile.samples += 1
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        start = conn.info.pop(START_KEY, None)
+        profile = self.active
+        if start is None or profile is None:
+            return
+        if profile.tasks is not None and _profiling.get() is not profile:
+            return
+        elapsed = time.perf_counter() - start
+        profile.db_queries += 1
+        profile.db_seconds += elapsed
+        weight = max(1, round(elapsed / profile.interval))
+        profile.stacks[f"{_awaiting_stack()};[db] {fingerprint(statement)[:80]}"] += weight
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if self.active is not None:
+            conn.info[START_KEY] = time.perf_counter()
+
+    def install(self, engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    # ========== СЕССИИ ==========
+    def start(self, kind: str, target: str, tasks: Optional[Set[asyncio.Task]] = None) -> Profile:
+        if self.active is not None:
+            raise ProfilerBusy(self.active.id)
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        profile = self.active = Profile(kind, target, self.interval, tasks)
+        if tasks is not None:
+            self._track_child_tasks(profile)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, args=(profile,), name="profiler", daemon=True)
+        self._thread.start()
+        return profile
+
+    def _track_child_tasks(self, profile: Profile) -> None:
+        """Задачи, созданные кодом запроса (call_next middleware, single-flight), тоже его"""
+        previous = self._loop.get_task_factory()
+
+        def factory(loop, coro, context=None):
+            if previous is not None:
+                task = previous(loop, coro, context=context) if context is not None else previous(loop, coro)
+            else:
+                task = asyncio.Task(coro, loop=loop, context=context)
+            if _profiling.get() is profile:
+                profile.tasks.add(task)
+            return task
+
+        self._previous_factory = previous
+        self._loop.set_task_factory(factory)
+
+    def stop(self) -> Profile:
+        profile, self.active = self.active, None
+        if profile.tasks is not None:
+            self._loop.set_task_factory(self._previous_factory)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        profile.seconds = time.time() - profile.started
+        self.results[profile.id] = profile
+        while len(self.results) > settings.PROFILER_KEEP_RESULTS:
+            self.results.popitem(last=False)
+        return profile
+
+    async def profile_window(self, seconds: float) -> Profile:
+        """Профиль всего воркера за окно seconds"""
+        self.start("window", f"{seconds:g}s")
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile = self.stop()
+        return profile
+
+
+profiler = SamplingProfiler()
+
+
+def _admin_token(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return False
+            data = verify_token(token, expected_type="access")
+            return bool(
+                data
+                and data["role"] == UserRole.ADMIN.value
+                and not revocation_list.is_revoked(data["student_id"], data.get("jti"), data.get("iat"))
+            )
+    return False
+
+
+class ProfilerMiddleware:
+    """
+    Профилирование отдельного запроса: заголовок X-Profile: 1 с access
+    токеном администратора. В ответ добавляется X-Profile-Id; профиль —
+    GET /api/system/profiles/{id}. Без заголовка — один проход по заголовкам.
+    """
+
+    def __init__(self, app, profiler: SamplingProfiler = profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILER_ENABLED:
+            return await self.app(scope, receive, send)
+        if not any(name == PROFILE_HEADER for name, _ in scope["headers"]) or not _admin_token(scope):
+            return await self.app(scope, receive, send)
+
+        try:
+            profile = self.profiler.start("request", f"{scope['method']} {scope['path']}", {asyncio.current_task()})
+        except ProfilerBusy:
+            return await self.app(scope, receive, send)
+
+        token = _profiling.set(profile)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _profiling.reset(token)
+            if self.profiler.active is profile:
+                self.profiler.stop()
@@ -0,0 +1,51 @@
+# backend/src/api/query_budget.py
+import time
+
+from src.api.admission import classify
+from src.database.query_stats import track_queries
+from src.config import settings
+
+
+def budget_for(method: str, path: str) -> int:
+    """Бюджет запросов к БД маршрута: по классу допуска, иначе общий; 0 — без лимита"""
+    name = classify(method, path)
+    return settings.QUERY_BUDGET_CLASS_LIMITS.get(name, settings.QUERY_BUDGET_MAX_QUERIES)
+
+
+class QueryBudgetMiddleware:
+    """
+    ASGI-слой учёта запросов к БД на каждый HTTP-запрос
+
+    Добавляет заголовок Server-Timing (db — время в БД и число запросов,
+    app — полное время до начала ответа) и печатает запросы, вышедшие за
+    бюджет по числу запросов или по времени БД, с самыми частыми SQL —
+    так видны N+1 в маршрутах.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_BUDGET_ENABLED:
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        with track_queries() as stats:
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start" and settings.SERVER_TIMING_ENABLED:
+                    timing = (
+                        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries, {stats.rows} rows", '
+                        f"app;dur={(time.perf_counter() - start) * 1000:.1f}"
+                    )
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                method, path = scope["method"], scope["path"]
+                limit = budget_for(method, path)
+                over_queries = limit and stats.queries > limit
+                over_time = stats.db_seconds * 1000 > settings.QUERY_BUDGET_MAX_DB_MS
+                if over_queries or over_time:
+                    print(f"⚠️ Query budget exceeded: {method} {path} (limit {limit or '-'}): {stats.describe()}")
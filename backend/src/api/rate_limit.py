@@ -0,0 +1,356 @@
+# backend/src/api/rate_limit.py
+import asyncio
+import base64
+import binascii
+import json
+import math
+import os
+import re
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from src.database.listener import PgListener
+from src.config import settings
+
+RATE_LIMIT_CHANNEL = "rate_limit"
+# Лимит payload NOTIFY — 8000 байт
+MAX_PAYLOAD_BYTES = 7000
+# Тело входа читается целиком только если оно не больше этого размера
+MAX_LOGIN_BODY = 4096
+
+# (метод, путь) -> [(правило, идентичность)]; первое совпадение
+LIMITED_ROUTES: List[Tuple[str, re.Pattern, List[Tuple[str, str]]]] = [
+    ("POST", re.compile(r"^/api/auth/login$"), [("login_ip", "ip"), ("login_student", "body_student")]),
+    ("POST", re.compile(r"^/api/votes/?$"), [("vote_ip", "ip"), ("vote_student", "token_student")]),
+]
+
+
+@dataclass
+class Rule:
+    name: str
+    capacity: float
+    rate: float
+
+    @property
+    def refill_seconds(self) -> float:
+        """Через сколько простоя ведро снова полное (и его можно забыть)"""
+        return self.capacity / self.rate
+
+
+class TokenBuckets:
+    """
+    Ведра токенов по ключам "правило:идентичность"
+
+    Ведро — [токены, время обновления, правило], пополняется лениво при
+    обращении. Ключи хранятся в OrderedDict в порядке последнего обращения:
+    ведро, простоявшее refill_seconds, полное и неотличимо от отсутствующего,
+    поэтому при каждом обращении с начала словаря снимается пара таких ведер,
+    а при превышении max_keys — самое давнее. Все операции O(1).
+    """
+
+    def __init__(self, rules: Dict[str, dict], max_keys: int):
+        self.rules = {
+            name: Rule(name=name, capacity=float(spec["capacity"]), rate=float(spec["rate"]))
+            for name, spec in rules.items()
+        }
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self.stats = {"allowed": 0, "rejected": 0, "evicted": 0, "expired": 0}
+
+    def _bucket(self, key: str, rule: Rule, now: float) -> list:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [rule.capacity, now, rule]
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(rule.capacity, bucket[0] + (now - bucket[1]) * rule.rate)
+            bucket[1] = now
+        return bucket
+
+    def _expire(self, now: float) -> None:
+        for _ in range(2):
+            if not self._buckets:
+                return
+            key, (tokens, updated, rule) = next(iter(self._buckets.items()))
+            if now - updated >= rule.refill_seconds:
+                del self._buckets[key]
+                self.stats["expired"] += 1
+            elif len(self._buckets) > self.max_keys:
+                del self._buckets[key]
+                self.stats["evicted"] += 1
+            else:
+                return
+
+    def take(self, keys: List[Tuple[str, str]], now: Optional[float] = None) -> float:
+        """
+        Списать по токену из каждого ведра [(правило, идентичность)]
+        Возвращает 0, если запрос пропущен, иначе — через сколько секунд повторить.
+        Если хоть одно ведро пусто, не списывается ни из одного.
+        """
+        now = time.monotonic() if now is None else now
+        buckets = []
+        retry_after = 0.0
+        for rule_name, identity in keys:
+            rule = self.rules[rule_name]
+            bucket = self._bucket(f"{rule_name}:{identity}", rule, now)
+            if bucket[0] < 1.0:
+                retry_after = max(retry_after, (1.0 - bucket[0]) / rule.rate)
+            buckets.append(bucket)
+        self._expire(now)
+
+        if retry_after:
+            self.stats["rejected"] += 1
+            return retry_after
+        for bucket in buckets:
+            bucket[0] -= 1.0
+        self.stats["allowed"] += 1
+        return 0.0
+
+    def debit(self, key: str, amount: float, now: Optional[float] = None) -> None:
+        """Списать токены, потраченные другим воркером (может уйти в минус)"""
+        rule = self.rules.get(key.partition(":")[0])
+        if rule is None:
+            return
+        now = time.monotonic() if now is None else now
+        bucket = self._bucket(key, rule, now)
+        bucket[0] = max(bucket[0] - amount, -rule.capacity)
+        self._expire(now)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimitSync:
+    """
+    Общие лимиты для нескольких воркеров через Postgres LISTEN/NOTIFY
+
+    Каждый воркер копит, сколько токенов потратил по каждому ключу, и раз
+    в interval рассылает сумму одним NOTIFY (через соединение слушателя,
+    не занимая пул). Получив чужую рассылку, воркер списывает те же токены
+    из своих ведер, так что суммарный поток по ключу стремится к лимиту
+    правила, а не к лимиту × число воркеров. Рассинхронизация — не больше
+    одного interval; при потере соединения лимит временно становится
+    локальным.
+    """
+
+    def __init__(self, buckets: TokenBuckets, interval: float):
+        self.buckets = buckets
+        self.interval = interval
+        self.origin = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._spent: Dict[str, float] = {}
+        self._listener: Optional[PgListener] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"sent": 0, "received": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._listener is not None
+
+    def record(self, keys: List[Tuple[str, str]]) -> None:
+        for rule_name, identity in keys:
+            key = f"{rule_name}:{identity}"
+            self._spent[key] = self._spent.get(key, 0.0) + 1.0
+
+    def _on_message(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message.get("o") == self.origin:
+            return
+        self.stats["received"] += 1
+        now = time.monotonic()
+        for key, amount in message.get("s", {}).items():
+            self.buckets.debit(key, float(amount), now)
+
+    def _payloads(self, spent: Dict[str, float]) -> List[str]:
+        payloads, chunk, size = [], {}, 0
+        for key, amount in spent.items():
+            if chunk and size + len(key) + 12 > MAX_PAYLOAD_BYTES:
+                payloads.append(json.dumps({"o": self.origin, "s": chunk}, separators=(",", ":")))
+                chunk, size = {}, 0
+            chunk[key] = amount
+            size += len(key) + 12
+        if chunk:
+            payloads.append(json.dumps({"o": self.origin, "s": chunk}, separators=(",", ":")))
+        return payloads
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self._spent:
+                continue
+            spent, self._spent = self._spent, {}
+            try:
+                for payload in self._payloads(spent):
+                    if not await self._listener.notify(payload):
+                        break
+                    self.stats["sent"] += 1
+            except Exception as e:
+                print(f"Rate limit sync failed: {e}")
+
+    def start(self) -> None:
+        # Новый origin в каждом воркере (после fork)
+        self.origin = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._listener = PgListener(RATE_LIMIT_CHANNEL, self._on_message)
+        self._listener.start()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._listener:
+            await self._listener.stop()
+            self._listener = None
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.running,
+            "connected": bool(self._listener and self._listener.connected),
+            "pending_keys": len(self._spent),
+            **self.stats,
+        }
+
+
+rate_buckets = TokenBuckets(settings.RATE_LIMIT_RULES, settings.RATE_LIMIT_MAX_KEYS)
+rate_limit_sync = RateLimitSync(rate_buckets, settings.RATE_LIMIT_SYNC_INTERVAL_SECONDS)
+
+
+def _client_ip(scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _token_student(scope) -> Optional[str]:
+    """
+    sub из Bearer-токена без проверки подписи — ведро на студента, а не на
+    токен (новый вход не даёт новое ведро). Подпись проверит маршрут;
+    поддельный токен с чужим sub тратит ведро студента, но сам упирается
+    в vote_ip своего адреса.
+    """
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.partition(b" ")
+            if scheme.lower() != b"bearer" or not token:
+                return None
+            parts = token.split(b".")
+            if len(parts) != 3:
+                return None
+            try:
+                payload = json.loads(base64.urlsafe_b64decode(parts[1] + b"=" * (-len(parts[1]) % 4)))
+                student_id = payload.get("sub")
+            except (ValueError, AttributeError, binascii.Error):
+                return None
+            return str(student_id)[:64] if student_id else None
+    return None
+
+
+async def _read_body(receive) -> Tuple[bytes, bool, Optional[dict]]:
+    """
+    Прочитать тело запроса
+    Возвращает: (тело, полностью ли прочитано в пределах MAX_LOGIN_BODY,
+    сообщение, прервавшее чтение, — http.disconnect)
+    """
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return b"".join(chunks), False, message
+        chunk = message.get("body", b"")
+        chunks.append(chunk)
+        size += len(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks), True, None
+        if size > MAX_LOGIN_BODY:
+            return b"".join(chunks), False, None
+
+
+def _replay(body: bytes, complete: bool, interrupted: Optional[dict], receive):
+    """receive, который сначала отдаёт уже прочитанное тело (и разрыв соединения, если был)"""
+    messages = [{"type": "http.request", "body": body, "more_body": not complete}]
+    if interrupted is not None:
+        # Клиент ушёл — приложение должно получить disconnect, а не ждать остаток тела
+        messages.append(interrupted)
+
+    async def replay():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return replay
+
+
+def _body_student(body: bytes) -> Optional[str]:
+    try:
+        student_id = json.loads(body).get("student_id")
+    except (ValueError, AttributeError):
+        return None
+    return str(student_id)[:64] if student_id else None
+
+
+async def _reject(send, retry_after: float) -> None:
+    body = json.dumps(
+        {"success": False, "error": "Слишком много запросов, повторите позже"},
+        ensure_ascii=False
+    ).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """
+    ASGI-слой ограничения частоты для входа и голосования
+
+    Стоит снаружи допуска и маршрутов: отклонённый запрос не ждёт слот,
+    не проверяет JWT и не обращается к БД — только разбор заголовков
+    (и маленького JSON тела входа) и пара обращений к словарю.
+    """
+
+    def __init__(self, app, buckets: TokenBuckets = rate_buckets, sync: RateLimitSync = rate_limit_sync):
+        self.app = app
+        self.buckets = buckets
+        self.sync = sync
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+        method, path = scope["method"], scope["path"]
+        for route_method, pattern, rules in LIMITED_ROUTES:
+            if route_method == method and pattern.match(path):
+                break
+        else:
+            return await self.app(scope, receive, send)
+
+        keys = []
+        for rule_name, kind in rules:
+            if kind == "ip":
+                identity = _client_ip(scope)
+            elif kind == "token_student":
+                identity = _token_student(scope)
+            else:
+                body, complete, interrupted = await _read_body(receive)
+                receive = _replay(body, complete, interrupted, receive)
+                identity = _body_student(body) if complete else None
+            # Без идентичности (нет токена, битое тело) запрос дойдёт до проверки и отклонится там
+            if identity is not None:
+                keys.append((rule_name, identity))
+
+        retry_after = self.buckets.take(keys)
+        if retry_after:
+            return await _reject(send, retry_after)
+        if self.sync.running:
+            self.sync.record(keys)
+        await self.app(scope, receive, send)
@@ -1,5 +1,5 @@
 # backend/src/api/routes/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 
@@ -7,6 +7,8 @@ from src.models.user import UserCreate, UserUpdateRole, UserRole
 from src.services.auth_service import AuthService
 from src.api.dependencies import DatabaseDep, CurrentUser, CurrentAdmin
 from src.utils.security import hash_token
+from src.services.revocation import revocation_list
+from src.services.roster_import import parse_roster, validate_roster, import_roster
 
 router = APIRouter()
 
@@ -23,17 +25,13 @@ async def login(
     try:
         auth_service = AuthService(db)
         
-        user = await auth_service.authenticate_user(
-            student_id=user_data.student_id,
-            name=user_data.name,
-            faculty=user_data.faculty
-        )
-        
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent", None)
         
-        tokens = await auth_service.create_token_pair(
-            user=user,
+        tokens = await auth_service.login(
+            student_id=user_data.student_id,
+            name=user_data.name,
+            faculty=user_data.faculty,
             ip_address=ip_address,
             user_agent=user_agent
         )
@@ -99,15 +97,22 @@ async def refresh_token(
 @router.post("/logout", status_code=status.HTTP_200_OK)
 async def logout(
     db: DatabaseDep,
-    current_user: CurrentUser
+    current_user: CurrentUser,
+    all_sessions: bool = Query(True)
 ):
     """
     Завершение сессии
-    Отзывает все refresh токены пользователя
+    all_sessions=true: отзываются все refresh и access токены пользователя
+    all_sessions=false: отзывается только текущий access токен
     """
     try:
         auth_service = AuthService(db)
-        await auth_service.revoke_all_tokens(current_user["student_id"])
+        if all_sessions or not current_user.get("jti"):
+            await auth_service.revoke_all_tokens(current_user["student_id"])
+        else:
+            await auth_service.revoke_access_token(
+                current_user["student_id"], current_user["jti"], current_user["exp"]
+            )
         
         return {
             "success": True,
@@ -123,12 +128,21 @@ async def logout(
 
 @router.get("/me", status_code=status.HTTP_200_OK)
 async def get_current_user_info(
-    current_user: CurrentUser
+    current_user: CurrentUser,
+    db: DatabaseDep
 ):
     """
     Получить информацию о текущем пользователе
     """
     user = current_user["user"]
+    if user is None:
+        # AUTH_TRUST_TOKEN_CLAIMS: пользователь не загружался при авторизации
+        user = await AuthService(db).get_user_by_id(current_user["student_id"])
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь не найден"
+            )
     return {
         "id": user.id,
         "student_id": user.student_id,
@@ -149,22 +163,27 @@ async def update_user_role_endpoint(
     #Изменить роль пользователя (только для администратор имеет права доступа)
     from src.queries.users import update_user_role
     
-    if student_id == current_admin["student_id"] and role_data.role != UserRole.ADMIN:
+    # use_enum_values: в role_data.role строка, колонке нужен UserRole
+    role = UserRole(role_data.role)
+    if student_id == current_admin["student_id"] and role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Администратор не может понизить свои права через API"
         )
     
-    updated_user = await update_user_role(db, student_id, role_data.role)
+    updated_user = await update_user_role(db, student_id, role)
     if not updated_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Пользователь не найден"
         )
     
+    # Выданные токены содержат старую роль — отзываем их
+    await revocation_list.revoke_user(db, student_id)
+    
     return {
         "success": True,
-        "message": f"Роль пользователя {student_id} изменена на {role_data.role.value}",
+        "message": f"Роль пользователя {student_id} изменена на {role.value}",
         "user": updated_user
     }
 
@@ -177,4 +196,37 @@ async def get_all_users_endpoint(
     #Получить список всех пользователей (только для администратор имеет права доступа)
     from src.queries.users import get_all_users
     users = await get_all_users(db)
-    return {"success": True, "count": len(users), "users": users}
\ No newline at end of file
+    return {"success": True, "count": len(users), "users": users}
+
+
+@router.post("/users/import", status_code=status.HTTP_200_OK)
+async def import_roster_endpoint(
+    request: Request,
+    db: DatabaseDep,
+    current_admin: CurrentAdmin,
+    format: str = Query(None, pattern="^(json|csv)$"),
+    strict: bool = Query(False)
+):
+    #Массовая загрузка списка студентов (student_id, name, faculty, role) — upsert (только для администратора)
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "json")
+    try:
+        items = parse_roster(await request.body(), fmt)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Не удалось разобрать файл: {str(e)}"
+        )
+    
+    rows, errors = validate_roster(items)
+    if errors and strict:
+        return {"success": False, "created": 0, "updated": 0, "errors": errors}
+    
+    try:
+        result = await import_roster(db, rows)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка импорта пользователей: {str(e)}"
+        )
+    
+    return {"success": not errors, **result, "errors": errors}
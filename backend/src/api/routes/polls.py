@@ -86,21 +86,195 @@
 #             detail=f"Ошибка при создании опроса: {str(e)}"
 #         )
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
 from sqlalchemy import select, func
 
 from src.models.poll import Poll, Option
-from src.api.dependencies import DatabaseDep, CurrentUser, CurrentAdmin
+from src.queries.orm import CounterStripeRepository, PollRepository, VoteRepository
+from src.api.dependencies import DatabaseDep, CurrentUser, CurrentAdmin, MyVoteUser
+from src.services.export_service import export_poll_votes, EXPORT_MEDIA_TYPES
+from src.services.poll_import import parse_polls, validate_polls, import_polls
+from src.services.invalidation_bus import invalidation_bus
+from src.services.single_flight import poll_reads, with_session
+from src.services.read_cache import poll_cache
+from src.database.circuit_breaker import CircuitOpenError, db_breaker
+from src.config import settings
 
 router = APIRouter()
 
+# ========== ЗАГРУЗКА ДЛЯ SINGLE-FLIGHT ==========
+# Одинаковые конкурентные чтения выполняются одним запросом к БД
+# (poll_reads.do), результат общий — его нельзя изменять в обработчике
+
+async def _options_by_poll(db: AsyncSession, poll_ids: List[int]) -> Dict[int, List[Option]]:
+    """Варианты нескольких опросов одним запросом"""
+    options: Dict[int, List[Option]] = {poll_id: [] for poll_id in poll_ids}
+    if poll_ids:
+        result = await db.execute(
+            select(Option).where(Option.poll_id.in_(poll_ids)).order_by(Option.id)
+        )
+        for option in result.scalars():
+            options[option.poll_id].append(option)
+    return options
+
+
+def _poll_summary(poll: Poll, options: List[Option], pending: Dict[int, int]) -> Dict[str, Any]:
+    return {
+        "id": poll.id,
+        "title": poll.title,
+        "description": poll.description,
+        "end_date": poll.end_date.isoformat() if poll.end_date else None,
+        "total_votes": poll.total_votes + sum(pending.get(opt.id, 0) for opt in options),
+        "created_at": poll.created_at.isoformat() if poll.created_at else None,
+        "options": [
+            {
+                "id": opt.id,
+                "text": opt.text,
+                "votes": opt.votes + pending.get(opt.id, 0)
+            }
+            for opt in options
+        ]
+    }
+
+
+async def _load_polls(db: AsyncSession, skip: int, limit: int) -> List[Dict[str, Any]]:
+    """Страница опросов (новые первыми) с вариантами и неперенесёнными полосами счётчиков"""
+    result = await db.execute(
+        select(Poll).order_by(Poll.created_at.desc(), Poll.id.desc()).offset(skip).limit(limit)
+    )
+    polls = result.scalars().all()
+    options = await _options_by_poll(db, [poll.id for poll in polls])
+    pending = await CounterStripeRepository(db).get_pending_votes(
+        [poll.id for poll in polls if poll.counter_stripes > 1]
+    )
+    return [_poll_summary(poll, options[poll.id], pending) for poll in polls]
+
+
+async def _load_poll(db: AsyncSession, poll_id: int) -> Optional[Dict[str, Any]]:
+    """Опрос с вариантами; None — опроса нет"""
+    result = await db.execute(
+        select(Poll).where(Poll.id == poll_id)
+    )
+    poll = result.scalar_one_or_none()
+    if not poll:
+        return None
+    
+    options_result = await db.execute(
+        select(Option).where(Option.poll_id == poll_id)
+    )
+    options = options_result.scalars().all()
+    
+    pending = {}
+    if poll.counter_stripes > 1:
+        pending = await CounterStripeRepository(db).get_pending_votes([poll_id])
+    
+    return {
+        "id": poll.id,
+        "title": poll.title,
+        "description": poll.description,
+        "end_date": poll.end_date.isoformat() if poll.end_date else None,
+        "total_votes": poll.total_votes + sum(pending.values()),
+        "created_at": poll.created_at.isoformat() if poll.created_at else None,
+        "options": [
+            {
+                "id": opt.id,
+                "text": opt.text,
+                "votes": opt.votes + pending.get(opt.id, 0)
+            }
+            for opt in options
+        ]
+    }
+
+
+async def _load_poll_results(db: AsyncSession, poll_id: int) -> Optional[Dict[str, Any]]:
+    """Результаты опроса с процентами; None — опроса нет"""
+    poll_result = await db.execute(
+        select(Poll).where(Poll.id == poll_id)
+    )
+    poll = poll_result.scalar_one_or_none()
+    if not poll:
+        return None
+    
+    options_result = await db.execute(
+        select(Option).where(Option.poll_id == poll_id).order_by(Option.votes.desc())
+    )
+    options = options_result.scalars().all()
+    
+    # Шардированный счётчик: добавляем ещё не перенесённые полосы
+    pending = {}
+    if poll.counter_stripes > 1:
+        pending = await CounterStripeRepository(db).get_pending_votes([poll_id])
+        options = sorted(options, key=lambda o: o.votes + pending.get(o.id, 0), reverse=True)
+    poll_total = poll.total_votes + sum(pending.values())
+    
+    # Рассчитываем проценты
+    total_votes = poll_total or 1  # чтобы избежать деления на ноль
+    options_with_percents = []
+    
+    for option in options:
+        option_votes = option.votes + pending.get(option.id, 0)
+        percentage = (option_votes / total_votes) * 100 if total_votes > 0 else 0
+        
+        options_with_percents.append({
+            "id": option.id,
+            "text": option.text,
+            "votes": option_votes,
+            "percentage": round(percentage, 2)
+        })
+    
+    return {
+        "poll_id": poll.id,
+        "title": poll.title,
+        "description": poll.description,
+        "total_votes": poll_total,
+        "end_date": poll.end_date.isoformat() if poll.end_date else None,
+        "created_at": poll.created_at.isoformat() if poll.created_at else None,
+        "options": options_with_percents,
+        "has_ended": poll.end_date < datetime.now(timezone.utc) if poll.end_date else False
+    }
+
+
+async def _load_active_polls(db: AsyncSession) -> List[Dict[str, Any]]:
+    """Активные опросы (ещё не завершившиеся)"""
+    current_time = datetime.now(timezone.utc)
+    
+    result = await db.execute(
+        select(Poll)
+        .where(Poll.end_date > current_time)
+        .order_by(Poll.created_at.desc())
+    )
+    polls = result.scalars().all()
+    pending = await CounterStripeRepository(db).get_pending_votes(
+        [poll.id for poll in polls if poll.counter_stripes > 1]
+    )
+    
+    options = await _options_by_poll(db, [poll.id for poll in polls])
+    return [{**_poll_summary(poll, options[poll.id], pending), "is_active": True} for poll in polls]
+
+def _mark_stale(response: Response, warning: Optional[str], age: float) -> None:
+    """Ответ из последнего удачного документа: Warning + Age"""
+    if warning:
+        response.headers["Warning"] = warning
+        response.headers["Age"] = str(int(age))
+
+
+def _unavailable(e: CircuitOpenError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": str(int(e.retry_after))}
+    )
+
 # ========== GET ALL POLLS ==========
 @router.get("/")
 async def get_polls(
     db: DatabaseDep,
+    response: Response,
+    current_user: MyVoteUser,
     skip: int = Query(0, ge=0, description="Сколько записей пропустить"),
     limit: int = Query(100, ge=1, le=100, description="Лимит записей")
 ):
@@ -108,42 +282,25 @@ async def get_polls(
     Получить список всех активных опросов
     """
     try:
-        # Получаем опросы
-        result = await db.execute(
-            select(Poll).order_by(Poll.created_at.desc())
+        page, warning, age = await poll_cache.get(
+            ("polls", skip, limit), lambda: with_session(_load_polls, skip, limit)
         )
-        polls = result.scalars().all()
+        _mark_stale(response, warning, age)
+        # Пользователь есть только при include_my_vote=true (MyVoteUser)
+        if not current_user:
+            return page
         
-        # Вручную создаем ответ для каждого опроса
-        response_polls = []
-        for poll in polls[skip:skip + limit]:
-            # Получаем варианты для этого опроса
-            options_result = await db.execute(
-                select(Option).where(Option.poll_id == poll.id)
-            )
-            options = options_result.scalars().all()
-            
-            # Создаем словарь вручную
-            poll_dict = {
-                "id": poll.id,
-                "title": poll.title,
-                "description": poll.description,
-                "end_date": poll.end_date.isoformat() if poll.end_date else None,
-                "total_votes": poll.total_votes,
-                "created_at": poll.created_at.isoformat() if poll.created_at else None,
-                "options": [
-                    {
-                        "id": opt.id,
-                        "text": opt.text,
-                        "votes": opt.votes
-                    }
-                    for opt in options
-                ]
-            }
-            response_polls.append(poll_dict)
-        
-        return response_polls
+        # Статус голоса — персональный, добавляется к копии общего ответа
+        my_votes = await VoteRepository(db).get_user_votes_for_polls(
+            current_user["student_id"], [poll["id"] for poll in page]
+        )
+        return [
+            {**poll, "has_voted": poll["id"] in my_votes, "my_vote": my_votes.get(poll["id"])}
+            for poll in page
+        ]
         
+    except CircuitOpenError as e:
+        raise _unavailable(e)
     except Exception as e:
         print(f"Error getting polls: {str(e)}")
         raise HTTPException(
@@ -180,12 +337,20 @@ async def create_new_poll(
                 "error": "Должен быть хотя бы один вариант ответа"
             }
         
+        counter_stripes = poll_data.get("counter_stripes", 1)
+        if not isinstance(counter_stripes, int) or not 1 <= counter_stripes <= settings.COUNTER_STRIPES_MAX:
+            return {
+                "success": False,
+                "error": f"counter_stripes должен быть от 1 до {settings.COUNTER_STRIPES_MAX}"
+            }
+        
         # 1. Создаем опрос
         poll = Poll(
             title=poll_data["title"],
             description=poll_data.get("description", ""),
-            end_date=poll_data.get("end_date") or datetime.now() + timedelta(days=7),
-            total_votes=0
+            end_date=poll_data.get("end_date") or datetime.now(timezone.utc) + timedelta(days=7),
+            total_votes=0,
+            counter_stripes=counter_stripes
         )
         
         db.add(poll)
@@ -202,6 +367,7 @@ async def create_new_poll(
             db.add(option)
             created_options.append(option)
         
+        invalidation_bus.publish(db, "poll", poll.id)
         await db.commit()
         
         print(f"✅ Poll created successfully with ID: {poll.id}")
@@ -223,21 +389,61 @@ async def create_new_poll(
             "error": f"Ошибка при создании опроса: {str(e)}"
         }
 
+# ========== GET ACTIVE POLLS ==========
+# Статические пути — до /{poll_id}, иначе он перехватит их как poll_id
+@router.get("/active")
+async def get_active_polls(
+    response: Response
+):
+    """
+    Получить только активные опросы (еще не завершившиеся)
+    """
+    try:
+        polls, warning, age = await poll_cache.get(("active",), lambda: with_session(_load_active_polls))
+        _mark_stale(response, warning, age)
+        return polls
+        
+    except CircuitOpenError as e:
+        raise _unavailable(e)
+    except Exception as e:
+        print(f"Error getting active polls: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка при получении активных опросов: {str(e)}"
+        )
+
+# ========== SINGLE-FLIGHT STATS ==========
+@router.get("/stats/single-flight")
+async def get_single_flight_stats(
+    admin_id: CurrentAdmin,
+    top: int = Query(20, ge=1, le=1000)
+):
+    """
+    Статистика схлопывания одинаковых чтений (только для администраторов)
+    calls — запросов, fetches — реальных загрузок из БД, shared — присоединившихся
+    """
+    return poll_reads.stats(top)
+
+# ========== READ CACHE / DB BREAKER STATS ==========
+@router.get("/stats/read-cache")
+async def get_read_cache_stats(
+    admin_id: CurrentAdmin
+):
+    """Кэш последних удачных ответов и состояние предохранителя БД (только для администраторов)"""
+    return {"cache": poll_cache.status(), "db_breaker": db_breaker.status()}
+
 # ========== GET POLL BY ID ==========
 @router.get("/{poll_id}")
 async def get_poll(
     poll_id: int,
-    db: DatabaseDep
+    response: Response
 ):
     """
     Получить опрос по ID
     """
     try:
-        # Получаем опрос
-        result = await db.execute(
-            select(Poll).where(Poll.id == poll_id)
-        )
-        poll = result.scalar_one_or_none()
+        poll, warning, age = await poll_cache.get(("poll", poll_id), lambda: with_session(_load_poll, poll_id))
+        _mark_stale(response, warning, age)
         
         if not poll:
             raise HTTPException(
@@ -245,32 +451,12 @@ async def get_poll(
                 detail="Опрос не найден"
             )
         
-        # Получаем варианты
-        options_result = await db.execute(
-            select(Option).where(Option.poll_id == poll_id)
-        )
-        options = options_result.scalars().all()
-        
-        # Создаем ответ вручную
-        return {
-            "id": poll.id,
-            "title": poll.title,
-            "description": poll.description,
-            "end_date": poll.end_date.isoformat() if poll.end_date else None,
-            "total_votes": poll.total_votes,
-            "created_at": poll.created_at.isoformat() if poll.created_at else None,
-            "options": [
-                {
-                    "id": opt.id,
-                    "text": opt.text,
-                    "votes": opt.votes
-                }
-                for opt in options
-            ]
-        }
+        return poll
         
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        raise _unavailable(e)
     except Exception as e:
         print(f"Error getting poll {poll_id}: {str(e)}")
         raise HTTPException(
@@ -282,58 +468,29 @@ async def get_poll(
 @router.get("/{poll_id}/results")
 async def get_poll_results(
     poll_id: int,
-    db: DatabaseDep
+    response: Response
 ):
     """
     Получить результаты опроса с процентами
     """
     try:
-        # 1. Проверяем существование опроса
-        poll_result = await db.execute(
-            select(Poll).where(Poll.id == poll_id)
+        results, warning, age = await poll_cache.get(
+            ("results", poll_id), lambda: with_session(_load_poll_results, poll_id)
         )
-        poll = poll_result.scalar_one_or_none()
+        _mark_stale(response, warning, age)
         
-        if not poll:
+        if not results:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Опрос не найден"
             )
         
-        # 2. Получаем варианты с голосами
-        options_result = await db.execute(
-            select(Option).where(Option.poll_id == poll_id).order_by(Option.votes.desc())
-        )
-        options = options_result.scalars().all()
-        
-        # 3. Рассчитываем проценты
-        total_votes = poll.total_votes or 1  # чтобы избежать деления на ноль
-        options_with_percents = []
-        
-        for option in options:
-            percentage = (option.votes / total_votes) * 100 if total_votes > 0 else 0
-            
-            options_with_percents.append({
-                "id": option.id,
-                "text": option.text,
-                "votes": option.votes,
-                "percentage": round(percentage, 2)
-            })
-        
-        # 4. Создаем полный ответ
-        return {
-            "poll_id": poll.id,
-            "title": poll.title,
-            "description": poll.description,
-            "total_votes": poll.total_votes,
-            "end_date": poll.end_date.isoformat() if poll.end_date else None,
-            "created_at": poll.created_at.isoformat() if poll.created_at else None,
-            "options": options_with_percents,
-            "has_ended": poll.end_date < datetime.now() if poll.end_date else False
-        }
+        return results
         
     except HTTPException:
         raise
+    except CircuitOpenError as e:
+        raise _unavailable(e)
     except Exception as e:
         print(f"Error getting poll results {poll_id}: {str(e)}")
         raise HTTPException(
@@ -341,55 +498,105 @@ async def get_poll_results(
             detail=f"Ошибка при получении результатов: {str(e)}"
         )
 
-# ========== GET ACTIVE POLLS ==========
-@router.get("/active")
-async def get_active_polls(
-    db: DatabaseDep
+# ========== SET COUNTER STRIPES ==========
+@router.patch("/{poll_id}/counter-stripes")
+async def set_poll_counter_stripes(
+    poll_id: int,
+    db: DatabaseDep,
+    admin_id: CurrentAdmin,
+    counter_stripes: int = Query(..., ge=1, description="Количество полос счётчика на вариант")
 ):
     """
-    Получить только активные опросы (еще не завершившиеся)
+    Включить/настроить шардированный счётчик голосов опроса (только для администраторов)
     """
+    if counter_stripes > settings.COUNTER_STRIPES_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"counter_stripes должен быть от 1 до {settings.COUNTER_STRIPES_MAX}"
+        )
+    
+    poll = await PollRepository(db).set_counter_stripes(poll_id, counter_stripes)
+    if not poll:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Опрос не найден"
+        )
+    
+    return {
+        "success": True,
+        "poll_id": poll.id,
+        "counter_stripes": poll.counter_stripes
+    }
+
+# ========== EXPORT VOTES ==========
+@router.get("/{poll_id}/export")
+async def export_votes(
+    poll_id: int,
+    db: DatabaseDep,
+    admin_id: CurrentAdmin,
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="csv или ndjson"),
+    gzip: bool = Query(False, description="Сжать выгрузку gzip")
+):
+    """
+    Потоковая выгрузка всех голосов опроса для аудита (только для администраторов)
+    """
+    result = await db.execute(select(Poll.id).where(Poll.id == poll_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Опрос не найден"
+        )
+    
+    filename = f"poll_{poll_id}_votes.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_poll_votes(poll_id, format, gzip),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# ========== BULK IMPORT ==========
+@router.post("/import")
+async def import_polls_endpoint(
+    request: Request,
+    db: DatabaseDep,
+    admin_id: CurrentAdmin,
+    format: str = Query(None, pattern="^(json|csv)$", description="json или csv (по умолчанию — по Content-Type)"),
+    strict: bool = Query(False, description="Не импортировать ничего, если есть ошибки")
+):
+    """
+    Массовый импорт опросов с вариантами одной транзакцией (только для администраторов)
+    Тело запроса — содержимое JSON- или CSV-файла
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "json")
     try:
-        current_time = datetime.now()
-        
-        result = await db.execute(
-            select(Poll)
-            .where(Poll.end_date > current_time)
-            .order_by(Poll.created_at.desc())
+        items = parse_polls(await request.body(), fmt)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Не удалось разобрать файл: {str(e)}"
         )
-        polls = result.scalars().all()
-        
-        active_polls = []
-        for poll in polls:
-            options_result = await db.execute(
-                select(Option).where(Option.poll_id == poll.id)
-            )
-            options = options_result.scalars().all()
-            
-            poll_dict = {
-                "id": poll.id,
-                "title": poll.title,
-                "description": poll.description,
-                "end_date": poll.end_date.isoformat(),
-                "total_votes": poll.total_votes,
-                "created_at": poll.created_at.isoformat(),
-                "options": [
-                    {
-                        "id": opt.id,
-                        "text": opt.text,
-                        "votes": opt.votes
-                    }
-                    for opt in options
-                ],
-                "is_active": True
-            }
-            active_polls.append(poll_dict)
-        
-        return active_polls
-        
+    
+    polls, errors = validate_polls(items)
+    if errors and strict:
+        return {
+            "success": False,
+            "polls_created": 0,
+            "options_created": 0,
+            "errors": errors
+        }
+    
+    try:
+        created = await import_polls(db, polls)
     except Exception as e:
-        print(f"Error getting active polls: {str(e)}")
+        print(f"❌ Error importing polls: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Ошибка при получении активных опросов: {str(e)}"
-        )
\ No newline at end of file
+            detail=f"Ошибка при импорте опросов: {str(e)}"
+        )
+    
+    print(f"✅ Imported {created['polls_created']} polls ({len(errors)} rows rejected)")
+    return {
+        "success": not errors,
+        **created,
+        "errors": errors
+    }
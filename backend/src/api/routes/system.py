@@ -0,0 +1,186 @@
+# backend/src/api/routes/system.py
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from src.api.admission import admission
+from src.api.rate_limit import rate_buckets, rate_limit_sync
+from src.services.idempotency import idempotency_store
+from src.services.memory_diagnostics import memory_diagnostics
+from src.services.read_cache import poll_cache
+from src.services.revocation import revocation_list
+from src.services.voter_filter import voter_filter
+from src.api.dependencies import CurrentAdmin
+from src.api.profiler import ProfilerBusy, profiler
+from src.database.slow_queries import slow_query_log
+from src.config import settings
+
+router = APIRouter()
+
+
+# ========== ADMISSION CONTROL ==========
+@router.get("/admission")
+async def get_admission_status(
+    current_admin: CurrentAdmin
+):
+    """
+    Состояние контроля допуска (только для администраторов):
+    занятые слоты, глубина очередей и число отклонённых запросов по классам
+    """
+    return admission.status()
+
+
+# ========== RATE LIMIT ==========
+@router.get("/rate-limit")
+async def get_rate_limit_status(
+    current_admin: CurrentAdmin
+):
+    """
+    Состояние ограничения частоты (только для администраторов):
+    правила, число ведер, пропущенные и отклонённые запросы, синхронизация воркеров
+    """
+    return {
+        "rules": {name: {"capacity": r.capacity, "rate": r.rate} for name, r in rate_buckets.rules.items()},
+        "keys": len(rate_buckets),
+        "max_keys": rate_buckets.max_keys,
+        **rate_buckets.stats,
+        "sync": rate_limit_sync.status(),
+    }
+
+
+# ========== SLOW QUERIES ==========
+@router.get("/slow-queries")
+async def get_slow_queries(
+    current_admin: CurrentAdmin,
+    top: int = Query(20, ge=1, le=200),
+    order: str = Query("total_ms", pattern="^(total_ms|max_ms|calls)$")
+):
+    """
+    Медленные запросы воркера (только для администраторов): top отпечатков SQL
+    по суммарному/максимальному времени или числу, места вызова, формы
+    параметров, последний EXPLAIN; суммарное время по методам репозиториев
+    """
+    return slow_query_log.report(top, order)
+
+
+@router.delete("/slow-queries")
+async def reset_slow_queries(
+    current_admin: CurrentAdmin
+):
+    """Сбросить накопленную статистику медленных запросов"""
+    slow_query_log.reset()
+    return {"success": True}
+
+
+# ========== PROFILER ==========
+def _collapsed_response(profile) -> PlainTextResponse:
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{profile.id}.folded"',
+            "X-Profile-Id": profile.id,
+            "X-Profile-Samples": str(profile.samples),
+        }
+    )
+
+
+@router.post("/profile")
+async def profile_window(
+    current_admin: CurrentAdmin,
+    seconds: float = Query(10.0, gt=0)
+):
+    """
+    Профилировать воркер, принявший запрос, seconds секунд (только для администраторов)
+    Ответ — свёрнутые стеки для flamegraph.pl / speedscope; SQL — листья "[db] ..."
+    """
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Окно профилирования не больше {settings.PROFILER_MAX_SECONDS:g} с"
+        )
+    try:
+        profile = await profiler.profile_window(seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Профилирование уже идёт: {e}"
+        )
+    return _collapsed_response(profile)
+
+
+@router.get("/profiles")
+async def list_profiles(
+    current_admin: CurrentAdmin
+):
+    """Последние профили воркера (окна и запросы с X-Profile)"""
+    return {
+        "active": profiler.active.summary() if profiler.active else None,
+        "profiles": [profile.summary() for profile in reversed(profiler.results.values())],
+    }
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    current_admin: CurrentAdmin
+):
+    """Свёрнутые стеки сохранённого профиля"""
+    profile = profiler.results.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Профиль не найден (другой воркер или вытеснен)"
+        )
+    return _collapsed_response(profile)
+
+
+# ========== MEMORY ==========
+@router.get("/memory")
+async def get_memory_summary(
+    current_admin: CurrentAdmin,
+    top: int = Query(30, ge=1, le=500)
+):
+    """
+    Память воркера (только для администраторов): RSS, поколения GC, объекты
+    по типам, сессии SQLAlchemy и их identity map, модели pydantic, размеры кэшей
+    """
+    return {
+        **memory_diagnostics.summary(top),
+        "caches": {
+            "poll_read_cache": poll_cache.status()["entries"],
+            "idempotency_keys": len(idempotency_store),
+            "voter_filter_polls": len(voter_filter),
+            "rate_limit_buckets": len(rate_buckets),
+            "revocation_epochs": revocation_list.status()["epochs"],
+            "revoked_tokens": revocation_list.status()["denied"],
+        },
+    }
+
+
+@router.post("/memory/baseline")
+async def take_memory_baseline(
+    current_admin: CurrentAdmin,
+    frames: int = Query(settings.MEMORY_TRACEMALLOC_FRAMES, ge=1, le=50)
+):
+    """Включить tracemalloc (если выключен) и запомнить базовый снимок для /memory/diff"""
+    return memory_diagnostics.take_baseline(frames)
+
+
+@router.get("/memory/diff")
+async def get_memory_diff(
+    current_admin: CurrentAdmin,
+    top: int = Query(20, ge=1, le=200)
+):
+    """Рост памяти с базового снимка по пакетам src (src.queries, src.api.routes, ...), строкам и типам"""
+    try:
+        return memory_diagnostics.diff(top)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.delete("/memory/tracemalloc")
+async def stop_tracemalloc(
+    current_admin: CurrentAdmin
+):
+    """Выключить tracemalloc и забыть базовый снимок"""
+    memory_diagnostics.stop()
+    return {"success": True}
@@ -1,30 +1,36 @@
 # backend/src/api/routes/votes.py
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Header
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
+from typing import Annotated, Optional
 
-from src.models.vote import VoteCreate
-from src.queries.votes import create_vote, has_user_voted
-from src.api.dependencies import DatabaseDep, CurrentUser
+from src.models.vote import VoteCreate, VoteCheckBatch, VoteResponse
+from src.models.poll import OptionResponse
+from src.queries.orm import DuplicateVoteError
+from src.queries.votes import create_vote, has_user_voted, get_vote_statuses
+from src.services.idempotency import idempotency_store, IdempotencyKeyMismatch
+from src.services.vote_ledger import vote_ledger, LedgerResync
+from src.services.metrics import votes as vote_metrics
+from src.database.circuit_breaker import CircuitOpenError, db_breaker, is_unavailable
+from src.api.dependencies import DatabaseDep, CurrentUser, CurrentAdmin
 
 router = APIRouter()
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
-async def vote(
-    vote_data: VoteCreate,
-    db: DatabaseDep,
-    student_id: CurrentUser
-):
+# Исход голосования для метрик по коду ответа
+VOTE_OUTCOMES = {201: "accepted", 202: "accepted_ledger", 400: "duplicate", 404: "not_found"}
+
+async def _submit_vote(db, vote_data: VoteCreate, student_id: str) -> tuple[int, dict]:
     """
-    Проголосовать в опросе
+    Выполнить голосование
+    Возвращает: (status_code, тело ответа) — результат сохраняется для повторов по Idempotency-Key
     """
+    if vote_ledger.running:
+        return await _submit_vote_to_ledger(db, vote_data, student_id)
+    
     try:
         # Проверяем, не голосовал ли уже пользователь
         if await has_user_voted(db, vote_data.poll_id, student_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, 
-                detail="Вы уже голосовали в этом опросе"
-            )
+            return status.HTTP_400_BAD_REQUEST, {"detail": "Вы уже голосовали в этом опросе"}
         
         # Создаем голос
         vote_result = await create_vote(
@@ -33,33 +39,113 @@ async def vote(
             vote_data.option_id, 
             student_id
         )
-        
-        return {
-            "success": True, 
-            "message": "Голос успешно принят", 
-            "vote": vote_result
-        }
-        
+    except DuplicateVoteError:
+        return status.HTTP_400_BAD_REQUEST, {"detail": "Вы уже голосовали в этом опросе"}
     except ValueError as e:
+        return status.HTTP_404_NOT_FOUND, {"detail": str(e)}
+    
+    return status.HTTP_201_CREATED, {
+        "success": True, 
+        "message": "Голос успешно принят", 
+        "vote": {
+            "vote": VoteResponse.model_validate(vote_result["vote"]).model_dump(mode="json"),
+            "option": OptionResponse.model_validate(vote_result["option"]).model_dump(mode="json"),
+            "poll_id": vote_result["poll_id"]
+        }
+    }
+
+async def _submit_vote_to_ledger(db, vote_data: VoteCreate, student_id: str) -> tuple[int, dict]:
+    """
+    Принять голос в журнал: ответ после fsync журнала, запись в БД — проектором
+    Повторы ловит сам журнал под блокировкой раздела студента — на любом воркере
+    """
+    poll_id, option_id = vote_data.poll_id, vote_data.option_id
+    if await vote_ledger.option_poll_id(db, option_id) != poll_id:
+        return status.HTTP_404_NOT_FOUND, {"detail": "Option not found or does not belong to the poll"}
+    
+    # Вторая попытка — после того как воркер пропустил удалённые сегменты
+    # и фильтр проголосовавших перестроен из БД
+    for attempt in range(2):
+        try:
+            # Голоса, уже применённые к БД (фильтр Блума, EXISTS — только на "возможно")
+            if await has_user_voted(db, poll_id, student_id):
+                return status.HTTP_400_BAD_REQUEST, {"detail": "Вы уже голосовали в этом опросе"}
+            seq = await vote_ledger.append_vote(poll_id, option_id, student_id)
+            break
+        except DuplicateVoteError:
+            return status.HTTP_400_BAD_REQUEST, {"detail": "Вы уже голосовали в этом опросе"}
+        except LedgerResync:
+            if attempt:
+                raise
+    
+    return status.HTTP_202_ACCEPTED, {
+        "success": True,
+        "message": "Голос успешно принят",
+        "vote": {
+            "poll_id": poll_id,
+            "option_id": option_id,
+            "ledger_seq": seq
+        }
+    }
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def vote(
+    vote_data: VoteCreate,
+    db: DatabaseDep,
+    current_user: CurrentUser,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
+    """
+    Проголосовать в опросе
+    С заголовком Idempotency-Key повтор запроса возвращает исходный ответ
+    """
+    student_id = current_user["student_id"]
+    replayed = False
+    try:
+        if idempotency_key:
+            status_code, body, replayed = await idempotency_store.run(
+                scope=f"vote:{student_id}",
+                key=idempotency_key,
+                fingerprint=f"{vote_data.poll_id}:{vote_data.option_id}",
+                handler=lambda: _submit_vote(db, vote_data, student_id)
+            )
+        else:
+            status_code, body = await _submit_vote(db, vote_data, student_id)
+    except IdempotencyKeyMismatch:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail=str(e)
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key уже использован с другими данными голоса"
         )
+    except CircuitOpenError:
+        # 503 + Retry-After (обработчик в main): повтор после восстановления БД
+        raise
     except Exception as e:
+        if is_unavailable(e) or isinstance(e, LedgerResync):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервис временно недоступен, повторите голос позже",
+                headers={"Retry-After": str(int(db_breaker.retry_after()))}
+            )
+        print(f"Error submitting vote: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            detail=f"Ошибка при голосовании: {str(e)}"
+            detail="Ошибка при голосовании"
         )
+    
+    vote_metrics.inc("replayed" if replayed else VOTE_OUTCOMES.get(status_code, "error"))
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return JSONResponse(status_code=status_code, content=body, headers=headers)
 
 @router.get("/check/{poll_id}")
 async def check_vote(
     poll_id: int,
     db: DatabaseDep,
-    student_id: CurrentUser
+    current_user: CurrentUser
 ):
     """
     Проверить, голосовал ли пользователь в указанном опросе
     """
+    student_id = current_user["student_id"]
     try:
         voted = await has_user_voted(db, poll_id, student_id)
         return {
@@ -73,24 +159,68 @@ async def check_vote(
             detail=f"Ошибка при проверке голоса: {str(e)}"
         )
 
+@router.post("/check-batch")
+async def check_votes_batch(
+    batch: VoteCheckBatch,
+    db: DatabaseDep,
+    current_user: CurrentUser
+):
+    """
+    Проверить статус голосования сразу по списку опросов (один запрос к БД)
+    """
+    student_id = current_user["student_id"]
+    try:
+        poll_ids = list(dict.fromkeys(batch.poll_ids))
+        statuses = await get_vote_statuses(db, student_id, poll_ids)
+        return {
+            "student_id": student_id,
+            "votes": statuses
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка при проверке голосов: {str(e)}"
+        )
+
 @router.get("/user-votes")
 async def get_user_votes(
     db: DatabaseDep,
-    student_id: CurrentUser
+    current_user: CurrentUser,
+    limit: int = Query(50, ge=1, le=200, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы")
 ):
     """
-    Получить все голоса текущего пользователя
+    Получить голоса текущего пользователя (новые сначала, постранично)
     """
     from src.queries.votes import get_user_votes as get_user_votes_query
     
+    student_id = current_user["student_id"]
     try:
-        votes = await get_user_votes_query(db, student_id)
+        page = await get_user_votes_query(db, student_id, limit, cursor)
         return {
             "student_id": student_id,
-            "votes": votes
+            "votes": page["votes"],
+            "next_cursor": page["next_cursor"]
         }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при получении голосов: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/ledger")
+async def get_ledger_status(
+    current_admin: CurrentAdmin
+):
+    """
+    Состояние журнала голосов: записано, применено к БД, снимок (только для администраторов)
+    """
+    return {
+        "enabled": vote_ledger.running,
+        **(vote_ledger.status() if vote_ledger.running else {})
+    }
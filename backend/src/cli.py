@@ -0,0 +1,107 @@
+# backend/src/cli.py
+"""
+Административные команды
+
+    python -m src.cli import-polls polls.json
+    python -m src.cli import-polls polls.csv --strict
+    python -m src.cli import-roster students.csv
+    python -m src.cli generate-signing-key --alg ES256 --out keys/jwt_es256.pem
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from src.database.connection import AsyncSessionLocal, create_tables
+
+
+async def _import_polls(path: str, fmt: str, strict: bool) -> int:
+    from src.services.poll_import import parse_polls, validate_polls, import_polls
+
+    with open(path, "rb") as f:
+        items = parse_polls(f.read(), fmt)
+    polls, errors = validate_polls(items)
+    for error in errors:
+        print(f"row {error['row']}: {error['error']}", file=sys.stderr)
+    if errors and strict:
+        return 1
+
+    await create_tables()
+    async with AsyncSessionLocal() as session:
+        created = await import_polls(session, polls)
+    print(json.dumps({**created, "rejected": len(errors)}, ensure_ascii=False))
+    return 1 if errors else 0
+
+
+async def _import_roster(path: str, fmt: str, strict: bool) -> int:
+    from src.services.roster_import import parse_roster, validate_roster, import_roster
+
+    with open(path, "rb") as f:
+        items = parse_roster(f.read(), fmt)
+    rows, errors = validate_roster(items)
+    for error in errors:
+        print(f"row {error['row']}: {error['error']}", file=sys.stderr)
+    if errors and strict:
+        return 1
+
+    await create_tables()
+    async with AsyncSessionLocal() as session:
+        result = await import_roster(session, rows)
+    print(json.dumps({**result, "rejected": len(errors)}, ensure_ascii=False))
+    return 1 if errors else 0
+
+
+def _generate_signing_key(alg: str, out: str) -> int:
+    from jose import jwk
+    from src.utils.security import jwk_thumbprint
+
+    if alg == "ES256":
+        import ecdsa
+        pem = ecdsa.SigningKey.generate(curve=ecdsa.NIST256p).to_pem()
+    else:
+        import rsa
+        pem = rsa.newkeys(2048)[1].save_pkcs1()
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(os.open(out, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+        f.write(pem)
+    public_jwk = jwk.construct(pem.decode(), alg).public_key().to_dict()
+    print(json.dumps({"path": out, "alg": alg, "kid": jwk_thumbprint(public_jwk)}))
+    return 0
+
+
+def _detect_format(path: str, fmt: str = None) -> str:
+    return fmt or ("csv" if os.path.splitext(path)[1].lower() == ".csv" else "json")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    polls = commands.add_parser("import-polls", help="массовый импорт опросов из JSON/CSV")
+    polls.add_argument("path")
+    polls.add_argument("--format", choices=["json", "csv"])
+    polls.add_argument("--strict", action="store_true", help="ничего не импортировать при ошибках")
+
+    roster = commands.add_parser("import-roster", help="upsert списка студентов из JSON/CSV")
+    roster.add_argument("path")
+    roster.add_argument("--format", choices=["json", "csv"])
+    roster.add_argument("--strict", action="store_true", help="ничего не импортировать при ошибках")
+
+    key = commands.add_parser("generate-signing-key", help="создать ключ подписи JWT (PEM)")
+    key.add_argument("--alg", choices=["ES256", "RS256"], default="ES256")
+    key.add_argument("--out", required=True)
+
+    args = parser.parse_args()
+    if args.command == "generate-signing-key":
+        sys.exit(_generate_signing_key(args.alg, args.out))
+    fmt = _detect_format(args.path, args.format)
+    if args.command == "import-polls":
+        sys.exit(asyncio.run(_import_polls(args.path, fmt, args.strict)))
+    if args.command == "import-roster":
+        sys.exit(asyncio.run(_import_roster(args.path, fmt, args.strict)))
+
+
+if __name__ == "__main__":
+    main()
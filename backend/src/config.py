@@ -16,11 +16,139 @@ class Settings(BaseSettings):
     def DATABASE_URL_asyncpg(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    # Пул соединений одного процесса (src.server пересчитывает по DB_CONNECTION_BUDGET)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_ECHO: bool = True
+    DB_POOL_TIMEOUT: float = 30.0         # ожидание свободного соединения из пула
+
+    # Предохранитель БД: размыкается после N подряд ошибок или медленных запросов
+    DB_BREAKER_FAILURES: int = 5
+    DB_BREAKER_SLOW_SECONDS: float = 2.0
+    DB_BREAKER_OPEN_SECONDS: float = 10.0
+
+    # Контроль допуска: запросы делят слоты (≈ соединения пула) по приоритету классов
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_TOTAL_SLOTS: int = 0  # 0 — DB_POOL_SIZE + DB_MAX_OVERFLOW
+    # priority: меньше — важнее; share: доля слотов, которую класс может занять;
+    # queue: мест в очереди; max_wait: сколько ждать слота, с; statement_timeout_ms: 0 — без лимита
+    ADMISSION_CLASSES: dict = {
+        "vote":    {"priority": 0, "share": 1.0,  "queue": 500, "max_wait": 5.0, "statement_timeout_ms": 5000},
+        "auth":    {"priority": 1, "share": 0.75, "queue": 200, "max_wait": 5.0, "statement_timeout_ms": 5000},
+        "check":   {"priority": 2, "share": 0.5,  "queue": 200, "max_wait": 2.0, "statement_timeout_ms": 2000},
+        "read":    {"priority": 3, "share": 0.5,  "queue": 500, "max_wait": 2.0, "statement_timeout_ms": 3000},
+        "listing": {"priority": 4, "share": 0.25, "queue": 50,  "max_wait": 1.0, "statement_timeout_ms": 5000},
+        "bulk":    {"priority": 5, "share": 0.1,  "queue": 4,   "max_wait": 1.0, "statement_timeout_ms": 0},
+    }
+
+    # Ограничение частоты входа и голосования (ведра токенов до аутентификации и БД)
+    RATE_LIMIT_ENABLED: bool = True
+    # capacity: размер всплеска; rate: токенов в секунду. Лимиты по IP с запасом —
+    # аудитория часто выходит через один NAT
+    RATE_LIMIT_RULES: dict = {
+        "login_ip":      {"capacity": 300, "rate": 20.0},
+        "login_student": {"capacity": 5,   "rate": 0.1},
+        "vote_ip":       {"capacity": 600, "rate": 50.0},
+        "vote_student":  {"capacity": 20,  "rate": 2.0},
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    # Общий лимит на все воркеры через LISTEN/NOTIFY (отдельное соединение на воркер)
+    RATE_LIMIT_SYNC: bool = False
+    RATE_LIMIT_SYNC_INTERVAL_SECONDS: float = 1.0
+
+    # Бюджет запросов к БД на HTTP-запрос: превышение печатается с самыми частыми SQL
+    QUERY_BUDGET_ENABLED: bool = True
+    QUERY_BUDGET_MAX_QUERIES: int = 10
+    QUERY_BUDGET_MAX_DB_MS: float = 250.0
+    QUERY_BUDGET_CLASS_LIMITS: dict = {"bulk": 0}  # по классам допуска; 0 — без лимита
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Журнал медленных запросов: агрегат по отпечатку SQL, выборочный EXPLAIN на отдельном соединении
+    SLOW_QUERY_ENABLED: bool = True
+    SLOW_QUERY_MS: float = 100.0
+    SLOW_QUERY_LOG: bool = True
+    SLOW_QUERY_MAX_FINGERPRINTS: int = 500
+    SLOW_QUERY_EXPLAIN_SAMPLE: float = 0.05      # доля медленных запросов с EXPLAIN; 0 — выключено
+    SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS: float = 300.0
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 10_000
+
+    # Сэмплирующий профилировщик по запросу администратора (окно или X-Profile: 1)
+    PROFILER_ENABLED: bool = True
+    PROFILER_INTERVAL_MS: float = 5.0
+    PROFILER_MAX_SECONDS: float = 60.0
+    PROFILER_KEEP_RESULTS: int = 20
+
+    # Диагностика памяти: глубина стеков tracemalloc (включается по запросу администратора)
+    MEMORY_TRACEMALLOC_FRAMES: int = 10
+
+    # /metrics (формат Prometheus) и проба готовности /health
+    METRICS_ENABLED: bool = True
+    READINESS_TIMEOUT_SECONDS: float = 2.0
+
+    # Последние удачные ответы чтения опросов (stale-while-revalidate)
+    READ_CACHE_FRESH_SECONDS: float = 1.0       # ответ свежий — отдаётся без БД
+    READ_CACHE_SWR_SECONDS: float = 10.0        # устаревший отдаётся сразу, обновление в фоне
+    READ_CACHE_MAX_STALE_SECONDS: float = 3600  # сколько хранить на случай недоступности БД
+    READ_CACHE_MAX_KEYS: int = 10_000
+
+    # Продакшен-запуск: python -m src.server
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0               # 0 — по числу ядер
+    DB_CONNECTION_BUDGET: int = 0         # всего соединений с БД на все воркеры; 0 — без пересчёта
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0 # сколько ждать завершения запросов и журнала голосов
+
     # JWT
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    # Асимметричная подпись (ES256/RS256): приватный ключ только на узле входа,
+    # остальные узлы проверяют токены по публичным ключам (JWKS) без секрета
+    JWT_PRIVATE_KEY_PATH: str = ""
+    JWT_KEY_ID: str = ""
+    JWT_PUBLIC_KEYS_PATH: str = ""  # JWKS-файл с дополнительными ключами (ротация, узлы-проверяющие)
+    # Доверять claims access токена (роль) без чтения пользователя из БД
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    # Список отзыва access токенов в памяти, синхронизация через LISTEN/NOTIFY
+    TOKEN_REVOCATION_ENABLED: bool = True
+
+    # Шина инвалидации кэшей между воркерами (LISTEN/NOTIFY)
+    CACHE_INVALIDATION_ENABLED: bool = True
+    # Инвалидации от голосов копятся и уходят одним NOTIFY раз в интервал
+    CACHE_INVALIDATION_COALESCE_SECONDS: float = 1.0
+
+    # Отдельное соединение LISTEN: проверка и переподключение
+    PG_LISTEN_HEALTHCHECK_SECONDS: float = 10.0
+    PG_LISTEN_RECONNECT_MAX_SECONDS: float = 30.0
     
+    # Шардированные счётчики голосов
+    COUNTER_STRIPES_MAX: int = 64
+    COUNTER_ROLLUP_INTERVAL_SECONDS: float = 5.0
+
+    # Фильтр проголосовавших (Блум) для проверки повторного голоса;
+    # только для одного процесса (src.server выключает его при нескольких воркерах)
+    VOTER_FILTER_ENABLED: bool = True
+    VOTER_FILTER_ERROR_RATE: float = 0.01
+    VOTER_FILTER_TTL_SECONDS: float = 300.0
+
+    # Idempotency-Key для POST /api/votes
+    IDEMPOTENCY_MAX_KEYS: int = 100_000
+    IDEMPOTENCY_TTL_SECONDS: float = 24 * 60 * 60
+    IDEMPOTENCY_PERSIST: bool = False      # src.server включает при нескольких воркерах
+
+    # Журнал голосов (приём голоса = fsync в журнал, запись в БД асинхронно)
+    VOTE_LEDGER_ENABLED: bool = False
+    VOTE_LEDGER_DIR: str = "data/vote_ledger"
+    # Разделы по студенту: все голоса студента пишутся в один раздел под flock
+    VOTE_LEDGER_PARTITIONS: int = 16
+    VOTE_LEDGER_SEGMENT_BYTES: int = 64 * 1024 * 1024
+    VOTE_LEDGER_GROUP_COMMIT_MS: float = 2.0
+    VOTE_LEDGER_PROJECT_BATCH: int = 500
+    VOTE_LEDGER_SNAPSHOT_INTERVAL_SECONDS: float = 30.0
+    VOTE_LEDGER_PROJECT_POLL_MS: float = 50.0
+    # Сколько помнить применённый голос после того, как воркер его увидел
+    VOTE_LEDGER_PENDING_GRACE_SECONDS: float = 60.0
+
     # CORS
     ALLOWED_ORIGINS: list = [
         "http://localhost:3000",
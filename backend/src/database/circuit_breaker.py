@@ -0,0 +1,143 @@
+# backend/src/database/circuit_breaker.py
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+
+from src.config import settings
+
+# Ошибки, говорящие о недоступности/перегрузке БД (а не об ошибке запроса)
+DB_UNAVAILABLE_ERRORS = (
+    exc.OperationalError,
+    exc.InterfaceError,
+    exc.TimeoutError,      # ожидание соединения из пула
+    OSError,               # отказ в соединении (asyncpg)
+    asyncio.TimeoutError,
+)
+GUARDED_KEY = "circuit_breaker"
+
+
+class CircuitOpenError(Exception):
+    """БД считается недоступной — запрос отклонён без обращения к пулу"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("База данных временно недоступна")
+        self.retry_after = retry_after
+
+
+def is_unavailable(error: Optional[BaseException]) -> bool:
+    """Есть ли в цепочке исключения ошибка недоступности БД (или отказ предохранителя)"""
+    seen = 0
+    while error is not None and seen < 5:
+        if isinstance(error, (CircuitOpenError, *DB_UNAVAILABLE_ERRORS)):
+            return True
+        error = error.__cause__ or error.__context__
+        seen += 1
+    return False
+
+
+class CircuitBreaker:
+    """
+    Предохранитель вокруг сессий БД
+
+    closed    — запросы идут в БД; подряд DB_BREAKER_FAILURES ошибок
+                соединения или запросов дольше DB_BREAKER_SLOW_SECONDS
+                размыкают цепь
+    open      — DB_BREAKER_OPEN_SECONDS запросы сразу получают
+                CircuitOpenError, не занимая очередь пула
+    half_open — раз в секунду пропускается пробный запрос: успех
+                замыкает цепь, ошибка снова размыкает
+
+    Длительность запросов берётся из событий движка, ошибки — из
+    исключений, прошедших через get_db / with_session.
+    """
+
+    def __init__(self, failures: int = None, slow_seconds: float = None, open_seconds: float = None):
+        self.failure_threshold = failures or settings.DB_BREAKER_FAILURES
+        self.slow_seconds = slow_seconds or settings.DB_BREAKER_SLOW_SECONDS
+        self.open_seconds = open_seconds or settings.DB_BREAKER_OPEN_SECONDS
+
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._next_probe = 0.0
+
+    def retry_after(self) -> float:
+        return max(1.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def check(self) -> None:
+        """Разрешить обращение к БД или бросить CircuitOpenError"""
+        if self.state == "closed":
+            return
+        now = time.monotonic()
+        if self.state == "open" and now - self.opened_at >= self.open_seconds:
+            self.state = "half_open"
+            self._next_probe = now
+        if self.state == "half_open" and now >= self._next_probe:
+            self._next_probe = now + 1.0
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.retry_after())
+
+    def record_success(self, elapsed: float) -> None:
+        if elapsed > self.slow_seconds:
+            self.record_failure()
+            return
+        self.consecutive_failures = 0
+        if self.state != "closed":
+            print("🟢 DB circuit closed")
+            self.state = "closed"
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == "half_open" or (
+            self.state == "closed" and self.consecutive_failures >= self.failure_threshold
+        ):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.trips += 1
+            print(f"🔴 DB circuit open for {self.open_seconds:.0f}s "
+                  f"after {self.consecutive_failures} failures")
+
+    def record_exception(self, error: Optional[BaseException]) -> None:
+        """Учесть исключение, если в его цепочке есть ошибка недоступности БД"""
+        if isinstance(error, CircuitOpenError):
+            return
+        if is_unavailable(error):
+            self.record_failure()
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 1) if self.state != "closed" else 0,
+        }
+
+    # ========== ПРИВЯЗКА К ДВИЖКУ ==========
+    def install(self, engine) -> None:
+        """Замер запросов движка и проверка перед каждым запросом защищённой сессии"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(Session, "do_orm_execute", self._do_orm_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info["query_start"] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        start = conn.info.pop("query_start", None)
+        if start is not None:
+            self.record_success(time.perf_counter() - start)
+
+    def _do_orm_execute(self, orm_execute_state) -> None:
+        # Проверка до выдачи соединения из пула — при разомкнутой цепи не ждём в очереди
+        if orm_execute_state.session.info.get(GUARDED_KEY):
+            self.check()
+
+
+db_breaker = CircuitBreaker()
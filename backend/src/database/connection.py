@@ -1,7 +1,15 @@
 # backend/src/database/connection.py
+import asyncio
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
 from src.config import settings
+from src.database.circuit_breaker import db_breaker, GUARDED_KEY
+from src.database import query_stats
+from src.database.slow_queries import slow_query_log
+from src.services.metrics import install_pool_metrics
 
 class Base(DeclarativeBase):
     pass
@@ -9,8 +17,11 @@ class Base(DeclarativeBase):
 # Создаем асинхронный движок
 engine = create_async_engine(
     settings.DATABASE_URL_asyncpg,
-    echo=True,
+    echo=settings.DB_ECHO,
     future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
     pool_pre_ping=True,
     pool_recycle=300
 )
@@ -23,15 +34,86 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
+db_breaker.install(engine.sync_engine)
+query_stats.install(engine.sync_engine)
+slow_query_log.install(engine.sync_engine)
+install_pool_metrics()
+
+# statement_timeout текущего запроса (выставляет контроль допуска по классу маршрута)
+statement_timeout_ms: ContextVar[int] = ContextVar("statement_timeout_ms", default=0)
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    timeout = statement_timeout_ms.get()
+    if timeout:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
 async def get_db():
     """Dependency для получения сессии БД"""
     async with AsyncSessionLocal() as session:
+        # Запросы сессии проходят через предохранитель БД
+        session.info[GUARDED_KEY] = True
         try:
             yield session
+        except Exception as e:
+            db_breaker.record_exception(e)
+            raise
         finally:
             await session.close()
 
+async def ping_database(timeout: float) -> float:
+    """Круговая задержка SELECT 1 в секундах (соединение из пула, не дольше timeout)"""
+    start = time.perf_counter()
+    async with asyncio.timeout(timeout):
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+    return time.perf_counter() - start
+
+# ========== ОБНОВЛЕНИЕ СХЕМЫ ==========
+# create_all создаёт только недостающие таблицы: новые столбцы, ограничения
+# и индексы существующих таблиц добавляются здесь (идемпотентно)
+SCHEMA_UPGRADES = [
+    # Шардированные счётчики голосов
+    "ALTER TABLE polls ADD COLUMN IF NOT EXISTS counter_stripes INTEGER NOT NULL DEFAULT 1",
+    # Один голос на студента в опросе (нужен для ON CONFLICT в project_votes);
+    # при дублях в старых данных запуск прерывается — их нужно удалить вручную
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_votes_poll_student') THEN
+            ALTER TABLE votes ADD CONSTRAINT uq_votes_poll_student UNIQUE (poll_id, student_id);
+        END IF;
+    END $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_votes_student_poll ON votes (student_id, poll_id, option_id)",
+    'CREATE INDEX IF NOT EXISTS ix_votes_student_timestamp ON votes (student_id, "timestamp", id)',
+]
+
+# Ошибки "уже существует" (гонка с другим процессом) безопасны, остальные —
+# нет: без uq_votes_poll_student не работают ON CONFLICT в project_votes и
+# защита от повторного голоса, поэтому запуск прерывается
+SCHEMA_UPGRADE_EXISTS_SQLSTATES = {
+    "42P07",  # duplicate_table (таблица или индекс)
+    "42710",  # duplicate_object (ограничение)
+    "42701",  # duplicate_column
+}
+
+# Ключ advisory-блокировки: воркеры обновляют схему по очереди
+SCHEMA_UPGRADE_LOCK_KEY = 7_402_641
+
 async def create_tables():
-    """Создание таблиц в БД"""
+    """Создание таблиц в БД и обновление схемы существующих"""
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({SCHEMA_UPGRADE_LOCK_KEY})")
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            try:
+                async with conn.begin_nested():
+                    await conn.exec_driver_sql(statement)
+            except Exception as e:
+                summary = ' '.join(statement.split())[:120]
+                if getattr(getattr(e, "orig", None), "sqlstate", None) in SCHEMA_UPGRADE_EXISTS_SQLSTATES:
+                    print(f"⚠️ Schema upgrade skipped, already exists: {summary}")
+                    continue
+                print(f"❌ Schema upgrade failed: {summary}: {e}")
+                raise
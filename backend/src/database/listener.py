@@ -0,0 +1,113 @@
+# backend/src/database/listener.py
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+import asyncpg
+
+from src.config import settings
+
+MessageHandler = Callable[[str], None]
+ConnectHandler = Callable[[bool], Awaitable[None]]
+
+
+class PgListener:
+    """
+    Подписка на канал Postgres LISTEN/NOTIFY через отдельное соединение asyncpg
+
+    Соединение не берётся из пула SQLAlchemy: LISTEN живёт, пока живо
+    соединение. Раз в PG_LISTEN_HEALTHCHECK_SECONDS соединение проверяется
+    запросом SELECT 1; при обрыве — переподключение с экспоненциальной
+    паузой. Уведомления, отправленные во время обрыва, теряются, поэтому
+    после каждого (пере)подключения вызывается on_connect(reconnected) —
+    подписчик должен перечитать состояние из БД.
+    """
+
+    def __init__(self, channel: str, on_message: MessageHandler,
+                 on_connect: Optional[ConnectHandler] = None):
+        self.channel = channel
+        self.on_message = on_message
+        self.on_connect = on_connect
+        self.healthcheck = settings.PG_LISTEN_HEALTHCHECK_SECONDS
+        self.max_backoff = settings.PG_LISTEN_RECONNECT_MAX_SECONDS
+
+        self.connected = False
+        self.reconnects = 0
+        self._conn: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close()
+
+    async def notify(self, payload: str) -> bool:
+        """Отправить NOTIFY в свой канал через соединение слушателя (без пула)"""
+        conn = self._conn
+        if not self.connected or conn is None:
+            return False
+        await conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        return True
+
+    async def _connect(self) -> asyncpg.Connection:
+        return await asyncpg.connect(
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            user=settings.DB_USER,
+            password=settings.DB_PASS,
+            database=settings.DB_NAME,
+            server_settings={"application_name": f"listen:{self.channel}"},
+        )
+
+    async def _close(self) -> None:
+        self.connected = False
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await asyncio.wait_for(conn.close(), timeout=5)
+            except Exception:
+                conn.terminate()
+
+    def _dispatch(self, connection, pid, channel, payload) -> None:
+        try:
+            self.on_message(payload)
+        except Exception as e:
+            print(f"LISTEN {self.channel}: bad message {payload!r}: {e}")
+
+    async def _run(self) -> None:
+        backoff = 0.5
+        first = True
+        while True:
+            try:
+                lost = asyncio.Event()
+                self._conn = await self._connect()
+                self._conn.add_termination_listener(lambda conn: lost.set())
+                await self._conn.add_listener(self.channel, self._dispatch)
+                self.connected = True
+                if not first:
+                    self.reconnects += 1
+                if self.on_connect:
+                    await self.on_connect(not first)
+                first = False
+                backoff = 0.5
+
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), timeout=self.healthcheck)
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(self._conn.execute("SELECT 1"), timeout=self.healthcheck)
+                raise ConnectionError("connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"LISTEN {self.channel}: {e}; reconnect in {backoff:.1f}s")
+                await self._close()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
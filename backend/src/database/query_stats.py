@@ -0,0 +1,94 @@
+# backend/src/database/query_stats.py
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import event
+
+# Сколько разных SQL помнить на запрос (для лога повторов вида N+1)
+MAX_STATEMENTS = 50
+
+START_KEY = "query_stats_start"
+
+
+class QueryStats:
+    """Запросы, строки и время БД одного блока (HTTP-запроса, теста)"""
+
+    __slots__ = ("queries", "rows", "db_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.db_seconds = 0.0
+        self.statements: Dict[str, List[float]] = {}
+
+    def record(self, statement: str, rows: int, elapsed: float) -> None:
+        self.queries += 1
+        self.rows += rows
+        self.db_seconds += elapsed
+        entry = self.statements.get(statement)
+        if entry is not None:
+            entry[0] += 1
+            entry[1] += elapsed
+        elif len(self.statements) < MAX_STATEMENTS:
+            self.statements[statement] = [1, elapsed]
+
+    def top(self, n: int = 5) -> List[Tuple[str, int, float]]:
+        """Самые частые запросы: [(sql, раз, секунд)]"""
+        ordered = sorted(self.statements.items(), key=lambda item: (-item[1][0], -item[1][1]))
+        return [(sql, int(count), seconds) for sql, (count, seconds) in ordered[:n]]
+
+    def describe(self, n: int = 5) -> str:
+        lines = [f"{self.queries} queries, {self.rows} rows, {self.db_seconds * 1000:.1f} ms DB"]
+        for sql, count, seconds in self.top(n):
+            lines.append(f"  {count:>4}x {seconds * 1000:8.1f} ms  {' '.join(sql.split())[:200]}")
+        return "\n".join(lines)
+
+
+# Активные счётчики текущего контекста (вложенные блоки считаются все)
+_active: ContextVar[Tuple[QueryStats, ...]] = ContextVar("query_stats", default=())
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Считать запросы к БД внутри блока: with track_queries() as stats: ..."""
+    stats = QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """
+    Проверка бюджета запросов для тестов и скриптов:
+    with assert_max_queries(3): await client.get("/api/polls/")
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.queries > limit:
+        raise AssertionError(f"expected at most {limit} queries, got {stats.describe()}")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _active.get():
+        conn.info[START_KEY] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    start = conn.info.pop(START_KEY, None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    rows = max(cursor.rowcount, 0)
+    for stats in _active.get():
+        stats.record(statement, rows, elapsed)
+
+
+def install(engine) -> None:
+    """Подключить счётчики к событиям движка (без активного блока — одна проверка contextvar)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,293 @@
+# backend/src/database/slow_queries.py
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+import greenlet
+from sqlalchemy import event
+
+from src.config import settings
+
+START_KEY = "slow_query_start"
+SRC_DIR = os.sep + "src" + os.sep
+QUERIES_DIR = SRC_DIR + "queries" + os.sep
+# Сколько разных форм параметров и мест вызова помнить на отпечаток
+MAX_SHAPES = 10
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):(?!:)\w+|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """SQL без литералов и параметров: списки (?, ?, ...) и VALUES-пачки сворачиваются"""
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    sql = _VALUES.sub(r"\1", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def _value_shape(value: Any) -> str:
+    if isinstance(value, (list, tuple, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """Типы связанных параметров: (int, str, list[40]); для executemany — many[N] и первая строка"""
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return f"many[{len(parameters)}] {parameter_shape(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        return "(" + ", ".join(f"{k}: {_value_shape(v)}" for k, v in parameters.items()) + ")"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(_value_shape(v) for v in parameters) + ")"
+    return "()"
+
+
+def call_site() -> str:
+    """
+    Метод, из которого пришёл запрос: первый кадр из src/queries (репозитории),
+    иначе первый из src/. Сессия выполняет SQL в greenlet, поэтому после его
+    кадров обход продолжается в родительском greenlet (корутина вызывающего).
+    """
+    fallback = None
+    frame = sys._getframe(2)
+    current = greenlet.getcurrent()
+    while True:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if SRC_DIR in filename and not filename.endswith("slow_queries.py"):
+                site = f"{os.path.basename(filename)}:{frame.f_code.co_qualname}"
+                if QUERIES_DIR in filename:
+                    return site
+                if fallback is None and os.sep + "database" + os.sep not in filename:
+                    fallback = site
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return fallback or "unknown"
+        frame = current.gr_frame
+
+
+class SlowQueryLog:
+    """
+    Журнал медленных запросов
+
+    Запрос дольше SLOW_QUERY_MS попадает в агрегат по отпечатку SQL:
+    число, суммарное и максимальное время, формы параметров, места
+    вызова (метод репозитория). Доля SLOW_QUERY_EXPLAIN_SAMPLE медленных
+    запросов повторяется с EXPLAIN (ANALYZE, BUFFERS) на отдельном
+    соединении вне пула — не чаще раза в SLOW_QUERY_EXPLAIN_COOLDOWN
+    секунд на отпечаток и не больше одного EXPLAIN одновременно.
+    ANALYZE выполняет запрос, поэтому он делается в транзакции с
+    откатом и только для SELECT; остальные запросы — простой EXPLAIN.
+    """
+
+    def __init__(self):
+        self.threshold = settings.SLOW_QUERY_MS / 1000
+        self.sample = settings.SLOW_QUERY_EXPLAIN_SAMPLE
+        self.cooldown = settings.SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS
+        self.max_fingerprints = settings.SLOW_QUERY_MAX_FINGERPRINTS
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._explain_conn: Optional[asyncpg.Connection] = None
+        self._explaining = False
+        self.stats = {"recorded": 0, "explained": 0, "explain_failed": 0, "evicted": 0}
+        self.since = time.time()
+
+    # ========== СБОР ==========
+    def install(self, engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info[START_KEY] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        start = conn.info.pop(START_KEY, None)
+        if start is None or not settings.SLOW_QUERY_ENABLED:
+            return
+        elapsed = time.perf_counter() - start
+        if elapsed >= self.threshold:
+            self.record(statement, parameters, executemany, elapsed)
+
+    def record(self, statement: str, parameters: Any, executemany: bool, elapsed: float) -> None:
+        sql = fingerprint(statement)
+        key = hashlib.md5(sql.encode()).hexdigest()[:12]
+        site = call_site()
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {
+                "fingerprint": key,
+                "sql": sql,
+                "calls": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "call_sites": Counter(),
+                "parameter_shapes": Counter(),
+                "last_seen": 0.0,
+                "explain": None,
+                "explained_at": float("-inf"),
+            }
+            if len(self._entries) > self.max_fingerprints:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+        else:
+            self._entries.move_to_end(key)
+        self.stats["recorded"] += 1
+
+        ms = elapsed * 1000
+        entry["calls"] += 1
+        entry["total_ms"] += ms
+        entry["max_ms"] = max(entry["max_ms"], ms)
+        entry["last_seen"] = time.time()
+        for counter, value in (("call_sites", site), ("parameter_shapes", parameter_shape(parameters, executemany))):
+            if value in entry[counter] or len(entry[counter]) < MAX_SHAPES:
+                entry[counter][value] += 1
+
+        if settings.SLOW_QUERY_LOG:
+            print(f"🐢 Slow query {ms:.0f} ms [{key}] {site}: {sql[:200]}")
+
+        if (
+            not executemany
+            and not self._explaining
+            and time.monotonic() - entry["explained_at"] >= self.cooldown
+            and random.random() < self.sample
+        ):
+            entry["explained_at"] = time.monotonic()
+            self._explaining = True
+            try:
+                asyncio.get_running_loop().create_task(self._explain(entry, statement, parameters))
+            except RuntimeError:
+                self._explaining = False
+
+    # ========== EXPLAIN ==========
+    async def _connection(self) -> asyncpg.Connection:
+        if self._explain_conn is None or self._explain_conn.is_closed():
+            self._explain_conn = await asyncpg.connect(
+                host=settings.DB_HOST,
+                port=settings.DB_PORT,
+                user=settings.DB_USER,
+                password=settings.DB_PASS,
+                database=settings.DB_NAME,
+                server_settings={
+                    "application_name": "slow-query-explain",
+                    "statement_timeout": str(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS),
+                },
+            )
+        return self._explain_conn
+
+    async def _explain(self, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+        analyze = statement.lstrip().upper().startswith("SELECT")
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+        args = list(parameters.values()) if isinstance(parameters, dict) else list(parameters or ())
+        try:
+            conn = await self._connection()
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                plan = await conn.fetchval(f"EXPLAIN ({options}) {statement}", *args)
+            finally:
+                # Откат — ANALYZE не оставляет следов
+                await transaction.rollback()
+            entry["explain"] = _summarize(plan, analyze)
+            self.stats["explained"] += 1
+        except Exception as e:
+            self.stats["explain_failed"] += 1
+            entry["explain"] = {"error": str(e)[:300]}
+            if self._explain_conn is not None and not self._explain_conn.is_closed():
+                self._explain_conn.terminate()
+            self._explain_conn = None
+        finally:
+            self._explaining = False
+
+    async def close(self) -> None:
+        if self._explain_conn is not None and not self._explain_conn.is_closed():
+            await self._explain_conn.close()
+        self._explain_conn = None
+
+    # ========== ОТЧЁТ ==========
+    def report(self, top: int = 20, order: str = "total_ms") -> dict:
+        entries = sorted(self._entries.values(), key=lambda e: e[order], reverse=True)[:top]
+        by_site: Dict[str, Dict[str, float]] = {}
+        for entry in self._entries.values():
+            share = entry["total_ms"] / max(1, entry["calls"])
+            for site, calls in entry["call_sites"].items():
+                stats = by_site.setdefault(site, {"calls": 0, "total_ms": 0.0})
+                stats["calls"] += calls
+                stats["total_ms"] += share * calls
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "since": self.since,
+            **self.stats,
+            "fingerprints": len(self._entries),
+            "top": [
+                {
+                    **{k: v for k, v in entry.items() if k != "explained_at"},
+                    "mean_ms": round(entry["total_ms"] / entry["calls"], 2),
+                    "total_ms": round(entry["total_ms"], 2),
+                    "max_ms": round(entry["max_ms"], 2),
+                    "call_sites": dict(entry["call_sites"].most_common()),
+                    "parameter_shapes": dict(entry["parameter_shapes"].most_common()),
+                }
+                for entry in entries
+            ],
+            "by_call_site": dict(sorted(
+                ((site, {"calls": s["calls"], "total_ms": round(s["total_ms"], 2)}) for site, s in by_site.items()),
+                key=lambda item: item[1]["total_ms"], reverse=True
+            )[:top]),
+        }
+
+    def reset(self) -> None:
+        self._entries.clear()
+        self.stats = {key: 0 for key in self.stats}
+        self.since = time.time()
+
+
+def _summarize(plan: Any, analyze: bool) -> Dict[str, Any]:
+    """Главное из JSON-плана: верхний узел, оценка/факт, буферы, сканирования таблиц"""
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]
+    node = root["Plan"]
+    scans: List[str] = []
+
+    def walk(n: Dict[str, Any]) -> None:
+        if "Relation Name" in n:
+            scans.append(f"{n['Node Type']} on {n['Relation Name']}" + (f" ({n['Index Name']})" if "Index Name" in n else ""))
+        for child in n.get("Plans", ()):
+            walk(child)
+
+    walk(node)
+    summary = {
+        "analyzed": analyze,
+        "node": node["Node Type"],
+        "total_cost": node.get("Total Cost"),
+        "plan_rows": node.get("Plan Rows"),
+        "scans": scans[:10],
+        "captured_at": time.time(),
+        "plan": root,
+    }
+    if analyze:
+        summary.update({
+            "execution_ms": root.get("Execution Time"),
+            "actual_rows": node.get("Actual Rows"),
+            "shared_hit_blocks": node.get("Shared Hit Blocks"),
+            "shared_read_blocks": node.get("Shared Read Blocks"),
+        })
+    return summary
+
+
+slow_query_log = SlowQueryLog()
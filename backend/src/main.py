@@ -1,26 +1,59 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError, ResponseValidationError
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import traceback
 
-from src.api.routes import auth, polls, votes
-from src.database.connection import create_tables
+from src.api.routes import auth, polls, votes, system
+from src.api.admission import AdmissionMiddleware
+from src.api.rate_limit import RateLimitMiddleware, rate_limit_sync
+from src.api.query_budget import QueryBudgetMiddleware
+from src.api.metrics import MetricsMiddleware
+from src.api.profiler import ProfilerMiddleware, profiler
+from src.database.connection import create_tables, ping_database, engine
+from src.services.counter_service import run_counter_rollup
+from src.services.vote_ledger import vote_ledger
+from src.services.revocation import revocation_list
+from src.services.invalidation_bus import invalidation_bus
+from src.database.circuit_breaker import CircuitOpenError, db_breaker
+from src.database.slow_queries import slow_query_log
+from src.services.metrics import registry, db_ping
 from src.config import settings
+from src.utils.security import get_jwks
 
 from src.models.user import User, UserRole
-from src.models.poll import Poll, Option
+from src.models.poll import Poll, Option, OptionCounterStripe
 from src.models.vote import Vote
-from src.models.token import RefreshToken
+from src.models.token import RefreshToken, UserTokenEpoch, RevokedAccessToken
+from src.models.idempotency import IdempotencyRecord
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await create_tables()  
     print("✅ Database tables created")
+    rollup_task = asyncio.create_task(run_counter_rollup())
+    if settings.TOKEN_REVOCATION_ENABLED:
+        revocation_list.start()
+    if settings.CACHE_INVALIDATION_ENABLED:
+        invalidation_bus.start()
+    if settings.RATE_LIMIT_SYNC:
+        rate_limit_sync.start()
+    if settings.VOTE_LEDGER_ENABLED:
+        await vote_ledger.start()
     yield
     # Shutdown
+    if vote_ledger.running:
+        await vote_ledger.stop(timeout=settings.SERVER_GRACEFUL_TIMEOUT)
+    await rate_limit_sync.stop()
+    await slow_query_log.close()
+    await invalidation_bus.stop()
+    await revocation_list.stop()
+    rollup_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await rollup_task
     print("🛑 Application shutdown")
 
 app = FastAPI(
@@ -30,6 +63,27 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# ========== ADMISSION CONTROL ==========
+# Внутренний слой: ответы 503 проходят через CORS-обработку ниже
+app.add_middleware(AdmissionMiddleware)
+
+# ========== RATE LIMIT ==========
+# Снаружи допуска: отклонённый запрос не занимает слот и не доходит до JWT и БД
+app.add_middleware(RateLimitMiddleware)
+
+# ========== QUERY BUDGET ==========
+# Server-Timing и лог превышения бюджета запросов к БД для всех маршрутов
+app.add_middleware(QueryBudgetMiddleware)
+
+# ========== METRICS ==========
+# Внешний из слоёв API: в задержку входят ожидание допуска и отказы 429/503
+app.add_middleware(MetricsMiddleware)
+
+# ========== PROFILER ==========
+# Профиль отдельного запроса по заголовку X-Profile (только администратор)
+app.add_middleware(ProfilerMiddleware)
+profiler.install(engine.sync_engine)
+
 # ========== CORS MIDDLEWARE ==========
 app.add_middleware(
     CORSMiddleware,
@@ -60,6 +114,15 @@ async def response_validation_handler(request: Request, exc: ResponseValidationE
         }
     )
 
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    """БД недоступна (предохранитель разомкнут) — быстрый 503 вместо ожидания пула"""
+    return JSONResponse(
+        status_code=503,
+        content={"success": False, "error": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after))}
+    )
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Глобальный обработчик исключений"""
@@ -97,15 +160,47 @@ async def add_cors_headers(request: Request, call_next):
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(polls.router, prefix="/api/polls", tags=["Polls"])
 app.include_router(votes.router, prefix="/api/votes", tags=["Votes"])
+app.include_router(system.router, prefix="/api/system", tags=["System"])
 
 @app.get("/")
 async def root():
     return {"message": "Система студенческих опросов API"}
 
+@app.get("/.well-known/jwks.json")
+async def jwks():
+    """Публичные ключи проверки access токенов (ES256/RS256)"""
+    return get_jwks()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики воркера в текстовом формате Prometheus"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/live")
+async def liveness_check():
+    """Процесс жив (без обращения к БД)"""
+    return {"status": "alive"}
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "database": "connected"}
+    """Готовность: SELECT 1 к БД с таймаутом; 503, если БД недоступна"""
+    if db_breaker.state == "open":
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "database": "circuit open", "circuit": db_breaker.state}
+        )
+    try:
+        rtt = await ping_database(settings.READINESS_TIMEOUT_SECONDS)
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "database": "disconnected", "error": str(e) or type(e).__name__}
+        )
+    db_ping.set(value=rtt)
+    return {"status": "healthy", "database": "connected", "db_rtt_ms": round(rtt * 1000, 2),
+            "circuit": db_breaker.state}
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # Продакшен-запуск с несколькими воркерами; для разработки: uvicorn src.main:app --reload
+    from src.server import main
+    main()
\ No newline at end of file
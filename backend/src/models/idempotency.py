@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from src.database.connection import Base
+
+class IdempotencyRecord(Base):
+    """
+    Сохранённый ответ на запрос с заголовком Idempotency-Key
+    Используется, если включено IDEMPOTENCY_PERSIST (переживает рестарт)
+    """
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+
+    fingerprint = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response = Column(Text, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
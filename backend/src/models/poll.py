@@ -1,5 +1,5 @@
 # backend/src/models/poll.py
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, SmallInteger
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from src.database.connection import Base
@@ -12,6 +12,8 @@ class Poll(Base):
     description = Column(Text, nullable=False)
     end_date = Column(DateTime(timezone=True), nullable=False)
     total_votes = Column(Integer, default=0)
+    # Количество полос счётчика на вариант (1 — обычный счётчик в options.votes)
+    counter_stripes = Column(Integer, default=1, server_default="1", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -28,6 +30,18 @@ class Option(Base):
     # Relationships
     poll = relationship("Poll", back_populates="options")
 
+class OptionCounterStripe(Base):
+    """
+    Полоса шардированного счётчика голосов варианта ответа
+    Хранит прирост голосов, ещё не перенесённый в options.votes
+    """
+    __tablename__ = "option_counter_stripes"
+
+    option_id = Column(Integer, ForeignKey("options.id", ondelete="CASCADE"), primary_key=True)
+    stripe = Column(SmallInteger, primary_key=True)
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=False, index=True)
+    votes = Column(Integer, default=0, nullable=False)
+
 # Pydantic модели
 from pydantic import BaseModel, ConfigDict
 from typing import List
@@ -53,6 +67,7 @@ class PollBase(BaseModel):
 
 class PollCreate(PollBase):
     options: List[OptionCreate]
+    counter_stripes: int = 1
 
 class PollResponse(PollBase):
     id: int
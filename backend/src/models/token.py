@@ -24,4 +24,23 @@ class RefreshToken(Base):
     ip_address = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
     
-    user = relationship("User", back_populates="refresh_tokens")
\ No newline at end of file
+    user = relationship("User", back_populates="refresh_tokens")
+
+class UserTokenEpoch(Base):
+    """
+    Эпоха отзыва access токенов пользователя:
+    все токены, выпущенные раньше revoked_before, недействительны
+    """
+    __tablename__ = "user_token_epochs"
+
+    student_id = Column(String, ForeignKey("users.student_id", ondelete="CASCADE"), primary_key=True)
+    revoked_before = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class RevokedAccessToken(Base):
+    """Отозванный access токен (по jti) — хранится до истечения токена"""
+    __tablename__ = "revoked_access_tokens"
+
+    jti = Column(String, primary_key=True)
+    student_id = Column(String, ForeignKey("users.student_id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
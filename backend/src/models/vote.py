@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from src.database.connection import Base
 
 class Vote(Base):
     __tablename__ = "votes"
+    # Один голос на студента в опросе; индекс также обслуживает проверку EXISTS
+    __table_args__ = (
+        UniqueConstraint("poll_id", "student_id", name="uq_votes_poll_student"),
+        # Статусы голосов студента по списку опросов одним запросом
+        Index("ix_votes_student_poll", "student_id", "poll_id", "option_id"),
+        # История голосов студента с keyset-пагинацией по (timestamp, id)
+        Index("ix_votes_student_timestamp", "student_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -18,8 +26,9 @@ class Vote(Base):
     user = relationship("User", back_populates="votes")
 
 # Pydantic модели
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
+from typing import List
 
 class VoteBase(BaseModel):
     poll_id: int
@@ -33,4 +42,7 @@ class VoteResponse(VoteBase):
     id: int
     timestamp: datetime
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class VoteCheckBatch(BaseModel):
+    poll_ids: List[int] = Field(..., max_length=500)
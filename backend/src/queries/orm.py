@@ -1,14 +1,22 @@
-from sqlalchemy import select, and_, update, func
+from sqlalchemy import select, and_, update, func, delete, bindparam, exists, tuple_, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
+from datetime import datetime, timezone
+import zlib
 
 from .core import DatabaseManager
 from ..models.user import User, UserRole
-from ..models.poll import Poll, Option
+from ..models.poll import Poll, Option, OptionCounterStripe
 from ..models.vote import Vote
-from ..models.token import RefreshToken
+from ..models.token import RefreshToken, UserTokenEpoch, RevokedAccessToken
+from ..services.voter_filter import voter_filter
+from ..services.invalidation_bus import invalidation_bus
+
+class DuplicateVoteError(ValueError):
+    """Пользователь уже голосовал в этом опросе"""
 
 class UserRepository(DatabaseManager):
     def __init__(self, session: AsyncSession):
@@ -21,6 +29,36 @@ class UserRepository(DatabaseManager):
         )
         return result.scalar_one_or_none()
 
+    async def get_or_create(self, student_id: str, name: str, faculty: str,
+                            role: UserRole = UserRole.USER) -> Optional[User]:
+        """
+        Получить пользователя или создать его — один запрос, без commit:
+        WITH ins AS (INSERT ... ON CONFLICT DO NOTHING RETURNING ...) SELECT из ins или users
+        Существующий пользователь только читается (строка users не переписывается)
+        """
+        if student_id in ["777"]:
+            role = UserRole.ADMIN
+        ins = (
+            pg_insert(User)
+            .values(student_id=student_id, name=name, faculty=faculty, role=role)
+            .on_conflict_do_nothing(index_elements=[User.student_id])
+            .returning(*User.__table__.c)
+            .cte("ins")
+        )
+        # Строки из data-modifying CTE не видны основному запросу в users,
+        # поэтому новая запись берётся из RETURNING, существующая — из users
+        existing = select(*User.__table__.c).where(
+            and_(User.student_id == student_id, ~exists(select(ins.c.id)))
+        )
+        stmt = select(*ins.c).union_all(existing)
+        result = await self.session.execute(select(User).from_statement(stmt))
+        user = result.scalar_one_or_none()
+        if user is None:
+            # Параллельный вход того же нового студента: строка вставлена
+            # другой транзакцией после снимка нашего запроса
+            user = await self.get_by_student_id(student_id)
+        return user
+
     async def get_admins(self) -> List[User]:
         result = await self.session.execute(
             select(User).where(User.role == UserRole.ADMIN)
@@ -41,12 +79,16 @@ class UserRepository(DatabaseManager):
         )
     
     async def update(self, user_id: int, **data) -> Optional[User]:
+        user = await self.get_by_id(User, user_id)
+        if user:
+            invalidation_bus.publish(self.session, "user", user.student_id)
         return await super().update(User, user_id, **data)
 
     async def update_user_role(self, student_id: str, new_role: UserRole) -> Optional[User]:
         user = await self.get_by_student_id(student_id)
         if user:
             user.role = new_role
+            invalidation_bus.publish(self.session, "user", student_id)
             await self.session.commit()
             await self.session.refresh(user)
         return user
@@ -74,15 +116,15 @@ class PollRepository(DatabaseManager):
 
     async def get_active_polls(self) -> List[Poll]:
         """Получить активные опросы (у которых end_date еще не наступил)"""
-        from datetime import datetime
         result = await self.session.execute(
             select(Poll)
             .options(selectinload(Poll.options))
-            .where(Poll.end_date > datetime.now())
+            .where(Poll.end_date > datetime.now(timezone.utc))
         )
         return result.scalars().all()
 
-    async def create_poll_with_options(self, title: str, description: str, end_date: str, options: List[str]) -> Poll:
+    async def create_poll_with_options(self, title: str, description: str, end_date: str, options: List[str],
+                                       counter_stripes: int = 1) -> Poll:
         """Создать опрос с вариантами ответов"""
         try:
             # Создаем опрос
@@ -90,7 +132,8 @@ class PollRepository(DatabaseManager):
                 title=title,
                 description=description,
                 end_date=end_date,
-                total_votes=0
+                total_votes=0,
+                counter_stripes=counter_stripes
             )
             self.session.add(poll)
             await self.session.flush()  # Получаем ID опроса
@@ -104,6 +147,7 @@ class PollRepository(DatabaseManager):
                 )
                 self.session.add(option)
 
+            invalidation_bus.publish(self.session, "poll", poll.id)
             await self.session.commit()
             await self.session.refresh(poll)
             return poll
@@ -111,6 +155,20 @@ class PollRepository(DatabaseManager):
             await self.session.rollback()
             raise
 
+    async def set_counter_stripes(self, poll_id: int, counter_stripes: int) -> Optional[Poll]:
+        """
+        Изменить число полос счётчика опроса
+        Накопленные полосы сначала переносятся в options.votes
+        """
+        await CounterStripeRepository(self.session).rollup([poll_id])
+        poll = await self.get_by_id(Poll, poll_id)
+        if poll:
+            poll.counter_stripes = counter_stripes
+            invalidation_bus.publish(self.session, "poll", poll_id)
+            await self.session.commit()
+            await self.session.refresh(poll)
+        return poll
+
     async def update_poll_votes(self, poll_id: int) -> None:
         """Обновить total_votes для опроса"""
         # Считаем общее количество голосов для этого опроса
@@ -127,6 +185,8 @@ class PollRepository(DatabaseManager):
             .values(total_votes=total_votes)
         )
         await self.session.commit()
+        # Вызывается на каждый голос — без NOTIFY в транзакции
+        invalidation_bus.publish_deferred("poll", poll_id)
 
 class OptionRepository(DatabaseManager):
     def __init__(self, session: AsyncSession):
@@ -149,6 +209,110 @@ class OptionRepository(DatabaseManager):
             await self.session.refresh(option)
         return option
 
+    async def add_votes(self, counts: List[Tuple[int, int, int]]) -> int:
+        """
+        Атомарно прибавить голоса к options.votes и polls.total_votes (без commit)
+        counts: [(poll_id, option_id, votes), ...]
+        Возвращает: сколько голосов прибавлено
+        """
+        option_deltas: Dict[int, int] = {}
+        poll_deltas: Dict[int, int] = {}
+        for poll_id, option_id, votes in counts:
+            option_deltas[option_id] = option_deltas.get(option_id, 0) + votes
+            poll_deltas[poll_id] = poll_deltas.get(poll_id, 0) + votes
+
+        if not option_deltas:
+            return 0
+
+        await self.session.execute(
+            update(Option.__table__)
+            .where(Option.__table__.c.id == bindparam("option_id"))
+            .values(votes=Option.__table__.c.votes + bindparam("delta")),
+            [{"option_id": k, "delta": v} for k, v in option_deltas.items()]
+        )
+        await self.session.execute(
+            update(Poll.__table__)
+            .where(Poll.__table__.c.id == bindparam("poll_id"))
+            .values(total_votes=Poll.__table__.c.total_votes + bindparam("delta")),
+            [{"poll_id": k, "delta": v} for k, v in poll_deltas.items()]
+        )
+        for poll_id in poll_deltas:
+            invalidation_bus.publish(self.session, "poll", poll_id)
+        return sum(poll_deltas.values())
+
+class CounterStripeRepository(DatabaseManager):
+    """
+    Шардированные счётчики голосов
+
+    Голоса в опросах с counter_stripes > 1 увеличивают одну из K полос
+    варианта (выбирается по хэшу student_id), а не общую строку options,
+    поэтому параллельные голосующие не ждут одну и ту же блокировку строки.
+    Чтение = options.votes + сумма полос; rollup периодически переносит
+    накопленные полосы в options.votes и polls.total_votes.
+    """
+    def __init__(self, session: AsyncSession):
+        super().__init__(session)
+        self.model = OptionCounterStripe
+
+    @staticmethod
+    def stripe_for(student_id: str, stripes: int) -> int:
+        """Номер полосы для студента (стабилен между процессами)"""
+        return zlib.crc32(student_id.encode()) % stripes
+
+    async def increment(self, poll_id: int, option_id: int, student_id: str, stripes: int) -> None:
+        """Увеличить полосу счётчика (без commit — в транзакции голоса)"""
+        stmt = pg_insert(OptionCounterStripe).values(
+            option_id=option_id,
+            stripe=self.stripe_for(student_id, stripes),
+            poll_id=poll_id,
+            votes=1
+        )
+        await self.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[OptionCounterStripe.option_id, OptionCounterStripe.stripe],
+                set_={"votes": OptionCounterStripe.votes + 1}
+            )
+        )
+
+    async def get_pending_votes(self, poll_ids: List[int]) -> Dict[int, int]:
+        """Ещё не перенесённые голоса по вариантам: {option_id: votes}"""
+        if not poll_ids:
+            return {}
+        result = await self.session.execute(
+            select(OptionCounterStripe.option_id, func.sum(OptionCounterStripe.votes))
+            .where(OptionCounterStripe.poll_id.in_(poll_ids))
+            .group_by(OptionCounterStripe.option_id)
+        )
+        return {option_id: int(votes) for option_id, votes in result.all()}
+
+    async def rollup(self, poll_ids: Optional[List[int]] = None) -> int:
+        """
+        Перенести полосы в options.votes и polls.total_votes
+        Возвращает: количество перенесённых голосов
+        """
+        try:
+            stmt = delete(OptionCounterStripe)
+            if poll_ids is not None:
+                stmt = stmt.where(OptionCounterStripe.poll_id.in_(poll_ids))
+            result = await self.session.execute(
+                stmt.returning(
+                    OptionCounterStripe.poll_id,
+                    OptionCounterStripe.option_id,
+                    OptionCounterStripe.votes
+                )
+            )
+
+            added = await OptionRepository(self.session).add_votes(result.all())
+            if not added:
+                await self.session.rollback()
+                return 0
+
+            await self.session.commit()
+            return added
+        except Exception:
+            await self.session.rollback()
+            raise
+
 class VoteRepository(DatabaseManager):
     def __init__(self, session: AsyncSession):
         super().__init__(session)
@@ -163,28 +327,147 @@ class VoteRepository(DatabaseManager):
         )
         return result.scalars().all()
 
+    async def get_user_votes_for_polls(self, student_id: str, poll_ids: List[int]) -> Dict[int, int]:
+        """Голоса пользователя в списке опросов одним запросом: {poll_id: option_id}"""
+        if not poll_ids:
+            return {}
+        result = await self.session.execute(
+            select(Vote.poll_id, Vote.option_id).where(
+                and_(Vote.student_id == student_id, Vote.poll_id.in_(poll_ids))
+            )
+        )
+        return {poll_id: option_id for poll_id, option_id in result.all()}
+
+    async def get_user_vote_history(self, student_id: str, limit: int = 50,
+                                    before: Optional[Tuple[datetime, int]] = None) -> List[Dict[str, Any]]:
+        """
+        История голосов пользователя одним запросом (votes ⋈ polls ⋈ options)
+        Keyset-пагинация: before = (timestamp, id) последней записи предыдущей страницы
+        """
+        query = (
+            select(
+                Vote.id,
+                Vote.poll_id,
+                Poll.title.label("poll_title"),
+                Vote.option_id,
+                Option.text.label("option_text"),
+                Vote.timestamp
+            )
+            .join(Poll, Poll.id == Vote.poll_id)
+            .join(Option, Option.id == Vote.option_id)
+            .where(Vote.student_id == student_id)
+        )
+        if before is not None:
+            query = query.where(tuple_(Vote.timestamp, Vote.id) < tuple_(*before))
+        result = await self.session.execute(
+            query.order_by(Vote.timestamp.desc(), Vote.id.desc()).limit(limit)
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+    async def stream_poll_votes(self, poll_id: int, batch_size: int = 5000) -> AsyncIterator[List[Any]]:
+        """
+        Голоса опроса пачками через серверный курсор (stream + yield_per)
+        В памяти одновременно не больше batch_size строк
+        """
+        result = await self.session.stream(
+            select(
+                Vote.id,
+                Vote.poll_id,
+                Vote.option_id,
+                Option.text.label("option_text"),
+                Vote.student_id,
+                Vote.timestamp
+            )
+            .join(Option, Option.id == Vote.option_id)
+            .where(Vote.poll_id == poll_id)
+            .order_by(Vote.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions():
+            yield partition
+
+    async def project_votes(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Применить пачку голосов из журнала (идемпотентно)
+        Уже записанные голоса пропускаются по уникальному индексу,
+        счётчики увеличиваются только для реально вставленных строк
+        Возвращает: количество вставленных голосов
+        """
+        try:
+            result = await self.session.execute(
+                pg_insert(Vote)
+                .values([
+                    {
+                        "poll_id": r["poll_id"],
+                        "option_id": r["option_id"],
+                        "student_id": r["student_id"],
+                        "timestamp": datetime.fromisoformat(r["ts"])
+                    }
+                    for r in records
+                ])
+                .on_conflict_do_nothing(constraint="uq_votes_poll_student")
+                .returning(Vote.poll_id, Vote.option_id, Vote.student_id)
+            )
+            rows = result.all()
+            inserted = await OptionRepository(self.session).add_votes(
+                [(poll_id, option_id, 1) for poll_id, option_id, _ in rows]
+            )
+            await self.session.commit()
+            return inserted
+        except Exception:
+            await self.session.rollback()
+            raise
+
     async def has_user_voted_in_poll(self, poll_id: int, student_id: str) -> bool:
         """Проверить, голосовал ли пользователь в этом опросе"""
-        votes = await self.get_user_votes_for_poll(poll_id, student_id)
-        return len(votes) > 0
+        # Фильтр Блума отвечает "точно нет" без запроса к БД
+        if not await voter_filter.might_have_voted(self.session, poll_id, student_id):
+            return False
+        result = await self.session.execute(
+            select(exists().where(
+                and_(Vote.poll_id == poll_id, Vote.student_id == student_id)
+            ))
+        )
+        return bool(result.scalar())
 
     async def create_vote(self, poll_id: int, option_id: int, student_id: str) -> Dict[str, Any]:
         """Создать голос и обновить счетчики"""
         try:
             # Проверяем, существует ли вариант ответа и принадлежит ли он опросу
             option_result = await self.session.execute(
-                select(Option).where(
+                select(Option, Poll.counter_stripes)
+                .join(Poll, Poll.id == Option.poll_id)
+                .where(
                     and_(Option.id == option_id, Option.poll_id == poll_id)
                 )
             )
-            option = option_result.scalar_one_or_none()
+            row = option_result.one_or_none()
             
-            if not option:
+            if not row:
                 raise ValueError("Option not found or does not belong to the poll")
+            option, stripes = row
 
             # Проверяем, не голосовал ли уже пользователь в этом опросе
             if await self.has_user_voted_in_poll(poll_id, student_id):
-                raise ValueError("User has already voted in this poll")
+                raise DuplicateVoteError("User has already voted in this poll")
+
+            if stripes and stripes > 1:
+                # Шардированный режим: голос и полоса счётчика в одной транзакции,
+                # строки options и polls не блокируются
+                vote = Vote(poll_id=poll_id, option_id=option_id, student_id=student_id)
+                self.session.add(vote)
+                await CounterStripeRepository(self.session).increment(
+                    poll_id, option_id, student_id, stripes
+                )
+                await self.session.commit()
+                await self.session.refresh(vote)
+                voter_filter.add(poll_id, student_id)
+                invalidation_bus.publish_deferred("poll", poll_id)
+                return {
+                    "vote": vote,
+                    "option": option,
+                    "poll_id": poll_id
+                }
 
             # Создаем запись голоса
             vote = await self.create(Vote,
@@ -192,6 +475,7 @@ class VoteRepository(DatabaseManager):
                 option_id=option_id,
                 student_id=student_id
             )
+            voter_filter.add(poll_id, student_id)
 
             # Обновляем счетчик голосов для варианта ответа
             option_repo = OptionRepository(self.session)
@@ -206,6 +490,11 @@ class VoteRepository(DatabaseManager):
                 "option": option,
                 "poll_id": poll_id
             }
+        except IntegrityError:
+            # Голос мог быть принят другим воркером (уникальный индекс votes)
+            await self.session.rollback()
+            voter_filter.add(poll_id, student_id)
+            raise DuplicateVoteError("User has already voted in this poll")
         except Exception as e:
             await self.session.rollback()
             raise
@@ -226,12 +515,18 @@ class VoteRepository(DatabaseManager):
         )
         total_voters = result.scalar()
 
+        # Учитываем ещё не перенесённые полосы шардированного счётчика
+        pending = {}
+        if poll.counter_stripes and poll.counter_stripes > 1:
+            pending = await CounterStripeRepository(self.session).get_pending_votes([poll_id])
+        total_votes = (poll.total_votes or 0) + sum(pending.values())
+
         return {
             "poll": {
                 "id": poll.id,
                 "title": poll.title,
                 "description": poll.description,
-                "total_votes": poll.total_votes,
+                "total_votes": total_votes,
                 "total_voters": total_voters,
                 "end_date": poll.end_date
             },
@@ -239,8 +534,8 @@ class VoteRepository(DatabaseManager):
                 {
                     "id": option.id,
                     "text": option.text,
-                    "votes": option.votes,
-                    "percentage": (option.votes / poll.total_votes * 100) if poll.total_votes > 0 else 0
+                    "votes": option.votes + pending.get(option.id, 0),
+                    "percentage": ((option.votes + pending.get(option.id, 0)) / total_votes * 100) if total_votes > 0 else 0
                 }
                 for option in poll.options
             ]
@@ -274,6 +569,19 @@ class RefreshTokenRepository(DatabaseManager):
         )
         return result.scalars().all()
 
+    async def add_token(self, student_id: str, token_hash: str, expires_at: datetime,
+                        ip_address: str = None, user_agent: str = None) -> None:
+        """Добавить refresh токен одним INSERT без commit (в транзакции входа)"""
+        await self.session.execute(
+            insert(RefreshToken).values(
+                student_id=student_id,
+                token_hash=token_hash,
+                expires_at=expires_at,
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+        )
+
     async def create_token(self, student_id: str, token_hash: str, 
                           expires_at: datetime, 
                           ip_address: str = None, 
@@ -356,10 +664,61 @@ class RefreshTokenRepository(DatabaseManager):
         
         return deleted_count
 
+class RevocationRepository(DatabaseManager):
+    """Отзыв access токенов: эпохи пользователей и jti (без commit)"""
+    def __init__(self, session: AsyncSession):
+        super().__init__(session)
+        self.model = UserTokenEpoch
+
+    async def set_user_epoch(self, student_id: str, revoked_before: datetime) -> None:
+        """Сдвинуть эпоху пользователя вперёд (назад — никогда)"""
+        stmt = pg_insert(UserTokenEpoch).values(student_id=student_id, revoked_before=revoked_before)
+        await self.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserTokenEpoch.student_id],
+                set_={"revoked_before": func.greatest(UserTokenEpoch.revoked_before, stmt.excluded.revoked_before)}
+            )
+        )
+
+    async def add_jti(self, jti: str, student_id: str, expires_at: datetime) -> None:
+        await self.session.execute(
+            pg_insert(RevokedAccessToken)
+            .values(jti=jti, student_id=student_id, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedAccessToken.jti])
+        )
+
+    async def notify(self, channel: str, payload: str) -> None:
+        """pg_notify внутри транзакции — доставляется подписчикам после commit"""
+        await self.session.execute(select(func.pg_notify(channel, payload)))
+
+    async def load_active(self, since: datetime, now: datetime) -> Tuple[List[Tuple[str, datetime]], List[Tuple[str, datetime]]]:
+        """
+        Действующие отзывы: (эпохи новее since, jti с expires_at > now)
+        Эпохи старше since не нужны — все токены до since уже истекли
+        """
+        epochs = await self.session.execute(
+            select(UserTokenEpoch.student_id, UserTokenEpoch.revoked_before)
+            .where(UserTokenEpoch.revoked_before > since)
+        )
+        jtis = await self.session.execute(
+            select(RevokedAccessToken.jti, RevokedAccessToken.expires_at)
+            .where(RevokedAccessToken.expires_at > now)
+        )
+        return [tuple(row) for row in epochs], [tuple(row) for row in jtis]
+
+    async def cleanup_expired(self, now: datetime) -> int:
+        result = await self.session.execute(
+            delete(RevokedAccessToken).where(RevokedAccessToken.expires_at <= now)
+        )
+        await self.session.commit()
+        return result.rowcount
+
 class Repository:
     def __init__(self, session: AsyncSession):
         self.users = UserRepository(session)
         self.polls = PollRepository(session)
         self.options = OptionRepository(session)
         self.votes = VoteRepository(session)
-        self.refresh_tokens = RefreshTokenRepository(session)
\ No newline at end of file
+        self.counter_stripes = CounterStripeRepository(session)
+        self.refresh_tokens = RefreshTokenRepository(session)
+        self.revocations = RevocationRepository(session)
\ No newline at end of file
@@ -31,7 +31,8 @@ async def create_poll(db: AsyncSession, poll_data: PollCreate) -> Poll:
         title=poll_data.title,
         description=poll_data.description,
         end_date=poll_data.end_date,
-        options=[option.text for option in poll_data.options]
+        options=[option.text for option in poll_data.options],
+        counter_stripes=poll_data.counter_stripes
     )
     return poll
 
@@ -1,6 +1,8 @@
 # backend/src/queries/votes.py
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import base64
 
 from src.queries.orm import Repository
 
@@ -20,25 +22,47 @@ async def has_user_voted(db: AsyncSession, poll_id: int, student_id: str) -> boo
     repo = Repository(db)
     return await repo.votes.has_user_voted_in_poll(poll_id, student_id)
 
-async def get_user_votes(db: AsyncSession, student_id: str) -> List[dict]:
-    """Получить все голоса пользователя"""
+async def get_vote_statuses(db: AsyncSession, student_id: str, poll_ids: List[int]) -> Dict[int, dict]:
+    """Статусы голосования пользователя по списку опросов"""
+    repo = Repository(db)
+    votes = await repo.votes.get_user_votes_for_polls(student_id, poll_ids)
+    return {
+        poll_id: {
+            "has_voted": poll_id in votes,
+            "option_id": votes.get(poll_id)
+        }
+        for poll_id in poll_ids
+    }
+
+def encode_vote_cursor(timestamp: datetime, vote_id: int) -> str:
+    """Курсор страницы истории голосов: (timestamp, id) последней записи"""
+    raw = f"{timestamp.isoformat()}|{vote_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_vote_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Разобрать курсор; ValueError при неверном формате"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, vote_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(vote_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+async def get_user_votes(db: AsyncSession, student_id: str, limit: int = 50,
+                         cursor: Optional[str] = None) -> dict:
+    """Получить голоса пользователя (страница истории, новые сначала)"""
     repo = Repository(db)
     
-    votes = await repo.votes.get_many_by_field("student_id", student_id)
+    before = decode_vote_cursor(cursor) if cursor else None
+    votes = await repo.votes.get_user_vote_history(student_id, limit + 1, before)
     
-    vote_list = []
-    for vote in votes:
-        poll = await repo.polls.get_by_id_with_details(vote.poll_id)
-        option = await repo.options.get_by_id(vote.option_id)
-        
-        if poll and option:
-            vote_list.append({
-                "id": vote.id,
-                "poll_id": vote.poll_id,
-                "poll_title": poll.title,
-                "option_id": vote.option_id,
-                "option_text": option.text,
-                "timestamp": vote.timestamp
-            })
+    next_cursor = None
+    if len(votes) > limit:
+        votes = votes[:limit]
+        last = votes[-1]
+        next_cursor = encode_vote_cursor(last["timestamp"], last["id"])
     
-    return vote_list
\ No newline at end of file
+    return {
+        "votes": votes,
+        "next_cursor": next_cursor
+    }
@@ -0,0 +1,198 @@
+# backend/src/server.py
+"""
+Продакшен-запуск: несколько воркеров uvicorn (uvloop + httptools)
+
+    python -m src.server --workers 4 --port 8000
+
+Мастер-процесс один раз импортирует приложение (preload), открывает
+сокет и форкает воркеры — они делят код приложения (copy-on-write) и
+слушают общий сокет. Пул соединений каждого воркера рассчитывается так,
+чтобы все воркеры вместе не превышали DB_CONNECTION_BUDGET.
+
+SIGTERM/SIGINT: мастер пересылает сигнал воркерам, каждый перестаёт
+принимать соединения, дожидается текущих запросов и в lifespan
+дописывает журнал голосов (vote_ledger.stop). Воркеры, не успевшие за
+SERVER_GRACEFUL_TIMEOUT * 2 + 5 с, завершаются SIGKILL. Упавший воркер
+перезапускается.
+
+Для разработки: uvicorn src.main:app --reload
+"""
+import argparse
+import importlib.util
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from src.config import settings
+
+
+def default_workers() -> int:
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+
+def pool_per_worker(budget: int, workers: int) -> tuple[int, int]:
+    """
+    (pool_size, max_overflow) одного воркера при общем бюджете соединений
+    Из доли воркера вычитаются соединения LISTEN; треть — на overflow
+    """
+    # Соединения LISTEN (список отзыва, шина инвалидации, общий лимит частоты)
+    # и соединение EXPLAIN медленных запросов открываются вне пула
+    listeners = (
+        int(settings.TOKEN_REVOCATION_ENABLED)
+        + int(settings.CACHE_INVALIDATION_ENABLED)
+        + int(settings.RATE_LIMIT_SYNC)
+        + int(settings.SLOW_QUERY_ENABLED and settings.SLOW_QUERY_EXPLAIN_SAMPLE > 0)
+    )
+    available = budget // workers - listeners
+    if available < 1:
+        raise SystemExit(
+            f"DB_CONNECTION_BUDGET={budget} мало для {workers} воркеров "
+            f"(нужно минимум {(listeners + 1) * workers})"
+        )
+    overflow = available // 3
+    return available - overflow, overflow
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(app, sock: socket.socket) -> None:
+    """Тело воркера (после fork)"""
+    import uvicorn
+    from src.database.connection import engine
+
+    # Соединения, унаследованные от мастера, не используются в дочернем процессе
+    engine.sync_engine.dispose(close=False)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    config = uvicorn.Config(
+        app,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        lifespan="on",
+        access_log=False,
+        proxy_headers=True,
+        timeout_graceful_shutdown=int(settings.SERVER_GRACEFUL_TIMEOUT),
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """Мастер-процесс: форк воркеров, перезапуск упавших, плавная остановка"""
+
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.children: Dict[int, int] = {}   # pid -> номер воркера
+        self.started: Dict[int, float] = {}  # номер воркера -> время запуска
+        self.backoff: Dict[int, float] = {}
+        self.restarts: List[Tuple[float, int]] = []
+        self.stopping = False
+
+    def spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            self.children = {}
+            code = 0
+            try:
+                _serve(self.app, self.sock)
+            except BaseException as e:
+                print(f"Worker {index} crashed: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = index
+        self.started[index] = time.monotonic()
+
+    def _on_signal(self, signum, frame) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        print(f"🛑 {signal.Signals(signum).name}: draining {len(self.children)} workers")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        for index in range(self.workers):
+            self.spawn(index)
+
+        deadline = None
+        while self.children or (self.restarts and not self.stopping):
+            if self.stopping and deadline is None:
+                deadline = time.monotonic() + settings.SERVER_GRACEFUL_TIMEOUT * 2 + 5
+            if deadline is not None and time.monotonic() > deadline:
+                for pid in list(self.children):
+                    print(f"Worker {self.children[pid]} did not drain in time, killing", file=sys.stderr)
+                    os.kill(pid, signal.SIGKILL)
+                deadline = float("inf")
+            pid, status = 0, 0
+            if self.children:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    self.children.clear()
+            if pid == 0:
+                time.sleep(0.2)
+            index = self.children.pop(pid, None)
+            if index is not None and not self.stopping:
+                # Воркер, упавший сразу после старта (например, БД недоступна), — пауза растёт
+                quick = time.monotonic() - self.started.get(index, 0) < 10
+                self.backoff[index] = min(self.backoff.get(index, 0.5) * 2, 30) if quick else 1
+                print(f"Worker {index} (pid {pid}) exited with {os.waitstatus_to_exitcode(status)}, "
+                      f"restarting in {self.backoff[index]:.0f}s", file=sys.stderr)
+                self.restarts.append((time.monotonic() + self.backoff[index], index))
+            now = time.monotonic()
+            for item in [r for r in self.restarts if r[0] <= now]:
+                self.restarts.remove(item)
+                if not self.stopping:
+                    self.spawn(item[1])
+        self.sock.close()
+        return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Продакшен-сервер API (несколько воркеров)")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS or default_workers())
+    parser.add_argument("--db-budget", type=int, default=settings.DB_CONNECTION_BUDGET,
+                        help="всего соединений с БД на все воркеры (0 — DB_POOL_SIZE/DB_MAX_OVERFLOW)")
+    parser.add_argument("--echo", action="store_true", help="логировать SQL (DB_ECHO)")
+    args = parser.parse_args()
+
+    # Настройки пула должны быть выставлены до создания движка (импорт src.main)
+    settings.DB_ECHO = args.echo
+    if args.db_budget:
+        settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW = pool_per_worker(args.db_budget, args.workers)
+    if args.workers > 1:
+        # Фильтр проголосовавших не видит голоса других воркеров
+        settings.VOTER_FILTER_ENABLED = False
+        # Повтор по Idempotency-Key может прийти на другой воркер
+        settings.IDEMPOTENCY_PERSIST = True
+
+    from src.main import app
+
+    sock = _bind(args.host, args.port, backlog=2048)
+    print(f"🚀 {args.workers} workers on {args.host}:{args.port}, "
+          f"pool {settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW} per worker")
+    sys.exit(Supervisor(app, sock, args.workers).run())
+
+
+if __name__ == "__main__":
+    main()
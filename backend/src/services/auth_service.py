@@ -1,5 +1,5 @@
 # backend/src/services/auth_service.py
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import hashlib
@@ -13,6 +13,7 @@ from src.utils.security import (
     verify_token, 
     hash_token
 )
+from src.services.revocation import revocation_list
 from src.config import settings
 
 
@@ -51,6 +52,38 @@ class AuthService:
         
         return user
     
+    async def login(self, student_id: str, name: str, faculty: str,
+                    ip_address: str = None, user_agent: str = None) -> dict:
+        """
+        Быстрый вход: одна транзакция и один commit
+
+        1. refresh токен подписывается до обращения к БД
+        2. get-or-create пользователя одним запросом + INSERT refresh токена
+        3. commit возвращает соединение в пул, access токен подписывается после
+        """
+        refresh_token, expires_at = create_refresh_token(student_id)
+        token_hash = hash_token(refresh_token)
+        
+        try:
+            user = await self.repo.users.get_or_create(student_id, name, faculty)
+            await self.repo.refresh_tokens.add_token(
+                student_id=student_id,
+                token_hash=token_hash,
+                expires_at=expires_at,
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        
+        access_token = create_access_token(
+            data={"sub": user.student_id},
+            role=user.role
+        )
+        return self._token_response(user, access_token, refresh_token)
+    
     async def create_token_pair(self, user: User, ip_address: str = None, user_agent: str = None) -> dict:
 
         # 1. Создаём access токен (короткое время жизни)
@@ -72,6 +105,9 @@ class AuthService:
         )
         
         # 4. Возвращаем пару токенов (refresh токен — только один раз!)
+        return self._token_response(user, access_token, refresh_token)
+    
+    def _token_response(self, user: User, access_token: str, refresh_token: str) -> dict:
         return {
             "access_token": access_token,
             "refresh_token": refresh_token,
@@ -123,7 +159,7 @@ class AuthService:
             return None
         
         # 4. Проверяем, не истёк ли токен
-        if token_record.expires_at < datetime.utcnow():
+        if token_record.expires_at < datetime.now(timezone.utc):
             return None
         
         # 5. Получаем пользователя
@@ -159,9 +195,14 @@ class AuthService:
         }
     
     async def revoke_all_tokens(self, student_id: str) -> bool:
-  
+        """Отозвать все refresh токены и все выпущенные access токены пользователя"""
         revoked_count = await self.repo.refresh_tokens.revoke_all_for_user(student_id)
+        await revocation_list.revoke_user(self.db, student_id)
         return revoked_count > 0
+
+    async def revoke_access_token(self, student_id: str, jti: str, exp: float) -> None:
+        """Отозвать один access токен (выход только на текущем устройстве)"""
+        await revocation_list.revoke_token(self.db, student_id, jti, exp)
     
     async def revoke_token(self, token_hash: str) -> bool:
 
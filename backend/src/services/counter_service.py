@@ -0,0 +1,28 @@
+# backend/src/services/counter_service.py
+import asyncio
+
+from src.database.connection import AsyncSessionLocal
+from src.queries.orm import CounterStripeRepository
+from src.config import settings
+
+
+async def rollup_counter_stripes() -> int:
+    """Перенести все полосы шардированных счётчиков в options/polls"""
+    async with AsyncSessionLocal() as session:
+        return await CounterStripeRepository(session).rollup()
+
+
+async def run_counter_rollup(interval: float = None) -> None:
+    """
+    Фоновая задача: периодический rollup полос счётчиков
+    Запускается из lifespan приложения
+    """
+    interval = interval or settings.COUNTER_ROLLUP_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await rollup_counter_stripes()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Counter rollup failed: {e}")
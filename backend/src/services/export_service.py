@@ -0,0 +1,68 @@
+# backend/src/services/export_service.py
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator
+
+from src.database.connection import AsyncSessionLocal
+from src.queries.orm import VoteRepository
+
+EXPORT_COLUMNS = ["id", "poll_id", "option_id", "option_text", "student_id", "timestamp"]
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _encode_csv(rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            row.timestamp.isoformat() if name == "timestamp" and row.timestamp else getattr(row, name)
+            for name in EXPORT_COLUMNS
+        ])
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows) -> str:
+    return "".join(
+        json.dumps({
+            name: (row.timestamp.isoformat() if row.timestamp else None) if name == "timestamp" else getattr(row, name)
+            for name in EXPORT_COLUMNS
+        }, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+async def export_poll_votes(poll_id: int, fmt: str = "csv", compress: bool = False,
+                            batch_size: int = 5000) -> AsyncIterator[bytes]:
+    """
+    Потоковая выгрузка голосов опроса (CSV или NDJSON, опционально gzip)
+
+    Строки читаются серверным курсором пачками по batch_size, каждая пачка
+    сразу кодируется и отдаётся клиенту — память не зависит от числа голосов.
+    Сессия открывается внутри генератора: сессия из get_db закрывается
+    до того, как StreamingResponse начнёт читать поток.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    first = True
+
+    async with AsyncSessionLocal() as session:
+        async for rows in VoteRepository(session).stream_poll_votes(poll_id, batch_size):
+            text = _encode_csv(rows, header=first) if fmt == "csv" else _encode_ndjson(rows)
+            first = False
+            chunk = text.encode()
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    if fmt == "csv" and first:
+        chunk = _encode_csv([], header=True).encode()
+        yield compressor.compress(chunk) if compressor else chunk
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,153 @@
+# backend/src/services/idempotency.py
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.database.connection import AsyncSessionLocal
+from src.models.idempotency import IdempotencyRecord
+from src.config import settings
+
+StoredResponse = Tuple[int, dict]
+
+
+class IdempotencyKeyMismatch(Exception):
+    """Ключ уже использован с другим телом запроса"""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "expires_at")
+
+    def __init__(self, fingerprint: str, future: asyncio.Future, expires_at: float):
+        self.fingerprint = fingerprint
+        self.future = future
+        self.expires_at = expires_at
+
+
+class IdempotencyStore:
+    """
+    Хранилище ответов для повторов запросов с Idempotency-Key
+
+    Ограниченный LRU в памяти с TTL; опционально — таблица idempotency_keys.
+    Повтор с тем же ключом получает исходный ответ без обращения к таблицам
+    голосов; параллельные повторы ждут первый запрос, а не выполняют его заново.
+    Ответы 5xx не сохраняются — такой запрос можно повторить.
+
+    LRU свой у каждого воркера: повтор, пришедший на другой воркер, находит
+    ответ только в таблице, поэтому src.server включает IDEMPOTENCY_PERSIST
+    при нескольких воркерах. Первый запрос и повтор, выполняющиеся
+    одновременно на разных воркерах, друг друга не ждут: повтор получит
+    ответ "уже голосовали", а не исходный.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None, persist: bool = None):
+        self.max_entries = max_entries or settings.IDEMPOTENCY_MAX_KEYS
+        self.ttl = ttl or settings.IDEMPOTENCY_TTL_SECONDS
+        self.persist = settings.IDEMPOTENCY_PERSIST if persist is None else persist
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[StoredResponse]]
+    ) -> Tuple[int, dict, bool]:
+        """
+        Выполнить handler один раз на (scope, key)
+        Возвращает: (status_code, body, replayed)
+        """
+        cache_key = (scope, key)
+        entry = self._get(cache_key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                raise IdempotencyKeyMismatch(key)
+            status_code, body = await asyncio.shield(entry.future)
+            return status_code, body, True
+
+        future = asyncio.get_running_loop().create_future()
+        entry = _Entry(fingerprint, future, time.monotonic() + self.ttl)
+        self._put(cache_key, entry)
+
+        try:
+            stored = await self._load(scope, key) if self.persist else None
+            if stored is not None:
+                stored_fingerprint, status_code, body = stored
+                entry.fingerprint = stored_fingerprint
+                future.set_result((status_code, body))
+                if stored_fingerprint != fingerprint:
+                    raise IdempotencyKeyMismatch(key)
+                return status_code, body, True
+
+            status_code, body = await handler()
+        except BaseException as e:
+            if not future.done():
+                self._entries.pop(cache_key, None)
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+                    future.exception()  # ожидающих может не быть
+            raise
+
+        if status_code >= 500:
+            self._entries.pop(cache_key, None)
+        elif self.persist:
+            await self._save(scope, key, fingerprint, status_code, body)
+        future.set_result((status_code, body))
+        return status_code, body, False
+
+    def _get(self, cache_key: Tuple[str, str]) -> Optional[_Entry]:
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            del self._entries[cache_key]
+            return None
+        self._entries.move_to_end(cache_key)
+        return entry
+
+    def _put(self, cache_key: Tuple[str, str], entry: _Entry) -> None:
+        self._entries[cache_key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _load(self, scope: str, key: str) -> Optional[Tuple[str, int, dict]]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(IdempotencyRecord).where(
+                    IdempotencyRecord.scope == scope,
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.created_at > datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+                )
+            )
+            record = result.scalar_one_or_none()
+            if not record:
+                return None
+            return record.fingerprint, record.status_code, json.loads(record.response)
+
+    async def _save(self, scope: str, key: str, fingerprint: str, status_code: int, body: dict) -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                pg_insert(IdempotencyRecord)
+                .values(
+                    scope=scope,
+                    key=key,
+                    fingerprint=fingerprint,
+                    status_code=status_code,
+                    response=json.dumps(body, ensure_ascii=False)
+                )
+                .on_conflict_do_nothing()
+            )
+            await session.commit()
+
+
+idempotency_store = IdempotencyStore()
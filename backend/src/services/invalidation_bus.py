@@ -0,0 +1,187 @@
+# backend/src/services/invalidation_bus.py
+import asyncio
+import json
+import os
+import secrets
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.database.connection import AsyncSessionLocal
+from src.database.listener import PgListener
+from src.config import settings
+
+INVALIDATION_CHANNEL = "cache_invalidation"
+PENDING_KEY = "pending_invalidations"
+# Лимит payload NOTIFY — 8000 байт; длинные пачки делятся на несколько сообщений
+MAX_PAYLOAD_BYTES = 7000
+
+Handler = Callable[[Optional[str]], None]
+
+
+class InvalidationBus:
+    """
+    Шина инвалидации кэшей между процессами (Postgres LISTEN/NOTIFY)
+
+    Писатель вызывает publish(session, topic, key) до commit: ключи копятся
+    в session.info и перед commit уходят одним pg_notify в той же транзакции,
+    поэтому другие воркеры узнают об изменении только после фиксации.
+    В своём процессе подписчики вызываются сразу после commit, собственные
+    уведомления из LISTEN пропускаются (по origin).
+
+    Частые изменения (голоса) публикуются через publish_deferred после
+    commit: ключи копятся и раз в CACHE_INVALIDATION_COALESCE_SECONDS
+    уходят одним NOTIFY в отдельной транзакции. pg_notify в каждой
+    транзакции голоса выстраивал бы все commit в очередь за блокировкой
+    очереди уведомлений, а кэши списков сбрасывались бы на каждый голос.
+
+    Подписчик: subscribe(topic, handler); handler(key) сбрасывает запись,
+    handler(None) — весь кэш темы. После (пере)подключения слушателя
+    сообщения могли быть пропущены, поэтому все кэши сбрасываются целиком.
+    """
+
+    def __init__(self):
+        self.origin = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._listener: Optional[PgListener] = None
+        self._deferred: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self.stats = {"published": 0, "received": 0, "flushes": 0, "deferred": 0}
+
+    # ========== ПОДПИСКА ==========
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self._handlers[topic].append(handler)
+
+    def _dispatch(self, keys: Iterable[str]) -> None:
+        for item in keys:
+            topic, _, key = item.partition(":")
+            for handler in self._handlers.get(topic, ()):
+                try:
+                    handler(None if key in ("", "*") else key)
+                except Exception as e:
+                    print(f"Invalidation handler {topic} failed: {e}")
+
+    def flush_all(self) -> None:
+        """Сбросить все подписанные кэши"""
+        self.stats["flushes"] += 1
+        self._dispatch(f"{topic}:*" for topic in list(self._handlers))
+
+    # ========== ПУБЛИКАЦИЯ ==========
+    def publish(self, session: AsyncSession, topic: str, key=None) -> None:
+        """Запланировать инвалидацию topic:key (без key — весь topic) на commit сессии"""
+        pending: Set[str] = session.sync_session.info.setdefault(PENDING_KEY, set())
+        pending.add(f"{topic}:{'*' if key is None else key}")
+
+    def publish_deferred(self, topic: str, key=None) -> None:
+        """Инвалидация topic:key с объединением (вызывать после commit)"""
+        item = f"{topic}:{'*' if key is None else key}"
+        if self._flusher is None:
+            # Шина не запущена — других воркеров не уведомить
+            self._dispatch([item])
+            return
+        self._deferred.add(item)
+        self.stats["deferred"] += 1
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.CACHE_INVALIDATION_COALESCE_SECONDS)
+            await self._flush_deferred()
+
+    async def _flush_deferred(self) -> None:
+        keys, self._deferred = self._deferred, set()
+        if not keys:
+            return
+        self._dispatch(keys)
+        try:
+            async with AsyncSessionLocal() as session:
+                for payload in self._payloads(keys):
+                    await session.execute(select(func.pg_notify(INVALIDATION_CHANNEL, payload)))
+                    self.stats["published"] += 1
+                await session.commit()
+        except Exception as e:
+            # Повторим со следующей пачкой
+            print(f"Deferred invalidation publish failed: {e}")
+            self._deferred |= keys
+
+    def _payloads(self, keys: Set[str]) -> List[str]:
+        # Ключи темы со сбросом целиком не нужны
+        flushed = {k.partition(":")[0] for k in keys if k.endswith(":*")}
+        keys = sorted(k for k in keys if k.endswith(":*") or k.partition(":")[0] not in flushed)
+
+        payloads, chunk, size = [], [], 0
+        for key in keys:
+            if chunk and size + len(key) + 3 > MAX_PAYLOAD_BYTES:
+                payloads.append(json.dumps({"o": self.origin, "k": chunk}, separators=(",", ":")))
+                chunk, size = [], 0
+            chunk.append(key)
+            size += len(key) + 3
+        if chunk:
+            payloads.append(json.dumps({"o": self.origin, "k": chunk}, separators=(",", ":")))
+        return payloads
+
+    def _before_commit(self, session: Session) -> None:
+        keys = session.info.get(PENDING_KEY)
+        if not keys:
+            return
+        for payload in self._payloads(keys):
+            session.execute(select(func.pg_notify(INVALIDATION_CHANNEL, payload)))
+            self.stats["published"] += 1
+
+    def _after_commit(self, session: Session) -> None:
+        keys = session.info.pop(PENDING_KEY, None)
+        if keys:
+            self._dispatch(keys)
+
+    def _after_rollback(self, session: Session) -> None:
+        session.info.pop(PENDING_KEY, None)
+
+    # ========== СЛУШАТЕЛЬ ==========
+    def _on_message(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message.get("o") == self.origin:
+            return
+        self.stats["received"] += 1
+        self._dispatch(message.get("k", ()))
+
+    async def _on_connect(self, reconnected: bool) -> None:
+        # До подключения (или во время обрыва) уведомления не доходили
+        self.flush_all()
+
+    def start(self) -> None:
+        # Воркеры, форкнутые после импорта, должны различаться по origin
+        self.origin = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._listener = PgListener(INVALIDATION_CHANNEL, self._on_message, self._on_connect)
+        self._listener.start()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+            await self._flush_deferred()
+        if self._listener:
+            await self._listener.stop()
+            self._listener = None
+
+    def status(self) -> dict:
+        return {
+            **self.stats,
+            "topics": sorted(self._handlers),
+            "deferred_pending": len(self._deferred),
+            "listening": bool(self._listener and self._listener.connected),
+            "reconnects": self._listener.reconnects if self._listener else 0,
+        }
+
+
+invalidation_bus = InvalidationBus()
+
+event.listen(Session, "before_commit", invalidation_bus._before_commit)
+event.listen(Session, "after_commit", invalidation_bus._after_commit)
+event.listen(Session, "after_rollback", invalidation_bus._after_rollback)
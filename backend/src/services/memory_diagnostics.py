@@ -0,0 +1,189 @@
+# backend/src/services/memory_diagnostics.py
+import gc
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+SRC_DIR = os.sep + "src" + os.sep
+SITE_DIRS = (os.sep + "site-packages" + os.sep, os.sep + "dist-packages" + os.sep)
+STDLIB_DIR = os.path.dirname(os.__file__) + os.sep
+
+
+def rss_mb() -> float:
+    """Текущий RSS процесса в МБ (Linux: /proc, иначе пиковый ru_maxrss)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def module_group(filename: str) -> str:
+    """
+    Пакет, к которому относится файл: src.queries, src.api.routes, ...;
+    сторонние библиотеки — по имени пакета, стандартная — stdlib.<модуль>
+    """
+    index = filename.rfind(SRC_DIR)
+    if index >= 0:
+        parts = filename[index + 1:].split(os.sep)[:-1]
+        return ".".join(parts)
+    for site in SITE_DIRS:
+        index = filename.rfind(site)
+        if index >= 0:
+            return filename[index + len(site):].split(os.sep)[0].removesuffix(".py")
+    if filename.startswith(STDLIB_DIR):
+        return "stdlib." + filename[len(STDLIB_DIR):].split(os.sep)[0].removesuffix(".py")
+    return filename
+
+
+def _owner(traceback: tracemalloc.Traceback) -> str:
+    """Ближайший к месту выделения кадр из src/, иначе пакет самого выделения"""
+    for frame in reversed(traceback):
+        if SRC_DIR in frame.filename:
+            return module_group(frame.filename)
+    return module_group(traceback[-1].filename) if len(traceback) else "unknown"
+
+
+def _type_counts() -> Counter:
+    counts: Counter = Counter()
+    for obj in gc.get_objects():
+        cls = type(obj)
+        counts[f"{cls.__module__}.{cls.__qualname__}"] += 1
+    return counts
+
+
+class MemoryDiagnostics:
+    """
+    Диагностика памяти воркера
+
+    tracemalloc включается по запросу (замедляет выделения) и сравнивает
+    текущий снимок с базовым: рост группируется по пакету src, из
+    которого пришло выделение (src.queries, src.api.routes, ...), —
+    поэтому видно, чей код держит память SQLAlchemy или pydantic.
+    Число объектов по типам (gc.get_objects) тоже сравнивается с базой.
+    Обход всех объектов занимает десятки-сотни миллисекунд и блокирует
+    цикл событий — только для ручной диагностики.
+    """
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._baseline_types: Optional[Counter] = None
+        self._baseline_at: Optional[float] = None
+        self._baseline_rss: Optional[float] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int) -> None:
+        if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+            tracemalloc.stop()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._baseline = None
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def take_baseline(self, frames: int = 10) -> dict:
+        """Запомнить базовый снимок (tracemalloc включается, если выключен)"""
+        self.start(frames)
+        gc.collect()
+        self._baseline = self._snapshot()
+        self._baseline_types = _type_counts()
+        self._baseline_at = time.time()
+        self._baseline_rss = rss_mb()
+        return {
+            "baseline_at": self._baseline_at,
+            "rss_mb": round(self._baseline_rss, 2),
+            "traced_mb": round(tracemalloc.get_traced_memory()[0] / 2**20, 2),
+            "frames": tracemalloc.get_traceback_limit(),
+        }
+
+    def diff(self, top: int = 20) -> dict:
+        """Рост памяти с базового снимка: по пакетам-владельцам, по строкам, по типам объектов"""
+        if self._baseline is None or not tracemalloc.is_tracing():
+            raise ValueError("Базовый снимок не сделан (POST /api/system/memory/baseline)")
+        gc.collect()
+        snapshot = self._snapshot()
+        by_owner: Dict[str, Dict[str, int]] = {}
+        for stat in snapshot.compare_to(self._baseline, "traceback"):
+            group = by_owner.setdefault(_owner(stat.traceback), {"size_diff": 0, "count_diff": 0, "size": 0})
+            group["size_diff"] += stat.size_diff
+            group["count_diff"] += stat.count_diff
+            group["size"] += stat.size
+        lines = [
+            {
+                "line": str(stat.traceback[-1]),
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+            for stat in snapshot.compare_to(self._baseline, "lineno")[:top]
+        ]
+        types = _type_counts()
+        type_growth = (types - self._baseline_types).most_common(top)
+        return {
+            "since": self._baseline_at,
+            "seconds": round(time.time() - self._baseline_at, 1),
+            "rss_mb": round(rss_mb(), 2),
+            "rss_growth_mb": round(rss_mb() - self._baseline_rss, 2),
+            "by_module": dict(sorted(
+                ((name, {"size_diff_kb": round(g["size_diff"] / 1024, 1), "count_diff": g["count_diff"],
+                         "size_kb": round(g["size"] / 1024, 1)})
+                 for name, g in by_owner.items()),
+                key=lambda item: item[1]["size_diff_kb"], reverse=True
+            )[:top]),
+            "top_lines": lines,
+            "type_growth": dict(type_growth),
+        }
+
+    def summary(self, top: int = 30) -> dict:
+        """RSS, сборщик мусора, число объектов по типам, сессии SQLAlchemy и модели pydantic"""
+        sessions = identity_objects = models = 0
+        for obj in gc.get_objects():
+            if isinstance(obj, Session):
+                sessions += 1
+                identity_objects += len(obj.identity_map)
+            elif isinstance(obj, BaseModel):
+                models += 1
+        traced = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "pid": os.getpid(),
+            "rss_mb": round(rss_mb(), 2),
+            "tracemalloc": {
+                "tracing": tracemalloc.is_tracing(),
+                "traced_mb": round(traced[0] / 2**20, 2),
+                "peak_mb": round(traced[1] / 2**20, 2),
+                "baseline_at": self._baseline_at,
+            },
+            "gc": {
+                "enabled": gc.isenabled(),
+                "counts": gc.get_count(),
+                "thresholds": gc.get_threshold(),
+                "generations": gc.get_stats(),
+                "garbage": len(gc.garbage),
+                "objects": len(gc.get_objects()),
+            },
+            "sqlalchemy": {"sessions": sessions, "identity_map_objects": identity_objects},
+            "pydantic_models": models,
+            "modules_loaded": len(sys.modules),
+            "types": dict(_type_counts().most_common(top)),
+        }
+
+
+memory_diagnostics = MemoryDiagnostics()
@@ -0,0 +1,188 @@
+# backend/src/services/metrics.py
+import bisect
+import math
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Iterable[Tuple[str, str]] = ()) -> str:
+    # Каждый воркер отдаёт свои значения; метка worker различает процессы при сборе
+    pairs = [("worker", str(os.getpid())), *zip(names, values), *extra]
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """
+    Счётчик с метками
+
+    Значения — словарь кортеж меток -> число без блокировок: все
+    изменения идут из одного потока цикла событий воркера.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labels, key)} {_number(value)}"
+            for key, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        self.values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) - amount
+
+
+class Histogram:
+    """Гистограмма: по меткам — счётчики корзин (без накопления), сумма и количество"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Метрики процесса в текстовом формате Prometheus
+
+    Кроме собственных метрик — сборщики: функции, которые при чтении
+    /metrics превращают уже существующие счётчики сервисов (stats)
+    в образцы (name, kind, help, [(метки, значение)]).
+    """
+
+    def __init__(self):
+        self.metrics: List = []
+        self.collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, collect: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]):
+        self.collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            try:
+                families = list(collect())
+            except Exception as e:
+                print(f"Metrics collector {collect.__name__} failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ========== HTTP ==========
+http_requests = registry.counter("http_requests_total", "HTTP requests by route and status", ["method", "route", "status"])
+http_latency = registry.histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests in progress by admission class", ["class"])
+
+# ========== ДОМЕН ==========
+votes = registry.counter("votes_total", "Vote submissions by outcome", ["outcome"])
+auth_failures = registry.counter("auth_failures_total", "Rejected authentications by reason", ["reason"])
+
+# ========== БД ==========
+db_pool_wait = registry.histogram(
+    "db_pool_acquire_seconds", "Time from session transaction start to connection checkout",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+db_ping = registry.gauge("db_ping_seconds", "Last readiness probe round trip")
+
+POOL_WAIT_KEY = "metrics_tx_start"
+
+
+def _after_transaction_create(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info[POOL_WAIT_KEY] = time.perf_counter()
+
+
+def _after_begin(session, transaction, connection) -> None:
+    start = session.info.pop(POOL_WAIT_KEY, None)
+    if start is not None:
+        db_pool_wait.observe(time.perf_counter() - start)
+
+
+def install_pool_metrics() -> None:
+    """Ожидание соединения: от начала транзакции сессии до выдачи соединения из пула"""
+    event.listen(Session, "after_transaction_create", _after_transaction_create)
+    event.listen(Session, "after_begin", _after_begin)
@@ -0,0 +1,142 @@
+# backend/src/services/poll_import.py
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.poll import Poll, PollCreate
+from src.services.invalidation_bus import invalidation_bus
+from src.config import settings
+
+CSV_OPTION_SEPARATOR = "|"
+
+
+def parse_polls(data: bytes, fmt: str) -> List[Dict[str, Any]]:
+    """
+    Разобрать файл импорта в список сырых записей
+    JSON: [{"title", "description", "end_date", "options": ["...", ...], "counter_stripes"?}, ...]
+    CSV: title,description,end_date,options[,counter_stripes] — варианты через "|"
+    """
+    text = data.decode("utf-8-sig")
+    if fmt == "json":
+        items = json.loads(text)
+        if isinstance(items, dict):
+            items = items.get("polls", [])
+        if not isinstance(items, list):
+            raise ValueError("JSON должен быть списком опросов")
+        return items
+
+    rows = []
+    reader = csv.DictReader(io.StringIO(text))
+    try:
+        for row in reader:
+            options = row.get("options") or ""
+            record = {
+                "title": row.get("title"),
+                "description": row.get("description") or "",
+                "end_date": row.get("end_date") or None,
+                "options": [o.strip() for o in options.split(CSV_OPTION_SEPARATOR) if o.strip()],
+            }
+            if row.get("counter_stripes"):
+                record["counter_stripes"] = row["counter_stripes"]
+            rows.append(record)
+    except csv.Error as e:
+        # NUL в данных, слишком длинное поле и т.п. — ошибка разбора, как и битый JSON
+        raise ValueError(f"некорректный CSV: {e}") from e
+    return rows
+
+
+def validate_polls(items: List[Any]) -> Tuple[List[PollCreate], List[Dict[str, Any]]]:
+    """
+    Проверить записи импорта
+    Возвращает: (валидные опросы, ошибки [{"row": номер с 1, "error": ...}])
+    """
+    valid: List[PollCreate] = []
+    errors: List[Dict[str, Any]] = []
+    default_end = datetime.now(timezone.utc) + timedelta(days=7)
+
+    for index, item in enumerate(items, start=1):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("ожидается объект опроса")
+            item = dict(item)
+            item.setdefault("description", "")
+            if not item.get("end_date"):
+                item["end_date"] = default_end
+            if not isinstance(item.get("options") or [], list):
+                raise ValueError("options должен быть списком")
+            item["options"] = [
+                {"text": str(o)} if not isinstance(o, dict) else o
+                for o in (item.get("options") or [])
+            ]
+            poll = PollCreate.model_validate(item)
+            if not poll.title.strip():
+                raise ValueError("заголовок обязателен")
+            if not poll.options:
+                raise ValueError("должен быть хотя бы один вариант ответа")
+            if not 1 <= poll.counter_stripes <= settings.COUNTER_STRIPES_MAX:
+                raise ValueError(f"counter_stripes должен быть от 1 до {settings.COUNTER_STRIPES_MAX}")
+            valid.append(poll)
+        except ValidationError as e:
+            errors.append({
+                "row": index,
+                "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            })
+        except ValueError as e:
+            errors.append({"row": index, "error": str(e)})
+
+    return valid, errors
+
+
+async def import_polls(session: AsyncSession, polls: List[PollCreate], batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Загрузить опросы и варианты одной транзакцией
+    Опросы — многострочным INSERT ... RETURNING id (порядок сохраняется),
+    варианты — через COPY (asyncpg copy_records_to_table)
+    """
+    polls_created = options_created = 0
+    try:
+        conn = await session.connection()
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+
+        for start in range(0, len(polls), batch_size):
+            chunk = polls[start:start + batch_size]
+            result = await session.execute(
+                insert(Poll).returning(Poll.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "title": poll.title,
+                        "description": poll.description,
+                        "end_date": poll.end_date,
+                        "total_votes": 0,
+                        "counter_stripes": poll.counter_stripes,
+                    }
+                    for poll in chunk
+                ]
+            )
+            poll_ids = result.scalars().all()
+
+            records = [
+                (poll_id, option.text, 0)
+                for poll_id, poll in zip(poll_ids, chunk)
+                for option in poll.options
+            ]
+            await driver.copy_records_to_table(
+                "options", records=records, columns=["poll_id", "text", "votes"]
+            )
+            polls_created += len(poll_ids)
+            options_created += len(records)
+
+        invalidation_bus.publish(session, "poll")
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+
+    return {"polls_created": polls_created, "options_created": options_created}
@@ -0,0 +1,131 @@
+# backend/src/services/read_cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+from src.database.circuit_breaker import db_breaker, is_unavailable
+from src.services.invalidation_bus import invalidation_bus
+from src.services.single_flight import SingleFlight, poll_reads
+from src.config import settings
+
+# Заголовок Warning (RFC 7234): 110 — ответ устарел, 111 — обновить не удалось
+WARNING_STALE = '110 - "Response is Stale"'
+WARNING_REVALIDATION_FAILED = '111 - "Revalidation Failed"'
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "valid")
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.fetched_at = time.monotonic()
+        self.valid = True
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class StaleWhileRevalidateCache:
+    """
+    Последние удачные документы чтения (опрос, результаты, списки)
+
+    - свежий (моложе READ_CACHE_FRESH_SECONDS и не инвалидирован) — отдаётся без БД
+    - устаревший по времени, но моложе FRESH + SWR — отдаётся сразу с Warning 110,
+      обновление запускается в фоне
+    - инвалидирован шиной (данные точно изменились) или старше — загружается
+      синхронно (через single-flight); если БД недоступна или предохранитель
+      разомкнут, отдаётся последний удачный документ с Warning 111
+    - документа нет и БД недоступна — исключение (CircuitOpenError → 503)
+
+    get() возвращает (документ, warning или None, возраст в секундах).
+    """
+
+    def __init__(self, flights: SingleFlight, max_keys: int = None):
+        self.flights = flights
+        self.max_keys = max_keys or settings.READ_CACHE_MAX_KEYS
+        self.fresh = settings.READ_CACHE_FRESH_SECONDS
+        self.swr = settings.READ_CACHE_SWR_SECONDS
+        self.max_stale = settings.READ_CACHE_MAX_STALE_SECONDS
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refreshing: set = set()
+        self.stats = {"hits": 0, "stale_served": 0, "revalidation_failed": 0, "misses": 0}
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, Optional[str], float]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.age > self.max_stale:
+            self._entries.pop(key, None)
+            entry = None
+
+        if entry is not None and entry.valid:
+            if entry.age < self.fresh:
+                self.stats["hits"] += 1
+                return entry.value, None, entry.age
+            if entry.age < self.fresh + self.swr and db_breaker.state == "closed":
+                self.stats["stale_served"] += 1
+                self._refresh_in_background(key, fetch)
+                return entry.value, WARNING_STALE, entry.age
+
+        self.stats["misses"] += 1
+        try:
+            value = await self._load(key, fetch)
+        except Exception as e:
+            if entry is None or not is_unavailable(e):
+                raise
+            self.stats["revalidation_failed"] += 1
+            return entry.value, WARNING_REVALIDATION_FAILED, entry.age
+        return value, None, 0.0
+
+    async def _load(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        db_breaker.check()
+        value = await self.flights.do(key, fetch)
+        self._store(key, value)
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        if value is None:
+            # 404 не кэшируется
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = _Entry(value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    def _refresh_in_background(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh() -> None:
+            try:
+                await self._load(key, fetch)
+            except Exception as e:
+                print(f"Background refresh {key} failed: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        asyncio.create_task(refresh())
+
+    # ========== ИНВАЛИДАЦИЯ ==========
+    def invalidate(self, match: Callable[[Hashable], bool] = None) -> None:
+        """Пометить документы устаревшими (last known good сохраняется)"""
+        for key, entry in self._entries.items():
+            if match is None or match(key):
+                entry.valid = False
+
+    def on_poll_invalidation(self, key: Optional[str]) -> None:
+        """Шина: "poll:<id>" — опрос, его результаты и все списки; "poll:*" — всё"""
+        if key is None:
+            self.invalidate()
+            return
+        poll_id = int(key)
+        self.invalidate(lambda k: k[0] in ("polls", "active") or (len(k) > 1 and k[1] == poll_id))
+
+    def status(self) -> dict:
+        return {**self.stats, "entries": len(self._entries), "refreshing": len(self._refreshing)}
+
+
+poll_cache = StaleWhileRevalidateCache(poll_reads)
+invalidation_bus.subscribe("poll", poll_cache.on_poll_invalidation)
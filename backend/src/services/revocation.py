@@ -0,0 +1,123 @@
+# backend/src/services/revocation.py
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.connection import AsyncSessionLocal
+from src.database.listener import PgListener
+from src.queries.orm import RevocationRepository
+from src.config import settings
+
+REVOCATION_CHANNEL = "token_revocations"
+
+
+class RevocationList:
+    """
+    Список отзыва access токенов в памяти процесса
+
+    - эпохи: student_id -> время; токены с iat раньше эпохи недействительны
+      (выход со всех устройств, смена роли)
+    - jti: отозванные отдельные токены с временем их истечения
+
+    Проверка в get_current_user — два поиска в dict, без запросов к БД.
+    Запись отзыва идёт в БД вместе с pg_notify в той же транзакции,
+    остальные воркеры применяют сообщение из LISTEN. После (пере)подключения
+    слушателя список целиком перечитывается из БД — пропущенные уведомления
+    не теряются. Записи старше срока жизни access токена удаляются.
+    """
+
+    def __init__(self):
+        self.epochs: Dict[str, float] = {}
+        self.denied: Dict[str, float] = {}
+        self._listener: Optional[PgListener] = None
+        self._last_prune = 0.0
+
+    @property
+    def token_ttl(self) -> float:
+        return settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    # ========== ПРОВЕРКА ==========
+    def is_revoked(self, student_id: str, jti: Optional[str], iat: Optional[float]) -> bool:
+        epoch = self.epochs.get(student_id)
+        if epoch is not None and (iat or 0) < epoch:
+            return True
+        return jti is not None and jti in self.denied
+
+    # ========== ПРИМЕНЕНИЕ ==========
+    def apply(self, message: dict) -> None:
+        """Применить сообщение отзыва: {"u": student_id, "t": epoch} или {"j": jti, "e": exp}"""
+        if "u" in message:
+            if message["t"] > self.epochs.get(message["u"], 0):
+                self.epochs[message["u"]] = message["t"]
+        elif "j" in message:
+            self.denied[message["j"]] = message["e"]
+        self._maybe_prune()
+
+    def _on_message(self, payload: str) -> None:
+        self.apply(json.loads(payload))
+
+    def _maybe_prune(self) -> None:
+        now = time.time()
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        horizon = now - self.token_ttl
+        self.epochs = {sid: t for sid, t in self.epochs.items() if t > horizon}
+        self.denied = {jti: exp for jti, exp in self.denied.items() if exp > now}
+
+    # ========== ОТЗЫВ ==========
+    async def revoke_user(self, session: AsyncSession, student_id: str) -> float:
+        """Отозвать все access токены пользователя, выпущенные до текущего момента"""
+        epoch = time.time()
+        repo = RevocationRepository(session)
+        await repo.set_user_epoch(student_id, datetime.fromtimestamp(epoch, timezone.utc))
+        await repo.notify(REVOCATION_CHANNEL, json.dumps({"u": student_id, "t": epoch}))
+        await session.commit()
+        self.apply({"u": student_id, "t": epoch})
+        return epoch
+
+    async def revoke_token(self, session: AsyncSession, student_id: str, jti: str, exp: float) -> None:
+        """Отозвать один access токен по jti"""
+        repo = RevocationRepository(session)
+        await repo.add_jti(jti, student_id, datetime.fromtimestamp(exp, timezone.utc))
+        await repo.notify(REVOCATION_CHANNEL, json.dumps({"j": jti, "e": exp}))
+        await session.commit()
+        self.apply({"j": jti, "e": exp})
+
+    # ========== СИНХРОНИЗАЦИЯ ==========
+    async def load(self, reconnected: bool = False) -> None:
+        """Перечитать действующие отзывы из БД (при старте и после обрыва LISTEN)"""
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as session:
+            repo = RevocationRepository(session)
+            epochs, jtis = await repo.load_active(now - timedelta(seconds=self.token_ttl), now)
+            if not reconnected:
+                await repo.cleanup_expired(now)
+        # Слияние, а не замена: уведомления, пришедшие во время чтения, сохраняются
+        for sid, t in epochs:
+            self.apply({"u": sid, "t": t.timestamp()})
+        for jti, exp in jtis:
+            self.apply({"j": jti, "e": exp.timestamp()})
+
+    def start(self) -> None:
+        self._listener = PgListener(REVOCATION_CHANNEL, self._on_message, self.load)
+        self._listener.start()
+
+    async def stop(self) -> None:
+        if self._listener:
+            await self._listener.stop()
+            self._listener = None
+
+    def status(self) -> dict:
+        return {
+            "epochs": len(self.epochs),
+            "denied": len(self.denied),
+            "listening": bool(self._listener and self._listener.connected),
+            "reconnects": self._listener.reconnects if self._listener else 0,
+        }
+
+
+revocation_list = RevocationList()
@@ -0,0 +1,111 @@
+# backend/src/services/roster_import.py
+import csv
+import io
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.user import UserCreate, UserRole
+from src.services.invalidation_bus import invalidation_bus
+
+ROSTER_COLUMNS = ["student_id", "name", "faculty", "role"]
+
+
+def parse_roster(data: bytes, fmt: str) -> List[Dict[str, Any]]:
+    """
+    Разобрать файл списка студентов
+    JSON: [{"student_id", "name", "faculty", "role"?}, ...]; CSV с теми же колонками
+    """
+    content = data.decode("utf-8-sig")
+    if fmt == "json":
+        items = json.loads(content)
+        if isinstance(items, dict):
+            items = items.get("users", [])
+        if not isinstance(items, list):
+            raise ValueError("JSON должен быть списком пользователей")
+        return items
+    try:
+        return list(csv.DictReader(io.StringIO(content)))
+    except csv.Error as e:
+        raise ValueError(f"некорректный CSV: {e}") from e
+
+
+def validate_roster(items: List[Any]) -> Tuple[List[Tuple[str, str, str, Optional[str]]], List[Dict[str, Any]]]:
+    """
+    Проверить записи списка
+    Возвращает: (строки (student_id, name, faculty, role) без повторов — последняя
+    запись студента побеждает, ошибки [{"row": номер с 1, "error": ...}])
+    role = None — роль не указана: новым пользователям USER, у существующих не меняется
+    """
+    rows: Dict[str, Tuple[str, str, str, Optional[str]]] = {}
+    errors: List[Dict[str, Any]] = []
+
+    for index, item in enumerate(items, start=1):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("ожидается объект пользователя")
+            user = UserCreate.model_validate({
+                key: (str(item[key]).strip() if item.get(key) is not None else None)
+                for key in ("student_id", "name", "faculty")
+            })
+            if not user.student_id or not user.name or not user.faculty:
+                raise ValueError("student_id, name и faculty обязательны")
+            role = item.get("role")
+            if role is not None and not isinstance(role, str):
+                raise ValueError("role должна быть строкой")
+            role = role.strip().lower() if role else ""
+            # В БД enum хранится по имени (USER/ADMIN/GUEST)
+            role_name = UserRole(role).name if role else None
+            rows[user.student_id] = (user.student_id, user.name, user.faculty, role_name)
+        except ValidationError as e:
+            errors.append({
+                "row": index,
+                "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            })
+        except ValueError as e:
+            errors.append({"row": index, "error": str(e)})
+
+    return list(rows.values()), errors
+
+
+async def import_roster(session: AsyncSession, rows: List[Tuple[str, str, str, Optional[str]]]) -> Dict[str, int]:
+    """
+    Upsert пользователей одной транзакцией:
+    COPY во временную таблицу + INSERT ... ON CONFLICT (student_id) DO UPDATE
+    Роль существующего пользователя меняется, только если она указана в файле
+    """
+    if not rows:
+        return {"created": 0, "updated": 0}
+    try:
+        # Через сессию: она открывает транзакцию, иначе драйвер выполнит
+        # CREATE в autocommit и ON COMMIT DROP удалит таблицу сразу
+        await session.execute(text(
+            "CREATE TEMP TABLE roster_staging "
+            "(student_id text PRIMARY KEY, name text, faculty text, role text) ON COMMIT DROP"
+        ))
+        conn = await session.connection()
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        await driver.copy_records_to_table("roster_staging", records=rows, columns=ROSTER_COLUMNS)
+
+        result = await session.execute(text(
+            "INSERT INTO users (student_id, name, faculty, role, created_at) "
+            "SELECT student_id, name, faculty, COALESCE(role, 'USER')::userrole, now() FROM roster_staging "
+            "ON CONFLICT (student_id) DO UPDATE SET "
+            "name = EXCLUDED.name, faculty = EXCLUDED.faculty, "
+            "role = COALESCE((SELECT s.role::userrole FROM roster_staging s "
+            "WHERE s.student_id = EXCLUDED.student_id), users.role) "
+            "RETURNING (xmax = 0) AS inserted"
+        ))
+        inserted = [row.inserted for row in result]
+        invalidation_bus.publish(session, "user")
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+
+    created = sum(1 for flag in inserted if flag)
+    return {"created": created, "updated": len(inserted) - created}
@@ -0,0 +1,95 @@
+# backend/src/services/single_flight.py
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from src.database.circuit_breaker import db_breaker, GUARDED_KEY
+from src.database.connection import AsyncSessionLocal
+
+MAX_STATS_KEYS = 1000
+
+
+class SingleFlight:
+    """
+    Схлопывание одинаковых конкурентных чтений
+
+    Первый запрос по ключу (лидер) запускает загрузку отдельной задачей,
+    остальные запросы с тем же ключом, пришедшие до её окончания, ждут ту же
+    задачу и получают тот же результат (или то же исключение). Задача не
+    привязана к запросу лидера: если его клиент отключился, загрузка
+    доводится до конца для остальных. Результат не кэшируется — следующий
+    запрос после окончания загрузки снова идёт в БД.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._stats: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+    def _key_stats(self, key: Hashable) -> Dict[str, int]:
+        name = ":".join(map(str, key)) if isinstance(key, tuple) else str(key)
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = {"calls": 0, "fetches": 0, "shared": 0, "errors": 0, "max_waiters": 0}
+            if len(self._stats) > MAX_STATS_KEYS:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(name)
+        return stats
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполнить fetch() или присоединиться к уже идущему fetch по тому же ключу"""
+        stats = self._key_stats(key)
+        stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            stats["fetches"] += 1
+            task = asyncio.create_task(fetch())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t, key=key, stats=stats: self._done(key, t, stats))
+        else:
+            stats["shared"] += 1
+        self._waiters[key] += 1
+        stats["max_waiters"] = max(stats["max_waiters"], self._waiters[key])
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if key in self._waiters and self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _done(self, key: Hashable, task: asyncio.Task, stats: Dict[str, int]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+        if task.cancelled():
+            stats["errors"] += 1
+        elif task.exception() is not None:
+            stats["errors"] += 1
+
+    def stats(self, top: int = 20) -> dict:
+        """Счётчики по ключам (top ключей по числу схлопнутых запросов)"""
+        keys = sorted(self._stats.items(), key=lambda item: item[1]["shared"], reverse=True)[:top]
+        calls = sum(s["calls"] for s in self._stats.values())
+        fetches = sum(s["fetches"] for s in self._stats.values())
+        return {
+            "in_flight": len(self._inflight),
+            "calls": calls,
+            "fetches": fetches,
+            "coalesced_ratio": round(1 - fetches / calls, 4) if calls else 0.0,
+            "keys": dict(keys),
+        }
+
+
+async def with_session(load: Callable[..., Awaitable[Any]], *args) -> Any:
+    """Загрузка в собственной сессии — сессия запроса-лидера может закрыться раньше"""
+    async with AsyncSessionLocal() as session:
+        session.info[GUARDED_KEY] = True
+        try:
+            return await load(session, *args)
+        except Exception as e:
+            db_breaker.record_exception(e)
+            raise
+
+
+poll_reads = SingleFlight()
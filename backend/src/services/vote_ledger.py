@@ -0,0 +1,608 @@
+# backend/src/services/vote_ledger.py
+import asyncio
+import fcntl
+import json
+import os
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import DataError, IntegrityError
+
+from src.database.connection import AsyncSessionLocal
+from src.models.poll import Option
+from src.queries.orm import DuplicateVoteError, VoteRepository
+from src.services.voter_filter import voter_filter
+from src.config import settings
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+SNAPSHOT_FILE = "snapshot.json"
+DEAD_LETTER_FILE = "dead-letter.log"
+APPEND_LOCK_FILE = "append.lock"
+PROJECTOR_LOCK_FILE = "projector.lock"
+# Как часто воркер пытается забрать проекцию разделов, оставшихся без владельца
+CLAIM_INTERVAL_SECONDS = 1.0
+
+
+class LedgerResync(Exception):
+    """Воркер пропустил удалённые сегменты раздела — голос нужно перепроверить по БД"""
+
+
+class _Partition:
+    """Раздел журнала part-NN: сегменты, снимок и блокировки одного диапазона студентов"""
+
+    def __init__(self, index: int, directory: str):
+        self.index = index
+        self.directory = directory
+        # Отдельные дескрипторы: flock привязан к открытому файлу, и запись
+        # с чтением проектора в одном процессе тоже должны исключать друг друга
+        self.append_lock = None
+        self.read_lock = None
+        self.projector_lock = None
+
+        # Запись (под эксклюзивной блокировкой)
+        self.segment = None
+        self.segment_first = 0
+        self.segment_size = 0
+        self.position: Optional[Tuple[int, int]] = None
+        self.last_seq = 0
+        self.snapshot_seq = 0
+        self.snapshot_mtime = 0.0
+        # Голоса из журнала, которые этот процесс видел: (poll_id, student_id) -> (seq, когда увидел)
+        self.pending: Dict[Tuple[int, str], Tuple[int, float]] = {}
+        self.buffer: List[Tuple[dict, asyncio.Future]] = []
+        self.failed: Optional[OSError] = None
+
+        # Проекция (только у владельца раздела)
+        self.project_position: Optional[Tuple[int, int]] = None
+        self.projected_seq = 0
+        self.read_seq = 0
+        self.dead_lettered = 0
+        self.last_snapshot = 0.0
+
+    @property
+    def owned(self) -> bool:
+        return self.projector_lock is not None
+
+
+class VoteLedger:
+    """
+    Журнал голосов (append-only) с групповым fsync
+
+    Голос считается принятым, как только его запись в сегменте журнала
+    сброшена на диск: записи, пришедшие за время одного fsync, пишутся
+    одной пачкой. Проектор асинхронно применяет журнал к Postgres
+    (VoteRepository.project_votes — идемпотентно), поэтому задержка
+    приёма голоса не зависит от задержки БД.
+
+    Журнал общий для всех воркеров и разбит на разделы part-NN по
+    crc32(student_id): все голоса студента попадают в один раздел, с
+    какого бы воркера они ни пришли. Запись в раздел идёт под flock
+    append.lock; под блокировкой воркер сначала дочитывает записи других
+    воркеров и только потом отсеивает повторы, поэтому 202 получает
+    ровно один голос студента в опросе — тот, что записан в журнал
+    первым, он же и попадает в БД.
+
+    Проецирует раздел один воркер — владелец projector.lock; раздел
+    упавшего воркера забирает любой живой. Владелец периодически
+    сохраняет снимок раздела — номер последней применённой записи, с
+    которой проекция продолжается после перезапуска, — и удаляет
+    сегменты, целиком покрытые снимком. Счётчики голосов в снимок не
+    входят: журнал видит только голоса, принятые при включённом журнале,
+    поэтому options.votes и polls.total_votes ведёт БД. Записи,
+    которые БД отвергает по целостности (опрос или вариант удалён),
+    уходят в dead-letter.log раздела, временные ошибки БД повторяются.
+
+    Принятие голоса обходится без БД: варианты опросов загружаются при
+    старте, голоса из БД отсекает фильтр Блума (EXISTS — только на
+    "возможно"), голоса из журнала — проверка под блокировкой раздела.
+    """
+
+    def __init__(self, directory: str = None):
+        self.base_dir = directory or settings.VOTE_LEDGER_DIR
+        self.partition_count = settings.VOTE_LEDGER_PARTITIONS
+        self.segment_bytes = settings.VOTE_LEDGER_SEGMENT_BYTES
+        self.group_commit = settings.VOTE_LEDGER_GROUP_COMMIT_MS / 1000
+        self.batch_size = settings.VOTE_LEDGER_PROJECT_BATCH
+        self.snapshot_interval = settings.VOTE_LEDGER_SNAPSHOT_INTERVAL_SECONDS
+        self.project_poll = settings.VOTE_LEDGER_PROJECT_POLL_MS / 1000
+        self.pending_grace = settings.VOTE_LEDGER_PENDING_GRACE_SECONDS
+
+        self._partitions: List[_Partition] = []
+        self._option_polls: Dict[int, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._project_wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._flushing = 0
+        self._last_claim = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def projection_lag(self) -> int:
+        """Записей, известных воркеру и ещё не применённых его проектором"""
+        return sum(max(p.last_seq, p.read_seq) - p.projected_seq for p in self._partitions if p.owned)
+
+    # ========== LIFECYCLE ==========
+    async def start(self) -> None:
+        """Открыть разделы, забрать свободную проекцию и запустить фоновые задачи"""
+        self._wakeup = asyncio.Event()
+        self._project_wakeup = asyncio.Event()
+        await asyncio.to_thread(self._open)
+        await self._load_options()
+        self._tasks = [
+            asyncio.create_task(self._flush_loop()),
+            asyncio.create_task(self._project_loop()),
+        ]
+        owned = [p.index for p in self._partitions if p.owned]
+        print(f"📒 Vote ledger {self.base_dir}: {self.partition_count} partitions, "
+              f"projecting {len(owned)}, {sum(len(p.pending) for p in self._partitions)} pending votes")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Дописать буфер, догнать проекцию своих разделов, сохранить снимки"""
+        if not self._tasks:
+            return
+        deadline = time.monotonic() + timeout
+        while (self._flushing or any(p.buffer for p in self._partitions)) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for partition in self._partitions:
+            if partition.owned and time.monotonic() < deadline:
+                try:
+                    await asyncio.wait_for(self._project_partition(partition), deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    pass
+                await asyncio.to_thread(self._write_snapshot, partition)
+        await asyncio.to_thread(self._close)
+
+    # ========== ACCEPT ==========
+    def partition_of(self, student_id: str) -> _Partition:
+        return self._partitions[zlib.crc32(student_id.encode()) % self.partition_count]
+
+    async def option_poll_id(self, db, option_id: int) -> Optional[int]:
+        """Опрос варианта ответа (кэшируется — варианты не меняют опрос)"""
+        poll_id = self._option_polls.get(option_id)
+        if poll_id is None:
+            # Вариант опроса, созданного после старта воркера
+            result = await db.execute(select(Option.poll_id).where(Option.id == option_id))
+            poll_id = result.scalar_one_or_none()
+            if poll_id is not None:
+                self._option_polls[option_id] = poll_id
+        return poll_id
+
+    async def append_vote(self, poll_id: int, option_id: int, student_id: str) -> int:
+        """
+        Записать голос в журнал; возвращает номер записи в разделе, когда она на диске
+        DuplicateVoteError — голос студента в опросе уже есть в журнале,
+        LedgerResync — нужно перепроверить голос по БД и повторить
+        """
+        partition = self.partition_of(student_id)
+        if (poll_id, student_id) in partition.pending:
+            raise DuplicateVoteError("User has already voted in this poll")
+        record = {
+            "poll_id": poll_id,
+            "option_id": option_id,
+            "student_id": student_id,
+            "ts": datetime.now(timezone.utc).isoformat()
+        }
+        future = asyncio.get_running_loop().create_future()
+        partition.buffer.append((record, future))
+        self._wakeup.set()
+        return await future
+
+    def status(self) -> dict:
+        failed = [f"part-{p.index:02d}: {p.failed}" for p in self._partitions if p.failed]
+        return {
+            "directory": self.base_dir,
+            "partitions": self.partition_count,
+            "owned_partitions": [p.index for p in self._partitions if p.owned],
+            "projection_lag": self.projection_lag,
+            "dead_lettered": sum(p.dead_lettered for p in self._partitions),
+            "pending_votes": sum(len(p.pending) for p in self._partitions),
+            "write_failed": failed or None,
+            "segments": sum(len(self._segments(p)) for p in self._partitions),
+        }
+
+    # ========== GROUP COMMIT ==========
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if self.group_commit:
+                # Копим записи, пришедшие за окно группового коммита
+                await asyncio.sleep(self.group_commit)
+            self._wakeup.clear()
+            work = []
+            for partition in self._partitions:
+                if partition.buffer:
+                    work.append((partition, partition.buffer))
+                    partition.buffer = []
+            # Разделы — разные файлы и блокировки, их fsync идут параллельно
+            self._flushing += 1
+            try:
+                await asyncio.gather(*(self._flush(partition, batch) for partition, batch in work))
+            finally:
+                self._flushing -= 1
+
+    async def _flush(self, partition: _Partition, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        try:
+            tail, accepted, duplicates, resync = await asyncio.to_thread(self._commit, partition, batch)
+        except Exception as e:
+            print(f"Vote ledger write failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if resync:
+            # Часть записей раздела не прочитана — фильтр строится заново из БД
+            voter_filter.invalidate()
+        for record in tail:
+            voter_filter.add(record["poll_id"], record["student_id"])
+        for record, future in accepted:
+            voter_filter.add(record["poll_id"], record["student_id"])
+            if not future.done():
+                future.set_result(record["seq"])
+        for _, future in duplicates:
+            if not future.done():
+                future.set_exception(DuplicateVoteError("User has already voted in this poll"))
+        for _, future in resync:
+            if not future.done():
+                future.set_exception(LedgerResync())
+        if partition.owned:
+            self._project_wakeup.set()
+
+    def _commit(self, partition: _Partition, batch: List[Tuple[dict, asyncio.Future]]):
+        """
+        Под эксклюзивной блокировкой раздела: дочитать записи других
+        воркеров, отсеять повторы и дописать пачку одним fsync
+        Возвращает (чужие записи, принятые, повторы, на перепроверку)
+        """
+        if partition.failed is not None:
+            raise RuntimeError(f"Vote ledger partition {partition.index} is read-only "
+                               f"after an unrecoverable write error: {partition.failed}")
+        fcntl.flock(partition.append_lock, fcntl.LOCK_EX)
+        try:
+            self._load_snapshot_seq(partition)
+            tail, partition.position, gap = self._read_from(partition, partition.position, truncate_tail=True)
+            now = time.monotonic()
+            self._remember(partition, tail, now)
+            if gap:
+                return tail, [], [], batch
+
+            accepted, duplicates = [], []
+            for record, future in batch:
+                key = (record["poll_id"], record["student_id"])
+                if key in partition.pending:
+                    duplicates.append((record, future))
+                    continue
+                partition.last_seq += 1
+                record["seq"] = partition.last_seq
+                partition.pending[key] = (record["seq"], now)
+                accepted.append((record, future))
+            if accepted:
+                data = "".join(json.dumps(record) + "\n" for record, _ in accepted).encode()
+                try:
+                    self._write_durable(partition, accepted[0][0]["seq"], data)
+                except BaseException:
+                    for record, _ in accepted:
+                        partition.pending.pop((record["poll_id"], record["student_id"]), None)
+                    partition.last_seq -= len(accepted)
+                    raise
+            return tail, accepted, duplicates, []
+        finally:
+            fcntl.flock(partition.append_lock, fcntl.LOCK_UN)
+
+    def _remember(self, partition: _Partition, records: List[dict], now: float) -> None:
+        for record in records:
+            partition.last_seq = max(partition.last_seq, record["seq"])
+            partition.pending[(record["poll_id"], record["student_id"])] = (record["seq"], now)
+        # Голоса из снимка уже в БД; запас по времени покрывает запросы,
+        # которые проверили БД до проекции голоса и ещё не дошли до журнала
+        expired = [key for key, (seq, seen) in partition.pending.items()
+                   if seq <= partition.snapshot_seq and now - seen > self.pending_grace]
+        for key in expired:
+            del partition.pending[key]
+
+    def _write_durable(self, partition: _Partition, first_seq: int, data: bytes) -> None:
+        segments = self._segments(partition)
+        last_first = segments[-1][0] if segments else None
+        if partition.segment is None or partition.segment_first != last_first:
+            # Последний сегмент мог открыть другой воркер
+            if last_first is None:
+                self._rotate(partition, first_seq)
+            else:
+                self._open_segment(partition, last_first)
+        if partition.segment_size and partition.segment_size + len(data) > self.segment_bytes:
+            self._rotate(partition, first_seq)
+        offset = partition.segment_size
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[partition.segment.write(view):]
+            os.fsync(partition.segment.fileno())
+        except BaseException:
+            self._discard_tail(partition, offset)
+            raise
+        partition.segment_size += len(data)
+        partition.position = (partition.segment_first, partition.segment_size)
+
+    def _discard_tail(self, partition: _Partition, offset: int) -> None:
+        """
+        Откатить пачку, запись которой не удалась: клиенты получают ошибку,
+        значит эти голоса не должны проецироваться из журнала
+        """
+        try:
+            os.ftruncate(partition.segment.fileno(), offset)
+            os.fsync(partition.segment.fileno())
+        except OSError as e:
+            # Хвост не откатить — дальнейшие записи легли бы после неподтверждённых голосов
+            partition.failed = e
+            print(f"❌ Vote ledger cannot truncate {partition.segment.name} to {offset}: {e}; "
+                  f"partition {partition.index} is read-only")
+
+    # ========== PROJECTION ==========
+    async def _project_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._project_wakeup.wait(), self.project_poll)
+            except asyncio.TimeoutError:
+                pass
+            self._project_wakeup.clear()
+            if time.monotonic() - self._last_claim >= CLAIM_INTERVAL_SECONDS:
+                self._last_claim = time.monotonic()
+                await asyncio.to_thread(self._claim_partitions)
+            for partition in self._partitions:
+                if not partition.owned:
+                    continue
+                await self._project_partition(partition)
+                if time.monotonic() - partition.last_snapshot >= self.snapshot_interval:
+                    partition.last_snapshot = time.monotonic()
+                    await asyncio.to_thread(self._write_snapshot, partition)
+
+    async def _project_partition(self, partition: _Partition) -> None:
+        records, position = await asyncio.to_thread(self._read_for_projection, partition)
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            rejected = await self._project(batch)
+            if rejected:
+                await asyncio.to_thread(self._dead_letter, partition, rejected)
+            partition.projected_seq = batch[-1]["seq"]
+        # Позиция сдвигается после применения: прерванная (stop) проекция
+        # перечитает те же записи, применённые отсеет projected_seq
+        partition.project_position = position
+
+    def _read_for_projection(self, partition: _Partition) -> Tuple[List[dict], Optional[Tuple[int, int]]]:
+        # Разделяемая блокировка: пачка, которую сейчас пишут, ещё не подтверждена
+        fcntl.flock(partition.read_lock, fcntl.LOCK_SH)
+        try:
+            records, position, _ = self._read_from(
+                partition, partition.project_position, truncate_tail=False
+            )
+        finally:
+            fcntl.flock(partition.read_lock, fcntl.LOCK_UN)
+        records = [record for record in records if record["seq"] > partition.projected_seq]
+        if records:
+            partition.read_seq = records[-1]["seq"]
+        return records, position
+
+    async def _project(self, batch: List[dict]) -> List[Tuple[dict, str]]:
+        """
+        Применить пачку к БД; возвращает записи, которые применить нельзя
+        (ошибка целостности — например, опрос или вариант удалён — или
+        повреждённая запись)
+
+        Ошибки соединения и таймауты повторяются с паузой. Ошибка данных
+        делит пачку пополам, пока не останется одна запись, — она уходит
+        в dead-letter, остальные применяются.
+        """
+        delay = 0.5
+        while True:
+            try:
+                async with AsyncSessionLocal() as session:
+                    await VoteRepository(session).project_votes(batch)
+                return []
+            except asyncio.CancelledError:
+                raise
+            except (IntegrityError, DataError, KeyError, TypeError, ValueError) as e:
+                # Отказ БД по целостности или повреждённая запись журнала
+                if len(batch) == 1:
+                    return [(batch[0], str(getattr(e, "orig", None) or repr(e))[:500])]
+                middle = len(batch) // 2
+                return await self._project(batch[:middle]) + await self._project(batch[middle:])
+            except Exception as e:
+                print(f"Vote ledger projection failed, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def _dead_letter(self, partition: _Partition, rejected: List[Tuple[dict, str]]) -> None:
+        """Записи, не применимые к БД, — в dead-letter.log раздела (для разбора вручную)"""
+        with open(os.path.join(partition.directory, DEAD_LETTER_FILE), "a") as f:
+            for record, error in rejected:
+                f.write(json.dumps({**record, "error": error}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        partition.dead_lettered += len(rejected)
+        print(f"⚠️ Vote ledger: {len(rejected)} records moved to "
+              f"{os.path.basename(partition.directory)}/{DEAD_LETTER_FILE}: "
+              f"{rejected[0][1][:200]}")
+
+    # ========== STARTUP ==========
+    def _open(self) -> None:
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._partitions = []
+        for index in range(self.partition_count):
+            directory = os.path.join(self.base_dir, f"part-{index:02d}")
+            os.makedirs(directory, exist_ok=True)
+            partition = _Partition(index, directory)
+            lock_path = os.path.join(directory, APPEND_LOCK_FILE)
+            partition.append_lock = open(lock_path, "a")
+            partition.read_lock = open(lock_path, "a")
+            self._partitions.append(partition)
+
+            # Голоса журнала, ещё не попавшие в БД, — в pending
+            fcntl.flock(partition.append_lock, fcntl.LOCK_EX)
+            try:
+                self._load_snapshot_seq(partition)
+                tail, partition.position, _ = self._read_from(partition, None, truncate_tail=True)
+                self._remember(partition, [r for r in tail if r["seq"] > partition.snapshot_seq], time.monotonic())
+                partition.last_seq = max(partition.last_seq, partition.snapshot_seq)
+            finally:
+                fcntl.flock(partition.append_lock, fcntl.LOCK_UN)
+        self._claim_partitions()
+        self._last_claim = time.monotonic()
+
+    def _claim_partitions(self) -> None:
+        """Забрать проекцию разделов без владельца (первый запуск или упавший воркер)"""
+        for partition in self._partitions:
+            if partition.owned:
+                continue
+            lock_file = open(os.path.join(partition.directory, PROJECTOR_LOCK_FILE), "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            partition.projector_lock = lock_file
+            snapshot = self._read_snapshot(partition)
+            partition.projected_seq = partition.read_seq = snapshot["seq"]
+            partition.project_position = None
+            partition.last_snapshot = time.monotonic()
+
+    async def _load_options(self) -> None:
+        """Варианты всех опросов одним запросом — принятие голоса без БД"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(Option.id, Option.poll_id))
+            self._option_polls = dict(result.all())
+
+    # ========== FILES ==========
+    def _segments(self, partition: _Partition) -> List[Tuple[int, str]]:
+        segments = []
+        for name in os.listdir(partition.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                first_seq = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+                segments.append((first_seq, os.path.join(partition.directory, name)))
+        return sorted(segments)
+
+    def _read_from(self, partition: _Partition, position: Optional[Tuple[int, int]], truncate_tail: bool):
+        """
+        Записи раздела после позиции (первая запись сегмента, смещение)
+        Возвращает (записи, новая позиция, пропуск) — пропуск, если сегмент
+        позиции удалён по снимку раньше, чем его дочитали
+        """
+        segments = self._segments(partition)
+        records, gap = [], False
+        start, offset = 0, 0
+        if position is not None:
+            firsts = [first for first, _ in segments]
+            if position[0] in firsts:
+                start, offset = firsts.index(position[0]), position[1]
+            else:
+                gap = True
+                start = next((i for i, first in enumerate(firsts) if first > position[0]), len(segments))
+        for index in range(start, len(segments)):
+            first, path = segments[index]
+            is_last = index == len(segments) - 1
+            end = self._read_segment(path, offset if index == start else 0, records, truncate_tail and is_last)
+            position = (first, end)
+        return records, position, gap
+
+    @staticmethod
+    def _read_segment(path: str, offset: int, records: List[dict], truncate_tail: bool) -> int:
+        good_offset = offset
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                good_offset += len(line)
+        if truncate_tail and good_offset < os.path.getsize(path):
+            # Недописанная запись после сбоя — не была подтверждена клиенту
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+        return good_offset
+
+    def _open_segment(self, partition: _Partition, first_seq: int) -> None:
+        if partition.segment is not None:
+            partition.segment.close()
+        path = os.path.join(partition.directory, f"{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}")
+        # Без буфера: при ошибке записи в процессе не остаётся недописанных байт
+        partition.segment = open(path, "ab", buffering=0)
+        partition.segment_first = first_seq
+        partition.segment_size = partition.segment.tell()
+
+    def _rotate(self, partition: _Partition, first_seq: int) -> None:
+        self._open_segment(partition, first_seq)
+        self._fsync_directory(partition.directory)
+
+    def _read_snapshot(self, partition: _Partition) -> dict:
+        path = os.path.join(partition.directory, SNAPSHOT_FILE)
+        if not os.path.exists(path):
+            return {"seq": 0}
+        with open(path) as f:
+            return json.load(f)
+
+    def _load_snapshot_seq(self, partition: _Partition) -> None:
+        path = os.path.join(partition.directory, SNAPSHOT_FILE)
+        try:
+            mtime = os.path.getmtime(path)
+        except FileNotFoundError:
+            return
+        if mtime != partition.snapshot_mtime:
+            partition.snapshot_mtime = mtime
+            partition.snapshot_seq = self._read_snapshot(partition)["seq"]
+
+    def _write_snapshot(self, partition: _Partition) -> None:
+        seq = partition.projected_seq
+        if seq == self._read_snapshot(partition)["seq"]:
+            return
+        tmp_path = os.path.join(partition.directory, SNAPSHOT_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"seq": seq}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(partition.directory, SNAPSHOT_FILE))
+        self._fsync_directory(partition.directory)
+
+        # Сегменты, целиком покрытые снимком, больше не нужны; последний
+        # остаётся всегда — в него дописывают воркеры
+        segments = self._segments(partition)
+        for (_, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 <= seq:
+                os.remove(path)
+
+    @staticmethod
+    def _fsync_directory(directory: str) -> None:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _close(self) -> None:
+        for partition in self._partitions:
+            if partition.segment is not None:
+                partition.segment.close()
+                partition.segment = None
+            if partition.projector_lock is not None:
+                fcntl.flock(partition.projector_lock, fcntl.LOCK_UN)
+                partition.projector_lock.close()
+                partition.projector_lock = None
+            for lock_file in (partition.append_lock, partition.read_lock):
+                if lock_file is not None:
+                    lock_file.close()
+            partition.append_lock = partition.read_lock = None
+
+
+vote_ledger = VoteLedger()
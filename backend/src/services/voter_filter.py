@@ -0,0 +1,155 @@
+# backend/src/services/voter_filter.py
+import asyncio
+import hashlib
+import math
+import time
+from typing import Dict, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.vote import Vote
+from src.config import settings
+
+
+class BloomFilter:
+    """
+    Компактный фильтр Блума по строковым ключам
+    Отвечает "точно нет" или "возможно да" (ложноположительные с вероятностью error_rate)
+    """
+    __slots__ = ("size", "hashes", "bits", "count", "capacity")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Двойное хэширование: h1 + i*h2 из одного 128-битного дайджеста
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+
+class _PollVoters:
+    __slots__ = ("bloom", "built_at")
+
+    def __init__(self, bloom: BloomFilter):
+        self.bloom = bloom
+        self.built_at = time.monotonic()
+
+
+class VoterFilter:
+    """
+    Фильтр проголосовавших по опросам (на процесс)
+
+    Прогревается из таблицы votes при первом обращении к опросу и
+    пополняется при каждом голосе, принятом этим процессом. Отрицательный
+    ответ ("точно не голосовал") не требует запроса к БД; на возможном
+    совпадении вызывающий код делает индексированный EXISTS.
+
+    Голоса, принятые другими процессами, фильтр не видит до перестройки
+    (раз в VOTER_FILTER_TTL_SECONDS), и его "точно нет" было бы ложным.
+    Поэтому фильтр работает только в единственном процессе приложения:
+    src.server выключает его (VOTER_FILTER_ENABLED) при нескольких
+    воркерах, при нескольких экземплярах его нужно выключить в настройках.
+    Выключенный фильтр всегда отвечает "возможно да".
+    """
+
+    def __init__(self, error_rate: float = None, ttl: float = None):
+        self.error_rate = error_rate or settings.VOTER_FILTER_ERROR_RATE
+        self.ttl = ttl or settings.VOTER_FILTER_TTL_SECONDS
+        self._polls: Dict[int, _PollVoters] = {}
+        self._warming: Dict[int, Set[str]] = {}
+        # Блокировка прогрева живёт, пока её ждут: [lock, число ожидающих]
+        self._locks: Dict[int, list] = {}
+
+    def __len__(self) -> int:
+        """Число опросов с построенным фильтром"""
+        return len(self._polls)
+
+    async def might_have_voted(self, session: AsyncSession, poll_id: int, student_id: str) -> bool:
+        """False — студент точно не голосовал; True — нужна проверка в БД"""
+        if not settings.VOTER_FILTER_ENABLED:
+            return True
+        entry = self._polls.get(poll_id)
+        if entry is None or time.monotonic() - entry.built_at > self.ttl:
+            entry = await self._warm(session, poll_id)
+        return student_id in entry.bloom
+
+    def add(self, poll_id: int, student_id: str) -> None:
+        """Учесть принятый голос"""
+        pending = self._warming.get(poll_id)
+        if pending is not None:
+            pending.add(student_id)
+        entry = self._polls.get(poll_id)
+        if entry is None:
+            return
+        entry.bloom.add(student_id)
+        if entry.bloom.count > entry.bloom.capacity:
+            # Фильтр переполнен — точность падает, перестроим при следующем обращении
+            self._polls.pop(poll_id, None)
+
+    def invalidate(self, poll_id: Optional[int] = None) -> None:
+        """Сбросить фильтр опроса (или все фильтры)"""
+        if poll_id is None:
+            self._polls.clear()
+        else:
+            self._polls.pop(poll_id, None)
+
+    def memory_bytes(self) -> int:
+        return sum(entry.bloom.memory_bytes for entry in self._polls.values())
+
+    async def _warm(self, session: AsyncSession, poll_id: int) -> _PollVoters:
+        slot = self._locks.setdefault(poll_id, [asyncio.Lock(), 0])
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                return await self._build(session, poll_id)
+        finally:
+            slot[1] -= 1
+            if not slot[1]:
+                self._locks.pop(poll_id, None)
+
+    async def _build(self, session: AsyncSession, poll_id: int) -> _PollVoters:
+        entry = self._polls.get(poll_id)
+        if entry is not None and time.monotonic() - entry.built_at <= self.ttl:
+            return entry
+
+        # Голоса, принятые во время прогрева, не должны потеряться
+        self._warming[poll_id] = set()
+        try:
+            result = await session.execute(
+                select(Vote.student_id).where(Vote.poll_id == poll_id)
+            )
+            voters = result.scalars().all()
+            bloom = BloomFilter(max(1024, len(voters) * 2), self.error_rate)
+            for student_id in voters:
+                bloom.add(student_id)
+            for student_id in self._warming[poll_id]:
+                bloom.add(student_id)
+        finally:
+            self._warming.pop(poll_id, None)
+
+        entry = _PollVoters(bloom)
+        self._polls[poll_id] = entry
+        return entry
+
+voter_filter = VoterFilter()
@@ -1,13 +1,86 @@
 # backend/src/utils/security.py
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from functools import lru_cache
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
 from src.config import settings
 from src.models.user import UserRole
+import base64
 import hashlib
+import json
+import secrets
+import time
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 15  # минут
 REFRESH_TOKEN_EXPIRE_DAYS = 3     # дней
 
+ASYMMETRIC_ALGORITHMS = {"ES256", "RS256"}
+
+# ========== КЛЮЧИ ПОДПИСИ ==========
+def _is_asymmetric() -> bool:
+    return settings.ALGORITHM in ASYMMETRIC_ALGORITHMS
+
+def jwk_thumbprint(public_jwk: dict) -> str:
+    """Отпечаток ключа по RFC 7638 — kid по умолчанию"""
+    members = {"EC": ("crv", "kty", "x", "y"), "RSA": ("e", "kty", "n")}[public_jwk["kty"]]
+    canonical = json.dumps({m: public_jwk[m] for m in members}, separators=(",", ":"), sort_keys=True)
+    digest = hashlib.sha256(canonical.encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+@lru_cache(maxsize=1)
+def _signing_key() -> tuple[str, Key | str]:
+    """(kid, ключ подписи); для HS256 — общий SECRET_KEY без kid"""
+    if not _is_asymmetric():
+        return "", settings.SECRET_KEY
+    if not settings.JWT_PRIVATE_KEY_PATH:
+        raise RuntimeError(f"JWT_PRIVATE_KEY_PATH не задан для {settings.ALGORITHM}")
+    with open(settings.JWT_PRIVATE_KEY_PATH) as f:
+        private_key = jwk.construct(f.read(), settings.ALGORITHM)
+    public_jwk = private_key.public_key().to_dict()
+    return settings.JWT_KEY_ID or jwk_thumbprint(public_jwk), private_key
+
+@lru_cache(maxsize=1)
+def _public_keys() -> dict[str, Key]:
+    """
+    Разобранные публичные ключи по kid (разбираются один раз на процесс)
+    Текущий ключ подписи + ключи из JWT_PUBLIC_KEYS_PATH
+    """
+    keys: dict[str, Key] = {}
+    if settings.JWT_PUBLIC_KEYS_PATH:
+        with open(settings.JWT_PUBLIC_KEYS_PATH) as f:
+            for entry in json.load(f).get("keys", []):
+                alg = entry.get("alg", settings.ALGORITHM)
+                keys[entry.get("kid") or jwk_thumbprint(entry)] = jwk.construct(entry, alg)
+    if settings.JWT_PRIVATE_KEY_PATH:
+        kid, private_key = _signing_key()
+        keys[kid] = private_key.public_key()
+    return keys
+
+def get_jwks() -> dict:
+    """JWKS-документ публичных ключей проверки (пустой для HS256)"""
+    if not _is_asymmetric():
+        return {"keys": []}
+    return {
+        "keys": [
+            {**key.to_dict(), "kid": kid, "use": "sig"}
+            for kid, key in _public_keys().items()
+        ]
+    }
+
+def _encode(claims: dict) -> str:
+    kid, key = _signing_key()
+    headers = {"kid": kid} if kid else None
+    return jwt.encode(claims, key, algorithm=settings.ALGORITHM, headers=headers)
+
+def _decode(token: str) -> dict:
+    if not _is_asymmetric():
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = _public_keys().get(kid)
+    if key is None:
+        raise JWTError(f"Unknown key id: {kid}")
+    return jwt.decode(token, key, algorithms=[settings.ALGORITHM])
+
 def create_access_token(data: dict, role: UserRole | str = UserRole.USER):
     """Создание access токена (короткое время жизни)"""
     to_encode = data.copy()
@@ -20,10 +93,13 @@ def create_access_token(data: dict, role: UserRole | str = UserRole.USER):
     
     to_encode.update({
         "exp": expire,
+        # iat с долями секунды — для сравнения с эпохой отзыва пользователя
+        "iat": time.time(),
+        "jti": secrets.token_hex(8),
         "role": role_value,
         "type": "access"
     })
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt
 
 def create_refresh_token(student_id: str) -> tuple[str, datetime]:
@@ -40,7 +116,7 @@ def create_refresh_token(student_id: str) -> tuple[str, datetime]:
         "jti": hashlib.sha256(f"{student_id}{datetime.utcnow().isoformat()}".encode()).hexdigest()[:16]
     }
     
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt, expire
 
 def verify_token(token: str, expected_type: str = "access") -> dict | None:
@@ -49,7 +125,7 @@ def verify_token(token: str, expected_type: str = "access") -> dict | None:
     expected_type: "access" или "refresh"
     """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _decode(token)
         
         token_type = payload.get("type")
         if token_type != expected_type:
@@ -65,6 +141,7 @@ def verify_token(token: str, expected_type: str = "access") -> dict | None:
             "student_id": student_id,
             "role": role,
             "exp": payload.get("exp"),
+            "iat": payload.get("iat"),
             "jti": payload.get("jti")
         }
     except JWTError:
@@ -31,7 +31,11 @@ export const DataService = {
           defaultOptions.headers['Authorization'] = `Bearer ${token}`;
         }
 
-        const response = await fetch(url, { ...defaultOptions, ...options });
+        const response = await fetch(url, {
+          ...defaultOptions,
+          ...options,
+          headers: { ...defaultOptions.headers, ...(options.headers || {}) }
+        });
         console.log(`Response status: ${response.status}`);
         
         // 🔹 Обработка 401 — пытаемся обновить токен
@@ -184,7 +188,13 @@ async login(studentId) {
   // === ОПРОСЫ ===
   async getPolls() {
     try {
-      const polls = await this.request('/api/polls'); 
+      // Статус голосов приходит вместе со списком — без запроса на каждый опрос
+      const polls = await this.request('/api/polls?include_my_vote=true'); 
+      polls.forEach(poll => {
+        if (poll.has_voted && poll.my_vote != null) {
+          this.saveVoteLocally(poll.id, poll.my_vote);
+        }
+      });
       this.cachePolls(polls);
       return polls;
     } catch (error) {
@@ -241,6 +251,7 @@ async login(studentId) {
     try {
       const result = await this.request('/api/votes', { 
         method: 'POST',
+        headers: { 'Idempotency-Key': this.voteIdempotencyKey(voteData) },
         body: JSON.stringify(voteData)
       });
       
@@ -344,6 +355,7 @@ async login(studentId) {
       try {
         await this.request('/api/votes', { 
           method: 'POST',
+          headers: { 'Idempotency-Key': this.voteIdempotencyKey(vote) },
           body: JSON.stringify(vote)
         });
         successfulSyncs.push(vote);
@@ -360,6 +372,11 @@ async login(studentId) {
   },
 
   // === ВСПОМОГАТЕЛЬНЫЕ МЕТОДЫ ===
+  // Один голос на опрос — ключ стабилен для всех повторов из очереди синхронизации
+  voteIdempotencyKey(voteData) {
+    return `vote-${voteData.poll_id}-${voteData.student_id}-${voteData.option_id}`;
+  },
+
   getAuthToken() {
     return localStorage.getItem(STORAGE_KEYS.AUTH_TOKEN);
   },